@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Compare reading the low-dimensional features of a dataset from the shared-memory columns of LeRobotDataset
+against reading each row from hf_dataset (`hf_dataset[idx]`).
+
+Camera keys are dropped from the returned items so that only the reading of rows is measured. For every number
+of workers, the throughput of a shuffled DataLoader and the total memory of its workers are
+reported. Memory is the proportional set size (PSS) read from /proc, so pages shared between workers are only
+counted once (Linux only).
+
+Example:
+
+```bash
+python benchmarks/datasets/run_columnar_store_benchmark.py \
+    --repo-id lerobot/aloha_static_coffee \
+    --num-workers 0 8 16 \
+    --batch-size 256
+```
+"""
+
+import argparse
+import time
+
+import torch
+
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+
+
+class LowDimDataset(torch.utils.data.Dataset):
+    def __init__(self, dataset: LeRobotDataset, use_columns: bool):
+        self.dataset = dataset
+        self.use_columns = use_columns
+        self.keys = [key for key in dataset.hf_dataset.column_names if key not in dataset.meta.camera_keys]
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, idx) -> dict:
+        if self.use_columns:
+            return {key: self.dataset._get_column(key)[idx] for key in self.keys}
+        return self.dataset.hf_dataset.select_columns(self.keys)[idx]
+
+
+def pss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run(dataset: LowDimDataset, batch_size: int, num_workers: int, num_batches: int) -> tuple[float, float]:
+    dataloader = torch.utils.data.DataLoader(
+        dataset, batch_size=batch_size, num_workers=num_workers, shuffle=True, drop_last=True
+    )
+    num_samples = 0
+    dl_iter = iter(dataloader)
+    # The first batch includes the startup of the workers
+    next(dl_iter)
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        batch = next(dl_iter)
+        num_samples += len(batch["index"])
+    elapsed = time.perf_counter() - start
+    workers = getattr(dl_iter, "_workers", [])
+    pss = sum(pss_mb(worker.pid) for worker in workers)
+    del dl_iter
+    return num_samples / elapsed, pss
+
+
+def main(repo_id: str, root: str | None, num_workers: list[int], batch_size: int, num_batches: int):
+    dataset = LeRobotDataset(repo_id, root=root)
+
+    print(f"{'num_workers':>11} | {'rows':>7} | {'samples/s':>9} | {'speedup':>7} | {'workers PSS (MB)':>16}")
+    for n in num_workers:
+        baseline = None
+        for use_columns in [False, True]:
+            samples_per_s, pss = run(LowDimDataset(dataset, use_columns), batch_size, n, num_batches)
+            baseline = baseline or samples_per_s
+            print(
+                f"{n:>11} | {'columns' if use_columns else 'hf':>7} | {samples_per_s:>9.1f} | "
+                f"{samples_per_s / baseline:>6.2f}x | {pss:>16.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--repo-id", type=str, default="lerobot/aloha_static_coffee")
+    parser.add_argument("--root", type=str, default=None, help="Local directory of the dataset.")
+    parser.add_argument("--num-workers", type=int, nargs="+", default=[0, 8, 16])
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--num-batches", type=int, default=20, help="Number of batches timed per setting.")
+    args = parser.parse_args()
+    main(**vars(args))
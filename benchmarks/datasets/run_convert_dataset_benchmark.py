@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measure the throughput of the offline v1.6 -> v2.0 -> v2.1 conversion depending on the number of workers.
+
+A v1.6 dataset of episodes of low-dimensional features (and optionally of one camera) is generated in a temporary
+directory, then converted to v2.0 and to v2.1 with each number of workers. Converting to v2.0 writes one parquet
+file per episode, converting to v2.1 computes the stats of each episode (decoding a sample of the frames of its
+videos). Jobs run in spawned processes, whose start-up time is included in the measures.
+
+Example:
+
+```bash
+python benchmarks/datasets/run_convert_dataset_benchmark.py --num-episodes 1000 --num-workers 0 2 4 8
+```
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import datasets
+import numpy as np
+import torch
+from safetensors.torch import save_file
+
+from lerobot.datasets.utils import write_json
+from lerobot.datasets.v2.convert_dataset_v1_to_v2 import V1_INFO_PATH, V1_STATS_PATH, convert_local_dataset
+from lerobot.datasets.v21.convert_dataset_v20_to_v21 import convert_local_dataset as convert_local_dataset_v21
+from lerobot.datasets.video_utils import StreamingVideoEncoder, VideoFrame
+
+FPS = 30
+
+
+def make_v1_dataset(root: Path, num_episodes: int, episode_length: int, video_shape: tuple | None) -> None:
+    rng = np.random.default_rng(0)
+    num_frames = num_episodes * episode_length
+    frame_index = np.tile(np.arange(episode_length), num_episodes)
+    rows = {
+        "observation.state": rng.random((num_frames, 6), dtype=np.float32),
+        "action": rng.random((num_frames, 6), dtype=np.float32),
+        "episode_index": np.repeat(np.arange(num_episodes), episode_length),
+        "frame_index": frame_index,
+        "timestamp": (frame_index / FPS).astype(np.float32),
+        "index": np.arange(num_frames),
+    }
+    features = {
+        "observation.state": datasets.Sequence(datasets.Value("float32"), length=6),
+        "action": datasets.Sequence(datasets.Value("float32"), length=6),
+        "episode_index": datasets.Value("int64"),
+        "frame_index": datasets.Value("int64"),
+        "timestamp": datasets.Value("float32"),
+        "index": datasets.Value("int64"),
+    }
+    if video_shape is not None:
+        rows["observation.images.cam"] = []
+        features["observation.images.cam"] = VideoFrame()
+        for ep_idx in range(num_episodes):
+            video_file = f"videos/observation.images.cam_episode_{ep_idx:06d}.mp4"
+            encoder = StreamingVideoEncoder(root / video_file, FPS)
+            for i in range(episode_length):
+                encoder.add_frame(rng.integers(0, 256, (*video_shape, 3), dtype=np.uint8))
+                rows["observation.images.cam"].append({"path": video_file, "timestamp": i / FPS})
+            encoder.finish()
+
+    dataset = datasets.Dataset.from_dict(rows, features=datasets.Features(features))
+    dataset.to_parquet(root / "data/train-00000-of-00001.parquet")
+    write_json({"fps": FPS, "video": video_shape is not None}, root / V1_INFO_PATH)
+    save_file({"action/mean": torch.from_numpy(rows["action"].mean(axis=0))}, root / V1_STATS_PATH)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--num-episodes", type=int, default=200)
+    parser.add_argument("--episode-length", type=int, default=100)
+    parser.add_argument("--num-workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument(
+        "--video-shape", type=int, nargs=2, default=None, help="Add a camera of this height and width."
+    )
+    parser.add_argument("--video-backend", type=str, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        v1_dir = Path(tmp_dir) / "v1.6"
+        make_v1_dataset(v1_dir, args.num_episodes, args.episode_length, args.video_shape)
+        for num_workers in args.num_workers:
+            v20_dir = Path(tmp_dir) / "v2.0"
+            start = time.perf_counter()
+            convert_local_dataset(v1_dir, v20_dir, single_task="Benchmark", num_workers=num_workers)
+            v20_elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            convert_local_dataset_v21(v20_dir, num_workers=num_workers, video_backend=args.video_backend)
+            v21_elapsed = time.perf_counter() - start
+            print(
+                f"{num_workers} workers: v1.6 -> v2.0 {args.num_episodes / v20_elapsed:.1f} episodes/s, "
+                f"v2.0 -> v2.1 {args.num_episodes / v21_elapsed:.1f} episodes/s"
+            )
+            shutil.rmtree(v20_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measure video decoding under the access patterns of training, for each video backend and number of workers.
+
+An access pattern is the stream of indices produced by a sampler, combined with the `delta_timestamps` of a
+policy (resolved from its default config as in training, e.g. 2 observation steps and 16 actions for
+"diffusion"). The samplers are:
+
+- shuffle: frames drawn uniformly at random from the whole dataset (`shuffle=True` in a DataLoader).
+- episode_aware: `EpisodeAwareSampler(shuffle=True)` dropping the `drop_n_last_frames` of the policy.
+- block: `EpisodeAwareSampler(shuffle=True, block_size=--block-size)`.
+- sequential: frames in order, as when replaying or evaluating episodes.
+
+Streams are generated once and saved in `--streams-dir` with the timestamp of each frame. Their file name
+covers every parameter they depend on (dataset, episodes, policy, sampler, number of samples and seed). When
+a stream file already exists, it is replayed as is, so that the same accesses are measured across releases
+(its parameters and timestamps are checked against those of the run). Each setting reads the stream through a
+DataLoader and reports samples/s, the p50/p99 latency of `dataset[idx]` (measured in the workers) and the
+peak RSS of the main process and its workers. The first batch, which includes the startup of the workers, is
+not timed.
+
+Results are written to a CSV file and a markdown table in `--output-dir`.
+
+Example:
+
+```bash
+python benchmarks/datasets/run_decode_pattern_benchmark.py \
+    --repo-id lerobot/aloha_static_coffee \
+    --policies diffusion act \
+    --backends pyav video_reader torchcodec \
+    --num-workers 0 4 8
+```
+"""
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import psutil
+import torch
+
+import lerobot
+from lerobot.datasets.factory import resolve_delta_timestamps
+from lerobot.datasets.lerobot_dataset import LeRobotDataset, LeRobotDatasetMetadata
+from lerobot.datasets.sampler import EpisodeAwareSampler
+from lerobot.policies.factory import make_policy_config
+
+SAMPLERS = ["shuffle", "episode_aware", "block", "sequential"]
+
+
+class TimedDataset(torch.utils.data.Dataset):
+    """Adds the time taken to load each item to the item, so that it is measured in the DataLoader workers."""
+
+    def __init__(self, dataset: LeRobotDataset):
+        self.dataset = dataset
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    def __getitem__(self, idx: int) -> dict:
+        start = time.perf_counter()
+        item = self.dataset[idx]
+        item["item_latency_s"] = torch.tensor(time.perf_counter() - start)
+        return item
+
+
+def make_index_stream(
+    dataset: LeRobotDataset, sampler_name: str, block_size: int, drop_n_last_frames: int, num_samples: int
+) -> list[int]:
+    if sampler_name == "shuffle":
+        sampler = torch.utils.data.RandomSampler(dataset)
+    elif sampler_name == "sequential":
+        sampler = torch.utils.data.SequentialSampler(dataset)
+    else:
+        sampler = EpisodeAwareSampler(
+            dataset.episode_data_index,
+            drop_n_last_frames=drop_n_last_frames if sampler_name == "episode_aware" else 0,
+            shuffle=True,
+            block_size=block_size if sampler_name == "block" else 1,
+        )
+    indices = []
+    while len(indices) < num_samples:  # new epochs until there are enough samples
+        indices.extend(int(idx) for idx in sampler)
+    return indices[:num_samples]
+
+
+def get_stream_path(
+    streams_dir: Path,
+    repo_id: str,
+    episodes: list[int] | None,
+    policy: str,
+    sampler_label: str,
+    num_samples: int,
+    seed: int,
+) -> Path:
+    if episodes is None:
+        episodes_label = "all"
+    else:
+        episodes_label = hashlib.sha1(json.dumps(episodes).encode()).hexdigest()[:8]
+    dataset_label = f"{repo_id.replace('/', '_')}_ep-{episodes_label}"
+    return streams_dir / f"{dataset_label}_{policy}_{sampler_label}_n{num_samples}_seed{seed}.json"
+
+
+def load_or_make_stream(
+    streams_dir: Path,
+    dataset: LeRobotDataset,
+    policy: str,
+    drop_n_last_frames: int,
+    sampler_name: str,
+    block_size: int,
+    num_samples: int,
+    seed: int,
+) -> list[int]:
+    sampler_label = f"{sampler_name}_{block_size}" if sampler_name == "block" else sampler_name
+    stream_path = get_stream_path(
+        streams_dir, dataset.repo_id, dataset.episodes, policy, sampler_label, num_samples, seed
+    )
+    timestamps = dataset.hf_dataset.with_format(None)["timestamp"]
+    if stream_path.is_file():
+        with open(stream_path) as f:
+            stream = json.load(f)
+        if stream["delta_timestamps"] != dataset.delta_timestamps:
+            raise ValueError(f"The delta_timestamps of {stream_path} differ from those of {policy}.")
+        params = {"episodes": dataset.episodes, "num_samples": num_samples, "seed": seed}
+        stored_params = {key: stream.get(key) for key in params}
+        if stored_params != params:
+            raise ValueError(f"{stream_path} was generated with {stored_params} instead of {params}.")
+        if [timestamps[idx] for idx in stream["indices"]] != stream["timestamps"]:
+            raise ValueError(
+                f"The timestamps of the frames of {stream_path} differ from those of the dataset."
+            )
+        return stream["indices"]
+
+    torch.manual_seed(seed)
+    indices = make_index_stream(dataset, sampler_name, block_size, drop_n_last_frames, num_samples)
+    stream = {
+        "repo_id": dataset.repo_id,
+        "policy": policy,
+        "sampler": sampler_label,
+        "block_size": block_size,
+        "episodes": dataset.episodes,
+        "num_samples": num_samples,
+        "seed": seed,
+        "delta_timestamps": dataset.delta_timestamps,
+        "indices": indices,
+        "timestamps": [timestamps[idx] for idx in indices],
+    }
+    streams_dir.mkdir(parents=True, exist_ok=True)
+    with open(stream_path, "w") as f:
+        json.dump(stream, f)
+    return indices
+
+
+def get_rss_bytes(process: psutil.Process) -> int:
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return rss
+
+
+def run(dataset: LeRobotDataset, indices: list[int], batch_size: int, num_workers: int) -> dict:
+    dataloader = torch.utils.data.DataLoader(
+        TimedDataset(dataset), batch_size=batch_size, num_workers=num_workers, sampler=indices
+    )
+    process = psutil.Process()
+    latencies = []
+    peak_rss = 0
+    num_samples = 0
+    dl_iter = iter(dataloader)
+    # The first batch includes the startup of the workers
+    next(dl_iter)
+    start = time.perf_counter()
+    for batch in dl_iter:
+        latencies.append(batch["item_latency_s"].numpy())
+        num_samples += len(batch["index"])
+        peak_rss = max(peak_rss, get_rss_bytes(process))
+    elapsed = time.perf_counter() - start
+    latencies = np.concatenate(latencies)
+    return {
+        "samples": num_samples,
+        "samples_per_s": num_samples / elapsed,
+        "p50_item_ms": np.percentile(latencies, 50) * 1e3,
+        "p99_item_ms": np.percentile(latencies, 99) * 1e3,
+        "peak_rss_mb": peak_rss / 1024**2,
+    }
+
+
+def backend_error(dataset: LeRobotDataset) -> str | None:
+    try:
+        dataset[0]
+    except Exception as e:
+        return f"{type(e).__name__}: {str(e).splitlines()[0]}"
+    return None
+
+
+def write_markdown(df: pd.DataFrame, path: Path) -> None:
+    lines = [
+        "| " + " | ".join(df.columns) + " |",
+        "|" + "|".join("---" for _ in df.columns) + "|",
+    ]
+    for row in df.itertuples(index=False):
+        lines.append("| " + " | ".join(f"{v:.2f}" if isinstance(v, float) else str(v) for v in row) + " |")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def main(
+    repo_id: str,
+    root: str | None,
+    episodes: list[int] | None,
+    policies: list[str],
+    samplers: list[str],
+    block_size: int,
+    backends: list[str],
+    num_workers: list[int],
+    batch_size: int,
+    num_batches: int,
+    streams_dir: Path,
+    output_dir: Path,
+    seed: int,
+):
+    meta = LeRobotDatasetMetadata(repo_id, root=root)
+    if len(meta.video_keys) == 0:
+        raise ValueError(f"{repo_id} has no video keys.")
+    num_samples = (num_batches + 1) * batch_size
+
+    rows = []
+    for policy in policies:
+        cfg = make_policy_config(policy) if policy != "none" else None
+        delta_timestamps = resolve_delta_timestamps(cfg, meta) if cfg is not None else None
+        drop_n_last_frames = getattr(cfg, "drop_n_last_frames", 0)
+        for backend in backends:
+            dataset = LeRobotDataset(
+                repo_id,
+                root=root,
+                episodes=episodes,
+                delta_timestamps=delta_timestamps,
+                video_backend=backend,
+            )
+            error = backend_error(dataset)
+            if error is not None:
+                logging.warning(f"Skipping the '{backend}' backend, which failed to load a frame: {error}")
+                continue
+            for sampler_name in samplers:
+                indices = load_or_make_stream(
+                    streams_dir,
+                    dataset,
+                    policy,
+                    drop_n_last_frames,
+                    sampler_name,
+                    block_size,
+                    num_samples,
+                    seed,
+                )
+                for workers in num_workers:
+                    row = {
+                        "lerobot_version": lerobot.__version__,
+                        "repo_id": repo_id,
+                        "policy": policy,
+                        "sampler": sampler_name,
+                        "block_size": block_size if sampler_name == "block" else 1,
+                        "backend": backend,
+                        "num_workers": workers,
+                        "batch_size": batch_size,
+                        **run(dataset, indices, batch_size, workers),
+                    }
+                    print(
+                        f"{policy} | {sampler_name} | {backend} | {workers} workers: "
+                        f"{row['samples_per_s']:.1f} samples/s, p50 {row['p50_item_ms']:.1f}ms, "
+                        f"p99 {row['p99_item_ms']:.1f}ms, peak RSS {row['peak_rss_mb']:.0f}MB"
+                    )
+                    rows.append(row)
+
+    df = pd.DataFrame(rows)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    now = dt.datetime.now()
+    output_name = f"{now:%Y-%m-%d}_{now:%H-%M-%S}_{repo_id.replace('/', '_')}_decode_patterns"
+    df.to_csv(output_dir / f"{output_name}.csv", header=True, index=False)
+    write_markdown(df, output_dir / f"{output_name}.md")
+    print(f"Results written to {output_dir / output_name}.{{csv,md}}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--repo-id", type=str, default="lerobot/aloha_static_coffee")
+    parser.add_argument("--root", type=str, default=None, help="Local directory of the dataset.")
+    parser.add_argument("--episodes", type=int, nargs="+", default=None, help="Episodes to load.")
+    parser.add_argument(
+        "--policies",
+        type=str,
+        nargs="+",
+        default=["diffusion", "act"],
+        help="Policies whose delta_timestamps are used ('none' loads single frames).",
+    )
+    parser.add_argument("--samplers", type=str, nargs="+", choices=SAMPLERS, default=SAMPLERS[:3])
+    parser.add_argument("--block-size", type=int, default=8, help="Block size of the 'block' sampler.")
+    parser.add_argument("--backends", type=str, nargs="+", default=["pyav", "video_reader", "torchcodec"])
+    parser.add_argument("--num-workers", type=int, nargs="+", default=[0, 4])
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--num-batches", type=int, default=20, help="Number of batches timed per setting.")
+    parser.add_argument(
+        "--streams-dir",
+        type=Path,
+        default=Path("outputs/decode_pattern_benchmark/streams"),
+        help="Directory where the index streams are saved, and replayed from when they already exist.",
+    )
+    parser.add_argument("--output-dir", type=Path, default=Path("outputs/decode_pattern_benchmark"))
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+    main(**vars(args))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measure the per-item cost of `delta_timestamps` queries in `LeRobotDataset.__getitem__`.
+
+The vectorized query path (one NumPy op per key for indices and padding, one gather per key on an in-memory
+column) is compared against the previous implementation which built Python lists per key and selected rows
+from the `hf_dataset` one query at a time.
+
+A synthetic dataset with only low-dimensional features is recorded in a temporary directory so that the
+measurement is not dominated by video decoding. Example:
+
+```bash
+python benchmarks/datasets/run_delta_timestamps_benchmark.py --chunk-sizes 1 16 100
+```
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+
+REPO_ID = "benchmark/delta_timestamps"
+
+
+class LegacyQueryLeRobotDataset(LeRobotDataset):
+    """Previous implementation of the `delta_timestamps` queries, kept here as a reference."""
+
+    def _get_query_indices(self, idx: int, ep_idx: int) -> tuple[dict[str, list[int | bool]]]:
+        ep_start = self.episode_data_index["from"][ep_idx]
+        ep_end = self.episode_data_index["to"][ep_idx]
+        query_indices = {
+            key: [max(ep_start.item(), min(ep_end.item() - 1, idx + delta)) for delta in delta_idx]
+            for key, delta_idx in self.delta_indices.items()
+        }
+        padding = {
+            f"{key}_is_pad": torch.BoolTensor(
+                [(idx + delta < ep_start.item()) | (idx + delta >= ep_end.item()) for delta in delta_idx]
+            )
+            for key, delta_idx in self.delta_indices.items()
+        }
+        return query_indices, padding
+
+    def _query_hf_dataset(self, query_indices: dict[str, list[int]]) -> dict:
+        return {
+            key: torch.stack(self.hf_dataset.select(q_idx)[key])
+            for key, q_idx in query_indices.items()
+            if key not in self.meta.video_keys
+        }
+
+
+def record_dataset(root: Path, num_episodes: int, episode_length: int, state_dim: int) -> None:
+    features = {
+        "observation.state": {"dtype": "float32", "shape": (state_dim,), "names": None},
+        "action": {"dtype": "float32", "shape": (state_dim,), "names": None},
+    }
+    dataset = LeRobotDataset.create(REPO_ID, fps=30, features=features, root=root, use_videos=False)
+    for _ in range(num_episodes):
+        for _ in range(episode_length):
+            frame = {
+                "observation.state": np.random.randn(state_dim).astype(np.float32),
+                "action": np.random.randn(state_dim).astype(np.float32),
+            }
+            dataset.add_frame(frame, task="benchmark")
+        dataset.save_episode()
+
+
+def time_per_item(dataset: LeRobotDataset, indices: np.ndarray) -> float:
+    start = time.perf_counter()
+    for idx in indices:
+        dataset[int(idx)]
+    return (time.perf_counter() - start) / len(indices)
+
+
+def main(num_episodes: int, episode_length: int, state_dim: int, chunk_sizes: list[int], num_samples: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir) / "dataset"
+        record_dataset(root, num_episodes, episode_length, state_dim)
+        fps = 30
+        rng = np.random.default_rng(0)
+
+        print(f"{'chunk_size':>10} | {'legacy (ms)':>12} | {'vectorized (ms)':>15} | {'speedup':>7}")
+        for chunk_size in chunk_sizes:
+            delta_timestamps = {
+                "observation.state": [-1 / fps, 0],
+                "action": [i / fps for i in range(chunk_size)],
+            }
+            legacy = LegacyQueryLeRobotDataset(REPO_ID, root=root, delta_timestamps=delta_timestamps)
+            vectorized = LeRobotDataset(REPO_ID, root=root, delta_timestamps=delta_timestamps)
+            indices = rng.integers(0, len(vectorized), num_samples)
+
+            # Warmup
+            time_per_item(legacy, indices[:10])
+            time_per_item(vectorized, indices[:10])
+
+            legacy_s = time_per_item(legacy, indices)
+            vectorized_s = time_per_item(vectorized, indices)
+            print(
+                f"{chunk_size:>10} | {legacy_s * 1e3:>12.3f} | {vectorized_s * 1e3:>15.3f} | "
+                f"{legacy_s / vectorized_s:>6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--num-episodes", type=int, default=50, help="Number of synthetic episodes.")
+    parser.add_argument("--episode-length", type=int, default=200, help="Number of frames per episode.")
+    parser.add_argument("--state-dim", type=int, default=14, help="Dimension of state and action vectors.")
+    parser.add_argument(
+        "--chunk-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 16, 100],
+        help="Action chunk sizes (number of future action steps queried per item).",
+    )
+    parser.add_argument("--num-samples", type=int, default=500, help="Number of items timed per setting.")
+    args = parser.parse_args()
+    main(**vars(args))
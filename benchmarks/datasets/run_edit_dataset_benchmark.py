@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measure the time taken by `edit_episodes` to delete or trim episodes, depending on their position.
+
+A dataset of episodes of low-dimensional features is recorded in a temporary directory, and each edit is applied
+to a copy of it. Only the episodes following the edited one are rewritten, so editing the last episodes is the
+cheapest and editing the first one the most expensive. The time taken by `trim_video_file` to cut a video on
+keyframes (without re-encoding) and between keyframes (re-encoding) is measured as well.
+
+Example:
+
+```bash
+python benchmarks/datasets/run_edit_dataset_benchmark.py --num-episodes 1000
+```
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from lerobot.datasets.edit_dataset import edit_episodes
+from lerobot.datasets.lerobot_dataset import LeRobotDataset, LeRobotDatasetMetadata
+from lerobot.datasets.video_utils import StreamingVideoEncoder, trim_video_file
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--num-episodes", type=int, default=1000)
+    parser.add_argument("--episode-length", type=int, default=100)
+    parser.add_argument("--video-length", type=int, default=300)
+    parser.add_argument("--video-shape", type=int, nargs=2, default=[240, 320])
+    args = parser.parse_args()
+
+    features = {
+        "observation.state": {"dtype": "float32", "shape": (6,), "names": None},
+        "action": {"dtype": "float32", "shape": (6,), "names": None},
+    }
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir) / "dataset"
+        dataset = LeRobotDataset.create("benchmark/edit", 30, features=features, root=root, use_videos=False)
+        for ep_idx in range(args.num_episodes):
+            episode_data = {key: rng.random((args.episode_length, 6), dtype=np.float32) for key in features}
+            for i in range(args.episode_length):
+                frame = {key: values[i] for key, values in episode_data.items()}
+                dataset.add_frame(frame, task=f"Task {ep_idx % 10}")
+            dataset.save_episode()
+
+        last = args.num_episodes - 1
+        half = args.episode_length // 2
+        edits = {
+            "delete last episode": {"delete_episodes": [last]},
+            "delete middle episode": {"delete_episodes": [last // 2]},
+            "delete first episode": {"delete_episodes": [0]},
+            "trim last episode": {"trim_episodes": {last: (half, args.episode_length)}},
+            "trim first episode": {"trim_episodes": {0: (half, args.episode_length)}},
+        }
+        for name, edit in edits.items():
+            edit_root = Path(tmp_dir) / "edited"
+            shutil.copytree(root, edit_root)
+            meta = LeRobotDatasetMetadata("benchmark/edit", edit_root)
+            start = time.perf_counter()
+            edit_episodes(meta, **edit)
+            elapsed = time.perf_counter() - start
+            print(f"{name}: {elapsed * 1e3:.1f}ms")
+            shutil.rmtree(edit_root)
+
+        video_path = Path(tmp_dir) / "video.mp4"
+        encoder = StreamingVideoEncoder(video_path, 30)
+        for _ in range(args.video_length):
+            encoder.add_frame(rng.integers(0, 256, (*args.video_shape, 3), dtype=np.uint8))
+        encoder.finish()
+        # Videos are encoded with a keyframe every 2 frames by default
+        for name, frame_range in {"on keyframes": (2, 100), "between keyframes": (3, 100)}.items():
+            start = time.perf_counter()
+            trim_video_file(video_path, Path(tmp_dir) / "trimmed.mp4", *frame_range, 30)
+            elapsed = time.perf_counter() - start
+            print(f"trim {args.video_length} frames video {name}: {elapsed * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measure the effect of the decoded-frame cache (`frame_cache_bytes`) on a multi-camera video dataset.
+
+Items are read the way a single DataLoader worker reads them with an episode-contiguous sampler: runs of
+consecutive indices starting at random positions. Every camera is queried over `n_obs_steps` observation
+steps, so that neighbouring items share `n_obs_steps - 1` frames per camera.
+
+Example:
+
+```bash
+python benchmarks/datasets/run_frame_cache_benchmark.py \
+    --repo-id lerobot/aloha_static_coffee \
+    --n-obs-steps 2 4 \
+    --backend pyav
+```
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from lerobot.datasets.lerobot_dataset import LeRobotDataset, LeRobotDatasetMetadata
+
+
+def contiguous_indices(dataset: LeRobotDataset, num_samples: int, run_length: int, seed: int) -> list[int]:
+    rng = np.random.default_rng(seed)
+    ep_from = dataset.episode_data_index["from"].numpy()
+    ep_to = dataset.episode_data_index["to"].numpy()
+    indices = []
+    while len(indices) < num_samples:
+        ep = rng.integers(len(ep_from))
+        start = rng.integers(ep_from[ep], ep_to[ep])
+        indices.extend(range(start, min(start + run_length, ep_to[ep])))
+    return indices[:num_samples]
+
+
+def time_items(dataset: LeRobotDataset, indices: list[int]) -> float:
+    start = time.perf_counter()
+    for idx in indices:
+        dataset[idx]
+    return time.perf_counter() - start
+
+
+def main(
+    repo_id: str,
+    root: str | None,
+    episodes: list[int] | None,
+    n_obs_steps: list[int],
+    backend: str | None,
+    cache_mb: int,
+    num_samples: int,
+    run_length: int,
+    seed: int,
+):
+    meta = LeRobotDatasetMetadata(repo_id, root=root)
+    if len(meta.video_keys) == 0:
+        raise ValueError(f"{repo_id} has no video keys.")
+    print(f"{repo_id}: {len(meta.video_keys)} cameras {meta.video_keys}")
+
+    print(f"{'n_obs_steps':>11} | {'no cache (items/s)':>18} | {'cache (items/s)':>15} | {'hit rate':>8}")
+    for n in n_obs_steps:
+        delta_timestamps = {key: [i / meta.fps for i in range(1 - n, 1)] for key in meta.video_keys}
+        kwargs = {
+            "root": root,
+            "episodes": episodes,
+            "delta_timestamps": delta_timestamps,
+            "video_backend": backend,
+        }
+        no_cache = LeRobotDataset(repo_id, **kwargs)
+        with_cache = LeRobotDataset(repo_id, frame_cache_bytes=cache_mb * 1024**2, **kwargs)
+        indices = contiguous_indices(no_cache, num_samples, run_length, seed)
+
+        no_cache_s = time_items(no_cache, indices)
+        cache_s = time_items(with_cache, indices)
+        hit_rate = with_cache.frame_cache.hit_rate
+        print(
+            f"{n:>11} | {num_samples / no_cache_s:>18.1f} | {num_samples / cache_s:>15.1f} | {hit_rate:>8.1%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--repo-id", type=str, default="lerobot/aloha_static_coffee")
+    parser.add_argument("--root", type=str, default=None, help="Local directory of the dataset.")
+    parser.add_argument("--episodes", type=int, nargs="*", default=None, help="Subset of episodes to load.")
+    parser.add_argument("--n-obs-steps", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--backend", type=str, default=None, help="Video backend used for decoding.")
+    parser.add_argument("--cache-mb", type=int, default=512, help="Size of the decoded-frame cache.")
+    parser.add_argument("--num-samples", type=int, default=200, help="Number of items read per setting.")
+    parser.add_argument(
+        "--run-length", type=int, default=32, help="Number of consecutive indices read from each start index."
+    )
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+    main(**vars(args))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measure the time taken by `merge_datasets` to merge copies of a dataset.
+
+A dataset of short episodes of low-dimensional features is recorded in a temporary directory, and is then
+merged `--num-datasets` times with itself. Videos are hardlinked by `merge_datasets`, so they would only add a
+constant time per episode.
+
+Example:
+
+```bash
+python benchmarks/datasets/run_merge_datasets_benchmark.py --num-datasets 10 --num-episodes 1000
+```
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+from lerobot.datasets.merge_datasets import merge_datasets
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--num-datasets", type=int, default=10)
+    parser.add_argument("--num-episodes", type=int, default=1000)
+    parser.add_argument("--episode-length", type=int, default=100)
+    parser.add_argument("--num-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    features = {
+        "observation.state": {"dtype": "float32", "shape": (6,), "names": None},
+        "action": {"dtype": "float32", "shape": (6,), "names": None},
+    }
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir) / "dataset"
+        dataset = LeRobotDataset.create("benchmark/merge", 30, features=features, root=root, use_videos=False)
+        episode_data = {key: rng.random((args.episode_length, 6), dtype=np.float32) for key in features}
+        for ep_idx in range(args.num_episodes):
+            for i in range(args.episode_length):
+                frame = {key: values[i] for key, values in episode_data.items()}
+                dataset.add_frame(frame, task=f"Task {ep_idx % 10}")
+            dataset.save_episode()
+
+        start = time.perf_counter()
+        meta = merge_datasets(
+            ["benchmark/merge"] * args.num_datasets,
+            "benchmark/merged",
+            roots=[root] * args.num_datasets,
+            output_root=Path(tmp_dir) / "merged",
+            num_workers=args.num_workers,
+        )
+        elapsed = time.perf_counter() - start
+        print(
+            f"Merged {args.num_datasets} datasets into {meta.total_episodes} episodes and {meta.total_frames} "
+            f"frames in {elapsed:.2f}s"
+        )
+
+        start = time.perf_counter()
+        LeRobotDataset("benchmark/merged", root=Path(tmp_dir) / "merged")
+        print(f"Merged dataset loaded in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measure the time taken to open the metadata of a dataset (`LeRobotDatasetMetadata`) by parsing its jsonl
+files, by parsing them and writing the binary metadata index (first opening), and by reading that index.
+
+The metadata of an existing dataset is used when `--root` is given. Otherwise, a dataset with
+`--num-episodes` episodes and `--num-features` float features is generated in a temporary directory, so that
+only the metadata files exist.
+
+Example:
+
+```bash
+python benchmarks/datasets/run_metadata_startup_benchmark.py --num-episodes 1000 10000 50000
+```
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from lerobot.datasets.compute_stats import aggregate_stats
+from lerobot.datasets.lerobot_dataset import CODEBASE_VERSION, LeRobotDatasetMetadata
+from lerobot.datasets.metadata_index import METADATA_INDEX_DIR
+from lerobot.datasets.utils import (
+    EPISODES_PATH,
+    EPISODES_STATS_PATH,
+    TASKS_PATH,
+    create_empty_dataset_info,
+    load_episodes,
+    load_episodes_stats,
+    load_tasks,
+    serialize_dict,
+    write_info,
+    write_jsonlines,
+)
+
+
+def write_dummy_metadata(root: Path, num_episodes: int, num_features: int, num_tasks: int = 10):
+    features = {
+        f"feature_{i}": {"dtype": "float32", "shape": (6,), "names": None} for i in range(num_features)
+    }
+    info = create_empty_dataset_info(CODEBASE_VERSION, fps=30, features=features, use_videos=False)
+    info["total_episodes"] = num_episodes
+    info["total_tasks"] = num_tasks
+    write_info(info, root)
+
+    rng = np.random.default_rng(0)
+    tasks = [{"task_index": i, "task": f"Task {i}"} for i in range(num_tasks)]
+    episodes, episodes_stats = [], []
+    for ep_idx in range(num_episodes):
+        length = int(rng.integers(100, 500))
+        episodes.append({"episode_index": ep_idx, "tasks": [f"Task {ep_idx % num_tasks}"], "length": length})
+        stats = {
+            key: {
+                "min": rng.random(6),
+                "max": rng.random(6),
+                "mean": rng.random(6),
+                "std": rng.random(6),
+                "count": np.array([length]),
+            }
+            for key in features
+        }
+        episodes_stats.append({"episode_index": ep_idx, "stats": serialize_dict(stats)})
+    write_jsonlines(tasks, root / TASKS_PATH)
+    write_jsonlines(episodes, root / EPISODES_PATH)
+    write_jsonlines(episodes_stats, root / EPISODES_STATS_PATH)
+
+
+def parse_jsonl(root: Path):
+    load_tasks(root)
+    load_episodes(root)
+    aggregate_stats(list(load_episodes_stats(root).values()))
+
+
+def open_metadata(root: Path):
+    LeRobotDatasetMetadata("dummy/repo", root=root)
+
+
+def timeit(fn, root: Path, num_repeats: int, setup=None) -> float:
+    times = []
+    for _ in range(num_repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn(root)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def run(root: Path, num_repeats: int) -> tuple[float, float, float]:
+    def remove_index():
+        shutil.rmtree(root / METADATA_INDEX_DIR, ignore_errors=True)
+
+    jsonl_s = timeit(parse_jsonl, root, num_repeats)
+    first_open_s = timeit(open_metadata, root, num_repeats, setup=remove_index)
+    index_s = timeit(open_metadata, root, num_repeats)
+    return jsonl_s, first_open_s, index_s
+
+
+def main(root: str | None, num_episodes: list[int], num_features: int, num_repeats: int):
+    print(f"{'episodes':>8} | {'jsonl (s)':>9} | {'first open (s)':>14} | {'index (s)':>9} | {'speedup':>7}")
+    if root is not None:
+        roots = [(None, Path(root))]
+    else:
+        roots = [(n, Path(tempfile.mkdtemp())) for n in num_episodes]
+
+    for n, root_dir in roots:
+        if n is not None:
+            write_dummy_metadata(root_dir, n, num_features)
+        total_episodes = LeRobotDatasetMetadata("dummy/repo", root=root_dir).total_episodes
+        jsonl_s, first_open_s, index_s = run(root_dir, num_repeats)
+        print(
+            f"{total_episodes:>8} | {jsonl_s:>9.3f} | {first_open_s:>14.3f} | {index_s:>9.3f} | "
+            f"{jsonl_s / index_s:>6.1f}x"
+        )
+        if n is not None:
+            shutil.rmtree(root_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--root", type=str, default=None, help="Local directory of an existing dataset.")
+    parser.add_argument("--num-episodes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--num-features", type=int, default=4, help="Number of features with stats.")
+    parser.add_argument("--num-repeats", type=int, default=3)
+    args = parser.parse_args()
+    main(**vars(args))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measure the cost of recording camera frames into a dataset, with frames written as PNG images by the image
+writer and encoded by `save_episode` (default), or encoded while recording (`streaming_encoding=True`).
+
+Episodes of random frames are recorded in real time at `--fps`, and for each mode we report:
+- the time spent in `add_frame` (p50 / p99), which is taken from the control loop,
+- the number of frames which missed their deadline at `--fps`,
+- the time spent in `save_episode`, during which recording is paused.
+
+Example:
+
+```bash
+python benchmarks/datasets/run_recording_encoding_benchmark.py --num-cameras 3 --height 480 --width 640
+```
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+
+
+def record(root: Path, args: argparse.Namespace, streaming_encoding: bool) -> dict[str, float]:
+    shape = (args.height, args.width, 3)
+    features = {
+        f"observation.images.camera_{i}": {
+            "dtype": "video",
+            "shape": shape,
+            "names": ["height", "width", "channels"],
+        }
+        for i in range(args.num_cameras)
+    }
+    features["observation.state"] = {"dtype": "float32", "shape": (6,), "names": None}
+    dataset = LeRobotDataset.create(
+        "benchmark/recording",
+        args.fps,
+        features=features,
+        root=root,
+        image_writer_processes=0 if streaming_encoding else args.image_writer_processes,
+        image_writer_threads=0 if streaming_encoding else 4 * args.num_cameras,
+        image_writer_queue_size=args.image_writer_queue_size,
+        streaming_encoding=streaming_encoding,
+    )
+
+    # Cameras return different frames, but generating them is kept out of the measurements
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(args.fps)]
+
+    add_frame_times, save_times, missed = [], [], 0
+    num_frames = int(args.episode_time_s * args.fps)
+    for _ in range(args.num_episodes):
+        start = time.perf_counter()
+        for i in range(num_frames):
+            frame = {key: frames[(i + j) % len(frames)] for j, key in enumerate(dataset.meta.camera_keys)}
+            frame["observation.state"] = np.zeros(6, dtype=np.float32)
+            t0 = time.perf_counter()
+            dataset.add_frame(frame, task="Benchmark")
+            add_frame_times.append(time.perf_counter() - t0)
+
+            deadline = start + (i + 1) / args.fps
+            remaining = deadline - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            else:
+                missed += 1
+
+        t0 = time.perf_counter()
+        dataset.save_episode()
+        save_times.append(time.perf_counter() - t0)
+
+    dataset.stop_image_writer()
+    return {
+        "add_frame_p50_ms": np.percentile(add_frame_times, 50) * 1e3,
+        "add_frame_p99_ms": np.percentile(add_frame_times, 99) * 1e3,
+        "missed_frames": missed,
+        "save_episode_s": float(np.mean(save_times)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--num-cameras", type=int, default=3)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--episode-time-s", type=float, default=10)
+    parser.add_argument("--num-episodes", type=int, default=2)
+    parser.add_argument(
+        "--image-writer-processes",
+        type=int,
+        default=0,
+        help="Processes writing the PNG images, which receive the frames through shared memory.",
+    )
+    parser.add_argument("--image-writer-queue-size", type=int, default=0)
+    args = parser.parse_args()
+
+    num_frames = int(args.episode_time_s * args.fps) * args.num_episodes
+    print(
+        f"{args.num_cameras} cameras, {args.height}x{args.width} at {args.fps} fps, "
+        f"{args.num_episodes} episodes, {num_frames} frames"
+    )
+    print(
+        f"{'mode':<10} {'add_frame p50':>14} {'add_frame p99':>14} {'missed frames':>14} {'save_episode':>13}"
+    )
+    for mode in ["png", "streaming"]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            res = record(Path(tmp_dir) / "dataset", args, streaming_encoding=mode == "streaming")
+        print(
+            f"{mode:<10} {res['add_frame_p50_ms']:>11.2f} ms {res['add_frame_p99_ms']:>11.2f} ms "
+            f"{res['missed_frames']:>14d} {res['save_episode_s']:>11.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Compare the data loading throughput of block shuffling (`EpisodeAwareSampler(block_size=K)`) against plain
+shuffling on a video dataset.
+
+Every setting uses the same batch size, number of workers and number of batches, so that only the sampling
+order changes. Besides samples/s, the average number of distinct episodes per batch is reported as a measure of
+how random the batches remain.
+
+Example:
+
+```bash
+python benchmarks/datasets/run_sampler_benchmark.py \
+    --repo-id lerobot/aloha_static_coffee \
+    --block-sizes 1 4 8 16 \
+    --batch-size 32 \
+    --num-workers 4
+```
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from lerobot.datasets.lerobot_dataset import LeRobotDataset, LeRobotDatasetMetadata
+from lerobot.datasets.sampler import EpisodeAwareSampler
+
+
+def run(
+    dataset: LeRobotDataset, block_size: int, batch_size: int, num_workers: int, num_batches: int
+) -> tuple[float, float]:
+    sampler = EpisodeAwareSampler(dataset.episode_data_index, shuffle=True, block_size=block_size)
+    dataloader = torch.utils.data.DataLoader(
+        dataset, batch_size=batch_size, num_workers=num_workers, sampler=sampler, drop_last=True
+    )
+    num_episodes = []
+    num_samples = 0
+    dl_iter = iter(dataloader)
+    # The first batch includes the startup of the workers
+    next(dl_iter)
+    start = time.perf_counter()
+    for _ in range(num_batches):
+        batch = next(dl_iter)
+        num_episodes.append(len(batch["episode_index"].unique()))
+        num_samples += len(batch["index"])
+    elapsed = time.perf_counter() - start
+    return num_samples / elapsed, float(np.mean(num_episodes))
+
+
+def main(
+    repo_id: str,
+    root: str | None,
+    backend: str | None,
+    n_obs_steps: int,
+    frame_cache_mb: int,
+    block_sizes: list[int],
+    batch_size: int,
+    num_workers: int,
+    num_batches: int,
+    seed: int,
+):
+    meta = LeRobotDatasetMetadata(repo_id, root=root)
+    delta_timestamps = {key: [i / meta.fps for i in range(1 - n_obs_steps, 1)] for key in meta.video_keys}
+    dataset = LeRobotDataset(
+        repo_id,
+        root=root,
+        delta_timestamps=delta_timestamps,
+        video_backend=backend,
+        frame_cache_bytes=frame_cache_mb * 1024**2,
+    )
+
+    print(f"{'block_size':>10} | {'samples/s':>9} | {'speedup':>7} | {'episodes/batch':>14}")
+    baseline = None
+    for block_size in block_sizes:
+        torch.manual_seed(seed)
+        samples_per_s, episodes_per_batch = run(dataset, block_size, batch_size, num_workers, num_batches)
+        baseline = baseline or samples_per_s
+        print(
+            f"{block_size:>10} | {samples_per_s:>9.1f} | {samples_per_s / baseline:>6.2f}x | "
+            f"{episodes_per_batch:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--repo-id", type=str, default="lerobot/aloha_static_coffee")
+    parser.add_argument("--root", type=str, default=None, help="Local directory of the dataset.")
+    parser.add_argument("--backend", type=str, default=None, help="Video backend used for decoding.")
+    parser.add_argument("--n-obs-steps", type=int, default=1, help="Number of observation steps per camera.")
+    parser.add_argument(
+        "--frame-cache-mb", type=int, default=0, help="Size of the decoded-frame cache of each worker."
+    )
+    parser.add_argument(
+        "--block-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 4, 8, 16],
+        help="Block sizes to compare. The first one is the reference for the speedup.",
+    )
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--num-workers", type=int, default=4)
+    parser.add_argument("--num-batches", type=int, default=20, help="Number of batches timed per setting.")
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+    main(**vars(args))
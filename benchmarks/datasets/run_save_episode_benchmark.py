@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measure how the time taken by `LeRobotDataset.save_episode` evolves as a dataset grows, which should stay
+flat: saving an episode shouldn't depend on the number of episodes already recorded.
+
+Short episodes of low-dimensional features are recorded in a temporary directory (videos would only add a
+constant encoding time), and the mean `save_episode` time is reported over windows of episodes.
+
+Example:
+
+```bash
+python benchmarks/datasets/run_save_episode_benchmark.py --num-episodes 5000
+```
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--num-episodes", type=int, default=5000)
+    parser.add_argument("--episode-length", type=int, default=10)
+    parser.add_argument("--num-features", type=int, default=4)
+    parser.add_argument("--window", type=int, default=50, help="Number of episodes averaged per report.")
+    args = parser.parse_args()
+
+    features = {
+        f"feature_{i}": {"dtype": "float32", "shape": (6,), "names": None} for i in range(args.num_features)
+    }
+    frame = {key: np.zeros(6, dtype=np.float32) for key in features}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dataset = LeRobotDataset.create(
+            "benchmark/save_episode", 30, features=features, root=Path(tmp_dir) / "dataset", use_videos=False
+        )
+        print(f"{'episodes':>17} {'save_episode (ms)':>18}")
+        save_times = []
+        for ep_idx in range(args.num_episodes):
+            for _ in range(args.episode_length):
+                dataset.add_frame(dict(frame), task="Benchmark")
+            start = time.perf_counter()
+            dataset.save_episode()
+            save_times.append(time.perf_counter() - start)
+
+            if len(save_times) == args.window or ep_idx == args.num_episodes - 1:
+                first = ep_idx + 1 - len(save_times)
+                print(f"{first:>8} - {ep_idx:>6} {np.mean(save_times) * 1e3:>18.2f}")
+                save_times = []
+
+        start = time.perf_counter()
+        assert len(dataset.hf_dataset) == args.num_episodes * args.episode_length
+        print(f"Table of all the frames built in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
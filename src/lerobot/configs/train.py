@@ -52,6 +52,10 @@ class TrainPipelineConfig(HubMixin):
     # Number of workers for the dataloader.
     num_workers: int = 4
     batch_size: int = 8
+    # Number of contiguous frames of an episode sampled one after the other when shuffling the dataset. Values
+    # larger than 1 make the samples of a batch share video decoders and frames, which speeds up data loading at
+    # the cost of less random batches. 1 shuffles frames independently.
+    sampler_block_size: int = 1
     steps: int = 100_000
     eval_freq: int = 20_000
     log_freq: int = 200
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Rewrites a local dataset with one parquet file and one video per camera per chunk, instead of one per episode,
+which divides the number of files of large datasets by the chunk size (1000 by default):
+.
+├── data
+│   └── chunk-000
+│       └── episodes.parquet
+└── videos
+    └── chunk-000
+        └── observation.images.laptop
+            └── episodes.mp4
+
+Parquet files hold one row group per episode and videos are concatenated without re-encoding. The position of
+each episode in these files is recorded in `meta/episodes.jsonl` (`data_row_offset` and
+`video_timestamp_offsets`), which `LeRobotDataset` uses to read both layouts transparently: when episodes are
+selected, only their row groups are read.
+
+Compaction is resumable: the new files are written next to the per-episode ones and only replace them once
+`meta/info.json` points to them, so running it again after an interruption completes it. The dataset must not
+be read or written by other processes in the meantime, and episodes can't be added to it afterwards.
+
+Usage:
+```bash
+python -m lerobot.datasets.compact_dataset --repo-id lerobot/pusht --root ~/datasets/pusht
+```
+"""
+
+import argparse
+import logging
+import os
+from itertools import groupby
+from pathlib import Path
+
+import pyarrow.parquet as pq
+
+from lerobot.datasets.lerobot_dataset import LeRobotDatasetMetadata
+from lerobot.datasets.utils import (
+    EPISODES_PATH,
+    MULTI_EPISODE_PARQUET_PATH,
+    MULTI_EPISODE_VIDEO_PATH,
+    write_info,
+    write_jsonlines,
+)
+from lerobot.datasets.video_utils import concatenate_video_files
+from lerobot.utils.utils import init_logging
+
+
+def _write_episodes_parquet(episode_paths: list[Path], output_path: Path) -> list[int]:
+    """Writes the rows of the episodes in a single parquet file, one row group per episode. Returns the index of
+    the first row of each episode in this file."""
+    row_offsets = []
+    num_rows = 0
+    writer = None
+    try:
+        for path in episode_paths:
+            table = pq.read_table(path)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table.cast(writer.schema), row_group_size=max(len(table), 1))
+            row_offsets.append(num_rows)
+            num_rows += len(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return row_offsets
+
+
+def _remove_episode_files(root: Path) -> None:
+    """Removes the per-episode files and the temporary files left by an interrupted compaction."""
+    patterns = ["data/*/episode_*.parquet", "videos/*/*/episode_*.mp4", "data/*/*.tmp", "videos/*/*/*.tmp"]
+    for pattern in patterns:
+        for path in root.glob(pattern):
+            path.unlink()
+
+
+def compact_dataset(repo_id: str, root: str | Path | None = None) -> LeRobotDatasetMetadata:
+    """Converts the local dataset `repo_id` to the multi-episode layout, see the module docstring.
+
+    Returns the metadata of the compacted dataset.
+    """
+    meta = LeRobotDatasetMetadata(repo_id, root)
+    if meta.multi_episode_files:
+        _remove_episode_files(meta.root)
+        logging.info(f"{repo_id} is already compacted.")
+        return meta
+
+    episodes = sorted(meta.episodes)
+    for chunk, chunk_episodes in groupby(episodes, key=meta.get_episode_chunk):
+        chunk_episodes = list(chunk_episodes)
+        logging.info(f"Compacting {len(chunk_episodes)} episodes of chunk {chunk}")
+
+        data_path = meta.root / MULTI_EPISODE_PARQUET_PATH.format(episode_chunk=chunk)
+        tmp_path = data_path.with_name(f"{data_path.name}.tmp")
+        row_offsets = _write_episodes_parquet(
+            [meta.root / meta.get_data_file_path(ep_idx) for ep_idx in chunk_episodes], tmp_path
+        )
+        os.replace(tmp_path, data_path)
+        for ep_idx, row_offset in zip(chunk_episodes, row_offsets, strict=True):
+            meta.episodes[ep_idx]["data_row_offset"] = row_offset
+            meta.episodes[ep_idx]["video_timestamp_offsets"] = {}
+
+        for vid_key in meta.video_keys:
+            video_path = meta.root / MULTI_EPISODE_VIDEO_PATH.format(episode_chunk=chunk, video_key=vid_key)
+            tmp_path = video_path.with_name(f"{video_path.name}.tmp")
+            offsets = concatenate_video_files(
+                [meta.root / meta.get_video_file_path(ep_idx, vid_key) for ep_idx in chunk_episodes],
+                tmp_path,
+                meta.fps,
+            )
+            os.replace(tmp_path, video_path)
+            for ep_idx, offset in zip(chunk_episodes, offsets, strict=True):
+                meta.episodes[ep_idx]["video_timestamp_offsets"][vid_key] = offset
+
+    # The per-episode files stay valid until info.json points to the new ones
+    write_jsonlines([meta.episodes[ep_idx] for ep_idx in episodes], meta.root / EPISODES_PATH)
+    meta.info["data_path"] = MULTI_EPISODE_PARQUET_PATH
+    if meta.video_path is not None:
+        meta.info["video_path"] = MULTI_EPISODE_VIDEO_PATH
+    write_info(meta.info, meta.root)
+
+    _remove_episode_files(meta.root)
+    return LeRobotDatasetMetadata(repo_id, meta.root)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--repo-id",
+        type=str,
+        required=True,
+        help="Repository identifier on Hugging Face: a community or a user name `/` the name of the dataset "
+        "(e.g. `lerobot/pusht`, `cadene/aloha_sim_insertion_human`).",
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=None,
+        help="Root directory of the dataset stored locally. By default, the dataset is loaded from the hugging "
+        "face cache folder.",
+    )
+
+    args = parser.parse_args()
+    init_logging()
+    compact_dataset(args.repo_id, root=args.root)
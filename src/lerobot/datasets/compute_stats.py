@@ -13,7 +13,10 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from collections.abc import Iterable
+
 import numpy as np
+from PIL import Image as PILImage
 
 from lerobot.datasets.utils import load_image_as_numpy
 
@@ -82,6 +85,124 @@ def get_feature_stats(array: np.ndarray, axis: tuple, keepdims: bool) -> dict[st
     }
 
 
+def merge_moments(
+    count_a: np.ndarray,
+    mean_a: np.ndarray,
+    m2_a: np.ndarray,
+    count_b: np.ndarray,
+    mean_b: np.ndarray,
+    m2_b: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Merges the count, mean and m2 (sum of squared differences to the mean) of two sets of samples with the
+    parallel algorithm of Chan et al. Adding samples one at a time with it is Welford's algorithm."""
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / count)
+    m2 = m2_a + m2_b + delta**2 * (count_a * count_b / count)
+    return count, mean, m2
+
+
+def unmerge_moments(
+    count: np.ndarray,
+    mean: np.ndarray,
+    m2: np.ndarray,
+    count_b: np.ndarray,
+    mean_b: np.ndarray,
+    m2_b: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Inverse of `merge_moments`: returns the count, mean and m2 of a set of samples once those of `b` are
+    removed from it. There must be samples left."""
+    count_a = count - count_b
+    mean_a = (mean * count - mean_b * count_b) / count_a
+    delta = mean_b - mean_a
+    m2_a = m2 - m2_b - delta**2 * (count_a * count_b / count)
+    # Rounding errors can't make the variance negative
+    return count_a, mean_a, np.maximum(m2_a, 0.0)
+
+
+class RunningFeatureStats:
+    """Stats of a feature updated one frame at a time (e.g. in `add_frame` while recording) with Welford's
+    algorithm, instead of being computed once the episode is over. The stats have the same format as those of
+    `compute_episode_stats`."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def _add(self, mean: np.ndarray, m2: np.ndarray | float, min_: np.ndarray, max_: np.ndarray) -> None:
+        self.count, self.mean, self.m2 = merge_moments(self.count, self.mean, self.m2, 1, mean, m2)
+        self.min = min_ if self.min is None else np.minimum(self.min, min_)
+        self.max = max_ if self.max is None else np.maximum(self.max, max_)
+
+    def update(self, value: np.ndarray | float) -> None:
+        """Adds the value of a frame, a number or an array with the shape of the feature."""
+        value = np.atleast_1d(value)
+        self._add(value.astype(np.float64), 0.0, value, value)
+
+    def get_stats(self) -> dict[str, np.ndarray]:
+        if self.count == 0:
+            raise ValueError("No frame was added to the stats.")
+        return {
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+            "std": np.sqrt(self.m2 / self.count),
+            "count": np.array([self.count]),
+        }
+
+
+def is_channel_first(image: np.ndarray, frame_shape: tuple[int, int, int] | None = None) -> bool:
+    """Whether an image array is (c, h, w), given the (h, w, c) shape of the frames of its feature. Without
+    it, only 3-channel images can be told apart."""
+    if frame_shape is not None:
+        height, width, channels = frame_shape
+        return image.shape == (channels, height, width) and image.shape != tuple(frame_shape)
+    return image.shape[0] == 3 and image.shape[-1] != 3
+
+
+class RunningImageStats(RunningFeatureStats):
+    """Stats of the frames of an image or video feature, updated frame by frame (e.g. while recording) instead
+    of being computed from a sample of the stored images. Frames are converted to RGB and downsampled like in
+    `sample_images`, and only one frame every `sample_every` is added to the stats. `frame_shape` is the
+    (h, w, c) shape of the frames, which tells their layout apart."""
+
+    def __init__(self, sample_every: int = 1, frame_shape: tuple[int, int, int] | None = None):
+        super().__init__()
+        self.sample_every = sample_every
+        self.frame_shape = tuple(frame_shape) if frame_shape is not None else None
+        self.num_frames = 0
+
+    def update(self, image: np.ndarray | PILImage.Image) -> None:
+        """Adds an image, either uint8 or float in [0, 1], with channels first or last, or a PIL image."""
+        self.num_frames += 1
+        if (self.num_frames - 1) % self.sample_every != 0:
+            return
+        if isinstance(image, PILImage.Image):
+            image = np.asarray(image.convert("RGB"))
+        else:
+            image = np.asarray(image)
+            if is_channel_first(image, self.frame_shape):
+                image = image.transpose(1, 2, 0)
+            if image.dtype != np.uint8:
+                image = (image * 255).astype(np.uint8)
+            if image.shape[-1] != 3:
+                # Same conversion as when the stored images are read (see `load_image_as_numpy`)
+                image = np.asarray(
+                    PILImage.fromarray(image.squeeze(-1) if image.shape[-1] == 1 else image).convert("RGB")
+                )
+        image = image.transpose(2, 0, 1)
+        img = auto_downsample_height_width(image).reshape(image.shape[0], -1).astype(np.float64)
+        # Each image counts as one sample, like in `compute_episode_stats`
+        self._add(img.mean(axis=1), img.var(axis=1), img.min(axis=1), img.max(axis=1))
+
+    def get_stats(self) -> dict[str, np.ndarray]:
+        stats = super().get_stats()
+        return {k: v if k == "count" else (v / 255.0).reshape(-1, 1, 1) for k, v in stats.items()}
+
+
 def compute_episode_stats(episode_data: dict[str, list[str] | np.ndarray], features: dict) -> dict:
     ep_stats = {}
     for key, data in episode_data.items():
@@ -124,30 +245,18 @@ def _assert_type_and_shape(stats_list: list[dict[str, dict]]):
 
 
 def aggregate_feature_stats(stats_ft_list: list[dict[str, dict]]) -> dict[str, dict[str, np.ndarray]]:
-    """Aggregates stats for a single feature."""
-    means = np.stack([s["mean"] for s in stats_ft_list])
-    variances = np.stack([s["std"] ** 2 for s in stats_ft_list])
-    counts = np.stack([s["count"] for s in stats_ft_list])
-    total_count = counts.sum(axis=0)
-
-    # Prepare weighted mean by matching number of dimensions
-    while counts.ndim < means.ndim:
-        counts = np.expand_dims(counts, axis=-1)
-
-    # Compute the weighted mean
-    weighted_means = means * counts
-    total_mean = weighted_means.sum(axis=0) / total_count
-
-    # Compute the variance using the parallel algorithm
-    delta_means = means - total_mean
-    weighted_variances = (variances + delta_means**2) * counts
-    total_variance = weighted_variances.sum(axis=0) / total_count
+    """Aggregates stats for a single feature, merging them with the same algorithm as `RunningFeatureStats`."""
+    total_count, total_mean, total_m2 = 0, 0.0, 0.0
+    for s in stats_ft_list:
+        total_count, total_mean, total_m2 = merge_moments(
+            total_count, total_mean, total_m2, s["count"], s["mean"], s["std"] ** 2 * s["count"]
+        )
 
     return {
         "min": np.min(np.stack([s["min"] for s in stats_ft_list]), axis=0),
         "max": np.max(np.stack([s["max"] for s in stats_ft_list]), axis=0),
         "mean": total_mean,
-        "std": np.sqrt(total_variance),
+        "std": np.sqrt(total_m2 / total_count),
         "count": total_count,
     }
 
@@ -174,3 +283,40 @@ def aggregate_stats(stats_list: list[dict[str, dict]]) -> dict[str, dict[str, np
         aggregated_stats[key] = aggregate_feature_stats(stats_with_key)
 
     return aggregated_stats
+
+
+def subtract_stats(
+    stats: dict[str, dict], removed_stats_list: list[dict[str, dict]], remaining_stats_list: Iterable[dict]
+) -> dict[str, dict[str, np.ndarray]]:
+    """Removes the stats of `removed_stats_list` (e.g. of deleted episodes) from `stats`, which were
+    aggregated from them and those of `remaining_stats_list`.
+
+    Means and stds are updated by subtracting the moments of the removed stats, instead of aggregating all the
+    remaining ones again. Mins and maxes can't be subtracted: those of a feature are only aggregated again
+    from `remaining_stats_list` when one of the removed stats reaches them. Features without samples left are
+    dropped.
+    """
+    remaining = None
+    subtracted = {}
+    for key, ft_stats in stats.items():
+        removed_ft_list = [s[key] for s in removed_stats_list if key in s]
+        if sum(s["count"].item() for s in removed_ft_list) >= ft_stats["count"].item():
+            continue
+
+        count, mean, m2 = ft_stats["count"], ft_stats["mean"], ft_stats["std"] ** 2 * ft_stats["count"]
+        for s in removed_ft_list:
+            count, mean, m2 = unmerge_moments(
+                count, mean, m2, s["count"], s["mean"], s["std"] ** 2 * s["count"]
+            )
+
+        min_, max_ = ft_stats["min"], ft_stats["max"]
+        if any(np.any(s["min"] <= min_) or np.any(s["max"] >= max_) for s in removed_ft_list):
+            if remaining is None:
+                remaining = list(remaining_stats_list)
+            remaining_ft_list = [s[key] for s in remaining if key in s]
+            min_ = np.min(np.stack([s["min"] for s in remaining_ft_list]), axis=0)
+            max_ = np.max(np.stack([s["max"] for s in remaining_ft_list]), axis=0)
+
+        subtracted[key] = {"min": min_, "max": max_, "mean": mean, "std": np.sqrt(m2 / count), "count": count}
+
+    return subtracted
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Deletes episodes of a local dataset, or trims them to a range of their frames, in place. The episodes
+following a deleted one are renumbered to keep episode indices contiguous.
+
+Episodes before the first edited one are left untouched. The parquet files of the following ones are rewritten
+in a single pass, their `index` and `episode_index` columns (and the `frame_index` and `timestamp` columns of
+trimmed episodes) being remapped with Arrow, and their videos are renamed. The videos of trimmed episodes are
+cut without re-encoding when the kept frames start on a keyframe and end on a keyframe or at the end of the
+episode, and re-encoded otherwise (see `trim_video_file`). The stats of the dataset are updated from those of
+the rewritten episodes only (see `subtract_stats`).
+
+The stats of trimmed episodes are computed again from their kept frames, except for images, and for videos
+which were cut without being re-encoded: their stats, computed from a sample of the frames, are kept. Tasks
+which are no longer performed in any episode are kept as well.
+
+The dataset must have the per-episode layout, and must not be read or written by other processes in the
+meantime. An interrupted edit isn't resumed: the dataset should be edited again from a copy.
+
+Usage:
+```bash
+python -m lerobot.datasets.edit_dataset --repo-id lerobot/pusht --root ~/datasets/pusht \
+    --delete-episodes 3 7 --trim-episodes 12:0:250
+```
+"""
+
+import argparse
+import logging
+from copy import deepcopy
+from pathlib import Path
+
+import jsonlines
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from lerobot.datasets.compute_stats import aggregate_stats, compute_episode_stats, subtract_stats
+from lerobot.datasets.lerobot_dataset import CODEBASE_VERSION, LeRobotDatasetMetadata
+from lerobot.datasets.metadata_index import write_metadata_index
+from lerobot.datasets.utils import (
+    EPISODES_PATH,
+    EPISODES_STATS_PATH,
+    serialize_dict,
+    truncate_jsonlines,
+    write_info,
+)
+from lerobot.datasets.video_utils import trim_video_file
+from lerobot.utils.utils import init_logging
+
+
+def _check_edits(
+    meta: LeRobotDatasetMetadata, delete_episodes: set[int], trim_episodes: dict[int, tuple[int, int]]
+) -> None:
+    if meta.info["codebase_version"] != CODEBASE_VERSION:
+        raise ValueError(
+            f"Only datasets of version {CODEBASE_VERSION} can be edited, but {meta.repo_id} is of version "
+            f"{meta.info['codebase_version']}."
+        )
+    if meta.multi_episode_files:
+        raise NotImplementedError(
+            f"{meta.repo_id} has the multi-episode layout, only datasets with one file per episode can be "
+            "edited."
+        )
+    unknown_episodes = (delete_episodes | trim_episodes.keys()).difference(meta.episodes)
+    if unknown_episodes:
+        raise ValueError(f"Episodes {sorted(unknown_episodes)} are not in {meta.repo_id}.")
+    if delete_episodes & trim_episodes.keys():
+        raise ValueError(
+            f"Episodes {sorted(delete_episodes & trim_episodes.keys())} are deleted and trimmed."
+        )
+    if len(delete_episodes) == meta.total_episodes:
+        raise ValueError("All the episodes can't be deleted.")
+    for ep_idx, (start, end) in trim_episodes.items():
+        length = meta.episodes[ep_idx]["length"]
+        if not 0 <= start < end <= length:
+            raise ValueError(
+                f"Episode {ep_idx} has {length} frames, it can't be trimmed to frames {start} to {end}."
+            )
+
+
+def _rewrite_episode(
+    meta: LeRobotDatasetMetadata,
+    ep_idx: int,
+    new_ep_idx: int,
+    frame_offset: int,
+    frame_range: tuple[int, int] | None,
+) -> tuple[dict, dict]:
+    """Moves episode `ep_idx` to `new_ep_idx`, with its first frame at `frame_offset`, and keeps only the
+    frames of `frame_range` if it isn't None. Returns the new episode dict and stats."""
+    table = pq.read_table(meta.root / meta.get_data_file_path(ep_idx))
+    if frame_range is not None:
+        start, end = frame_range
+        table = table.slice(start, end - start)
+    num_frames = len(table)
+    new_columns = {
+        "index": np.arange(frame_offset, frame_offset + num_frames),
+        "episode_index": np.full(num_frames, new_ep_idx),
+    }
+    if frame_range is not None:
+        new_columns["frame_index"] = table["frame_index"].to_numpy() - start
+        new_columns["timestamp"] = table["timestamp"].to_numpy() - table["timestamp"][0].as_py()
+    for key, values in new_columns.items():
+        field_idx = table.schema.get_field_index(key)
+        field = table.schema.field(field_idx)
+        table = table.set_column(field_idx, field, pa.array(values, type=field.type))
+
+    old_path = meta.root / meta.get_data_file_path(ep_idx)
+    new_path = meta.root / meta.get_data_file_path(new_ep_idx)
+    new_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = new_path.with_name(f"{new_path.name}.tmp")
+    pq.write_table(table, tmp_path)
+    tmp_path.replace(new_path)
+    if old_path != new_path:
+        old_path.unlink()
+
+    ep_stats = dict(meta.episodes_stats[ep_idx])
+    for vid_key in meta.video_keys:
+        old_path = meta.root / meta.get_video_file_path(ep_idx, vid_key)
+        new_path = meta.root / meta.get_video_file_path(new_ep_idx, vid_key)
+        new_path.parent.mkdir(parents=True, exist_ok=True)
+        if frame_range is not None:
+            tmp_path = new_path.with_name(f"{new_path.stem}.tmp{new_path.suffix}")
+            profile = meta.video_encoding
+            video_stats = trim_video_file(
+                old_path,
+                tmp_path,
+                *frame_range,
+                meta.fps,
+                g=profile.g,
+                crf=profile.crf,
+                fast_decode=profile.fast_decode,
+            )
+            if video_stats is not None:
+                ep_stats[vid_key] = video_stats
+            tmp_path.replace(new_path)
+        elif old_path != new_path:
+            old_path.replace(new_path)
+        if old_path != new_path:
+            old_path.unlink(missing_ok=True)
+
+    episode = deepcopy(meta.episodes[ep_idx])
+    episode["episode_index"] = new_ep_idx
+    if frame_range is not None:
+        # All the numeric features of the kept frames are read to compute their stats again
+        episode_data = {
+            key: np.asarray(table[key].to_pylist(), dtype=ft["dtype"])
+            for key, ft in meta.features.items()
+            if ft["dtype"] not in ["image", "video", "string"] and key not in new_columns
+        }
+        episode_data.update(new_columns)
+        task_indices = np.unique(episode_data["task_index"]).tolist()
+        episode["tasks"] = [meta.tasks[task_index] for task_index in task_indices]
+        episode["length"] = num_frames
+    else:
+        episode_data = new_columns
+    ep_stats.update(compute_episode_stats(episode_data, meta.features))
+    return episode, ep_stats
+
+
+def _rewrite_jsonlines(fpath: Path, num_kept: int, items: list[dict]) -> None:
+    """Keeps the lines of the first `num_kept` episodes of `fpath` as they are, and appends `items`."""
+    truncate_jsonlines(fpath, "episode_index", num_kept)
+    with jsonlines.open(fpath, "a") as writer:
+        writer.write_all(items)
+
+
+def edit_episodes(
+    meta: LeRobotDatasetMetadata,
+    delete_episodes: list[int] | None = None,
+    trim_episodes: dict[int, tuple[int, int]] | None = None,
+) -> None:
+    """Deletes the episodes `delete_episodes`, and trims each episode of `trim_episodes` to its frames
+    `start` to `end` (excluded), see the module docstring. `meta` is updated in place."""
+    delete_episodes = set(delete_episodes or [])
+    trim_episodes = dict(trim_episodes or {})
+    _check_edits(meta, delete_episodes, trim_episodes)
+    if not delete_episodes and not trim_episodes:
+        return
+
+    first_ep_idx = min(delete_episodes | trim_episodes.keys())
+    rewritten = [
+        ep_idx for ep_idx in range(first_ep_idx, meta.total_episodes) if ep_idx not in delete_episodes
+    ]
+    frame_offset = sum(meta.episodes[ep_idx]["length"] for ep_idx in range(first_ep_idx))
+
+    # Files of deleted episodes are removed first, so that episodes can be moved in their place
+    for ep_idx in delete_episodes:
+        (meta.root / meta.get_data_file_path(ep_idx)).unlink()
+        for vid_key in meta.video_keys:
+            (meta.root / meta.get_video_file_path(ep_idx, vid_key)).unlink()
+
+    episodes, episodes_stats = {}, {}
+    for new_ep_idx, ep_idx in enumerate(rewritten, start=first_ep_idx):
+        episode, ep_stats = _rewrite_episode(
+            meta, ep_idx, new_ep_idx, frame_offset, trim_episodes.get(ep_idx)
+        )
+        episodes[new_ep_idx] = episode
+        episodes_stats[new_ep_idx] = ep_stats
+        frame_offset += episode["length"]
+    logging.info(
+        f"Deleted {len(delete_episodes)} episodes, trimmed {len(trim_episodes)} and rewrote {len(rewritten)} "
+        f"episodes of {meta.root}"
+    )
+
+    # Stats of the episodes before the first edited one are only needed if a removed episode holds an extremum
+    removed_stats = [meta.episodes_stats[ep_idx] for ep_idx in range(first_ep_idx, meta.total_episodes)]
+    kept_stats = (meta.episodes_stats[ep_idx] for ep_idx in range(first_ep_idx))
+    stats = subtract_stats(meta.stats, removed_stats, kept_stats) if first_ep_idx > 0 else {}
+    stats = aggregate_stats([stats, *episodes_stats.values()] if stats else list(episodes_stats.values()))
+
+    meta.episodes = {ep_idx: meta.episodes[ep_idx] for ep_idx in range(first_ep_idx)} | episodes
+    meta.episodes_stats = {ep_idx: meta.episodes_stats[ep_idx] for ep_idx in range(first_ep_idx)}
+    meta.episodes_stats.update(episodes_stats)
+    meta.stats = stats
+
+    _rewrite_jsonlines(meta.root / EPISODES_PATH, first_ep_idx, list(episodes.values()))
+    _rewrite_jsonlines(
+        meta.root / EPISODES_STATS_PATH,
+        first_ep_idx,
+        [{"episode_index": ep_idx, "stats": serialize_dict(s)} for ep_idx, s in episodes_stats.items()],
+    )
+
+    num_episodes = len(meta.episodes)
+    meta.info.update(
+        {
+            "total_episodes": num_episodes,
+            "total_frames": frame_offset,
+            "total_videos": num_episodes * len(meta.video_keys),
+            "total_chunks": (num_episodes - 1) // meta.chunks_size + 1,
+            "splits": {"train": f"0:{num_episodes}"},
+        }
+    )
+    write_info(meta.info, meta.root)
+    # Index the updated stats, so that they aren't aggregated from all the episodes when the dataset is loaded
+    write_metadata_index(meta.root, meta.tasks, meta.episodes, meta.episodes_stats, meta.stats)
+
+
+def _parse_frame_range(value: str) -> tuple[int, tuple[int, int]]:
+    ep_idx, start, end = (int(x) for x in value.split(":"))
+    return ep_idx, (start, end)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--repo-id",
+        type=str,
+        required=True,
+        help="Repository identifier of the dataset to edit (e.g. `lerobot/pusht`).",
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=None,
+        help="Root directory of the dataset stored locally. By default, the dataset is loaded from the "
+        "hugging face cache folder.",
+    )
+    parser.add_argument(
+        "--delete-episodes",
+        type=int,
+        nargs="*",
+        default=[],
+        help="Indices of the episodes to delete.",
+    )
+    parser.add_argument(
+        "--trim-episodes",
+        type=_parse_frame_range,
+        nargs="*",
+        default=[],
+        help="Episodes to trim, as `episode_index:start:end` to keep the frames `start` to `end` (excluded) "
+        "of the episode.",
+    )
+
+    args = parser.parse_args()
+    init_logging()
+    edit_episodes(
+        LeRobotDatasetMetadata(args.repo_id, args.root),
+        delete_episodes=args.delete_episodes,
+        trim_episodes=dict(args.trim_episodes),
+    )
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import queue
+import shutil
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+from lerobot.datasets.utils import (
+    EPISODES_PATH,
+    EPISODES_STATS_PATH,
+    TASKS_PATH,
+    load_info,
+    truncate_jsonlines,
+)
+
+
+class AsyncEpisodeFinalizer:
+    """Finalizes the episodes of a dataset being recorded in a background thread, one at a time and in the
+    order in which they were submitted, so that `LeRobotDataset.save_episode` can return before the episode is
+    written (e.g. to start the reset period of the robot right away).
+
+    Episodes are submitted with the number of frames they hold, so that the index of the next episode and of its
+    first frame are known before the previous episodes are finalized. Once finalizing an episode failed, the
+    following ones are dropped (their indices would be wrong) and the error is raised by `submit` and `flush`.
+    """
+
+    def __init__(self, num_episodes: int, num_frames: int):
+        self.next_episode_index = num_episodes
+        self.next_frame_index = num_frames
+        self.queue = queue.Queue()
+        self._error = None
+        self._stopped = False
+        self._thread = threading.Thread(target=self._finalize_loop, daemon=True)
+        self._thread.start()
+
+    def _finalize_loop(self) -> None:
+        while True:
+            finalize_fn = self.queue.get()
+            if finalize_fn is None:
+                self.queue.task_done()
+                break
+            if self._error is None:
+                try:
+                    finalize_fn()
+                except Exception as e:
+                    logging.error(f"Finalizing an episode failed: {e}")
+                    self._error = e
+            self.queue.task_done()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Finalizing an episode failed, the following episodes were dropped.") from (
+                self._error
+            )
+
+    def submit(self, finalize_fn: Callable[[], None], episode_length: int) -> None:
+        self._raise_error()
+        self.next_episode_index += 1
+        self.next_frame_index += episode_length
+        self.queue.put(finalize_fn)
+
+    @property
+    def num_pending_episodes(self) -> int:
+        return self.queue.unfinished_tasks
+
+    def flush(self) -> None:
+        """Waits for all the submitted episodes to be finalized."""
+        self.queue.join()
+        self._raise_error()
+
+    def stop(self) -> None:
+        if self._stopped:
+            return
+        self.queue.put(None)
+        self._thread.join()
+        self._stopped = True
+
+
+def recover_unfinished_episodes(root: str | Path) -> list[int]:
+    """Removes what was written of the episodes which were not completely finalized when recording was
+    interrupted (e.g. by a crash or a power loss), so that the dataset can be opened and recording resumed.
+
+    Episodes are finalized by writing their parquet file and videos, then appending to the jsonl metadata, and
+    finally writing `meta/info.json`. Episodes counted in `info.json` are thus complete, and this removes the
+    files of the following episodes, as well as the images of episodes which were being recorded.
+
+    Returns the indices of the episodes whose files were removed.
+    """
+    root = Path(root)
+    info = load_info(root)
+    num_episodes = info["total_episodes"]
+
+    truncate_jsonlines(root / TASKS_PATH, "task_index", info["total_tasks"])
+    truncate_jsonlines(root / EPISODES_PATH, "episode_index", num_episodes)
+    truncate_jsonlines(root / EPISODES_STATS_PATH, "episode_index", num_episodes)
+
+    def episode_index(path: Path) -> int:
+        return int(path.name.split(".")[0].split("_")[-1])
+
+    removed = set()
+    patterns = ["data/*/episode_*.parquet", "videos/*/*/episode_*.mp4", "images/*/episode_*"]
+    for pattern in patterns:
+        for path in root.glob(pattern):
+            ep_idx = episode_index(path)
+            if ep_idx < num_episodes:
+                continue
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+            removed.add(ep_idx)
+
+    if removed:
+        logging.warning(f"Removed the files of the unfinished episodes {sorted(removed)} of {root}.")
+    return sorted(removed)
@@ -73,14 +73,24 @@ def make_dataset(cfg: TrainPipelineConfig) -> LeRobotDataset | MultiLeRobotDatas
         cfg (TrainPipelineConfig): A TrainPipelineConfig config which contains a DatasetConfig and a PreTrainedConfig.
 
     Raises:
+        ValueError: Image transforms are enabled together with uint8 frames.
         NotImplementedError: The MultiLeRobotDataset is currently deactivated.
 
     Returns:
         LeRobotDataset | MultiLeRobotDataset
     """
+    # Batched image transforms are applied to whole batches in train.py rather than by the dataset
     image_transforms = (
-        ImageTransforms(cfg.dataset.image_transforms) if cfg.dataset.image_transforms.enable else None
+        ImageTransforms(cfg.dataset.image_transforms)
+        if cfg.dataset.image_transforms.enable and not cfg.dataset.image_transforms.batched
+        else None
     )
+    if cfg.dataset.return_uint8 and image_transforms is not None:
+        raise ValueError(
+            "Image transforms are tuned for float frames and can't be applied to the uint8 frames loaded with "
+            "`dataset.return_uint8=true`. Set `dataset.image_transforms.batched=true` to apply them to float "
+            "frames on the training device instead."
+        )
 
     if isinstance(cfg.dataset.repo_id, str):
         ds_meta = LeRobotDatasetMetadata(
@@ -95,6 +105,8 @@ def make_dataset(cfg: TrainPipelineConfig) -> LeRobotDataset | MultiLeRobotDatas
             image_transforms=image_transforms,
             revision=cfg.dataset.revision,
             video_backend=cfg.dataset.video_backend,
+            return_uint8=cfg.dataset.return_uint8,
+            columns=cfg.dataset.columns,
         )
     else:
         raise NotImplementedError("The MultiLeRobotDataset isn't supported for now.")
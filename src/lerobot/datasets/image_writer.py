@@ -13,10 +13,16 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import logging
 import multiprocessing
+import os
 import queue
 import threading
+import time
+from collections import Counter, deque
+from multiprocessing import resource_tracker, shared_memory
 from pathlib import Path
+from typing import NamedTuple
 
 import numpy as np
 import PIL.Image
@@ -81,21 +87,76 @@ def write_image(image: np.ndarray | PIL.Image.Image, fpath: Path):
         print(f"Error writing image {fpath}: {e}")
 
 
-def worker_thread_loop(queue: queue.Queue):
+class SharedFrame(NamedTuple):
+    """Location of a frame copied by `AsyncImageWriter` in a slot of a `SharedFrameBuffer`."""
+
+    shm_name: str
+    slot: int
+    shape: tuple[int, ...]
+    dtype: str
+
+
+class SharedFrameBuffer:
+    """Preallocated slots in shared memory for frames of a given shape and dtype, which are passed to the
+    worker processes of `AsyncImageWriter` by slot index instead of being pickled."""
+
+    def __init__(self, shape: tuple[int, ...], dtype: np.dtype, num_slots: int):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.slot_size = int(np.prod(shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=max(self.slot_size * num_slots, 1))
+        self.free_slots = list(range(num_slots))
+
+    def put(self, image: np.ndarray) -> SharedFrame | None:
+        """Copies the image in a free slot, returns None if there is none."""
+        if not self.free_slots:
+            return None
+        slot = self.free_slots.pop()
+        np.copyto(shared_frame_array(self.shm, slot, self.shape, self.dtype), image)
+        return SharedFrame(self.shm.name, slot, self.shape, self.dtype.str)
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+
+def shared_frame_array(
+    shm: shared_memory.SharedMemory, slot: int, shape: tuple[int, ...], dtype: np.dtype
+) -> np.ndarray:
+    slot_size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=slot * slot_size)
+
+
+def worker_thread_loop(queue: queue.Queue, done_queue: queue.Queue | None = None, shms: dict | None = None):
+    """Writes the images of `queue`, and reports each of them in `done_queue` with its path and its write
+    latency (from the time it was queued) so that its shared memory slot can be reused."""
     while True:
         item = queue.get()
         if item is None:
             queue.task_done()
             break
-        image_array, fpath = item
-        write_image(image_array, fpath)
+        image, fpath, queued_at = item
+        if isinstance(image, SharedFrame):
+            if image.shm_name not in shms:
+                shms[image.shm_name] = shared_memory.SharedMemory(name=image.shm_name)
+            image_array = shared_frame_array(shms[image.shm_name], image.slot, image.shape, image.dtype)
+            write_image(image_array, fpath)
+            del image_array
+            released = (image.shm_name, image.slot)
+        else:
+            write_image(image, fpath)
+            released = None
+        if done_queue is not None:
+            done_queue.put((released, time.monotonic() - queued_at, fpath))
         queue.task_done()
 
 
-def worker_process(queue: queue.Queue, num_threads: int):
+def worker_process(queue: queue.Queue, num_threads: int, done_queue: queue.Queue | None = None):
     threads = []
+    # Shared memory buffers attached by the threads of this process
+    shms = {}
     for _ in range(num_threads):
-        t = threading.Thread(target=worker_thread_loop, args=(queue,))
+        t = threading.Thread(target=worker_thread_loop, args=(queue, done_queue, shms))
         t.daemon = True
         t.start()
         threads.append(t)
@@ -111,19 +172,49 @@ class AsyncImageWriter:
 
     When `num_processes=0`, it creates a threads pool of size `num_threads`.
     When `num_processes>0`, it creates processes pool of size `num_processes`, where each subprocess starts
-    their own threads pool of size `num_threads`.
+    their own threads pool of size `num_threads`. Numpy images (and tensors) are then copied in preallocated
+    slots of shared memory, so that only their slot index is pickled to the subprocesses.
 
     The optimal number of processes and threads depends on your computer capabilities.
     We advise to use 4 threads per camera with 0 processes. If the fps is not stable, try to increase or lower
     the number of threads. If it is still not stable, try to use 1 subprocess, or more.
+
+    With `max_queue_size>0`, at most that many images wait to be written: when the writers fall behind,
+    `save_image` blocks until one of them is written, or drops the new image if `drop_when_full=True` (which
+    leaves a missing frame on disk, see `LeRobotDataset._fill_dropped_images`). `get_metrics` reports the
+    number of waiting and dropped images, and the write latencies, to tune the number of processes and
+    threads.
+
+    `wait_until_written` waits for the images of some directories only (e.g. those of an episode), while
+    images of other directories keep being queued by another thread.
     """
 
-    def __init__(self, num_processes: int = 0, num_threads: int = 1):
+    def __init__(
+        self,
+        num_processes: int = 0,
+        num_threads: int = 1,
+        max_queue_size: int = 0,
+        drop_when_full: bool = False,
+        num_shared_memory_slots: int = 64,
+    ):
         self.num_processes = num_processes
         self.num_threads = num_threads
+        self.max_queue_size = max_queue_size
+        self.drop_when_full = drop_when_full
+        # Enough slots for all the waiting images when their number is bounded
+        self.num_shared_memory_slots = max_queue_size if max_queue_size > 0 else num_shared_memory_slots
         self.queue = None
+        self.done_queue = None
         self.threads = []
         self.processes = []
+        self.frame_buffers = {}
+        self.num_queued = 0
+        self.num_written = 0
+        # Images queued and not written yet, by directory
+        self.pending_by_dir = Counter()
+        self.dropped_frames = 0
+        self.write_latencies = deque(maxlen=1000)
+        self._lock = threading.Lock()
         self._stopped = False
 
         if num_threads <= 0 and num_processes <= 0:
@@ -132,28 +223,126 @@ class AsyncImageWriter:
         if self.num_processes == 0:
             # Use threading
             self.queue = queue.Queue()
+            self.done_queue = queue.Queue()
             for _ in range(self.num_threads):
-                t = threading.Thread(target=worker_thread_loop, args=(self.queue,))
+                t = threading.Thread(target=worker_thread_loop, args=(self.queue, self.done_queue))
                 t.daemon = True
                 t.start()
                 self.threads.append(t)
         else:
             # Use multiprocessing
+            if os.name == "posix":
+                # Shared memory attached by the subprocesses must be tracked by the same process as this one's
+                resource_tracker.ensure_running()
             self.queue = multiprocessing.JoinableQueue()
+            self.done_queue = multiprocessing.Queue()
             for _ in range(self.num_processes):
-                p = multiprocessing.Process(target=worker_process, args=(self.queue, self.num_threads))
+                p = multiprocessing.Process(
+                    target=worker_process, args=(self.queue, self.num_threads, self.done_queue)
+                )
                 p.daemon = True
                 p.start()
                 self.processes.append(p)
 
-    def save_image(self, image: torch.Tensor | np.ndarray | PIL.Image.Image, fpath: Path):
+    @property
+    def queue_size(self) -> int:
+        """Number of images waiting to be written."""
+        with self._lock:
+            return self.num_queued - self.num_written
+
+    def _collect_written_images(self, timeout: float = 0) -> None:
+        """Accounts for the images written since the last call, waiting up to `timeout` for the first one."""
+        while True:
+            try:
+                released, latency, fpath = (
+                    self.done_queue.get(timeout=timeout) if timeout else self.done_queue.get_nowait()
+                )
+            except queue.Empty:
+                return
+            timeout = 0
+            with self._lock:
+                self.num_written += 1
+                directory = Path(fpath).parent
+                self.pending_by_dir[directory] -= 1
+                if self.pending_by_dir[directory] == 0:
+                    del self.pending_by_dir[directory]
+                self.write_latencies.append(latency)
+                if released is not None:
+                    shm_name, slot = released
+                    self.frame_buffers[shm_name].free_slots.append(slot)
+
+    def _share_frame(self, image: np.ndarray) -> SharedFrame | None:
+        key = (image.shape, image.dtype.str)
+        with self._lock:
+            frame_buffer = next(
+                (buf for buf in self.frame_buffers.values() if (buf.shape, buf.dtype.str) == key), None
+            )
+            if frame_buffer is None:
+                frame_buffer = SharedFrameBuffer(image.shape, image.dtype, self.num_shared_memory_slots)
+                self.frame_buffers[frame_buffer.shm.name] = frame_buffer
+            return frame_buffer.put(image)
+
+    def save_image(self, image: torch.Tensor | np.ndarray | PIL.Image.Image, fpath: Path) -> bool:
+        """Queues the image to be written at `fpath`. Returns False if it was dropped because the writers fell
+        behind (see `drop_when_full`)."""
         if isinstance(image, torch.Tensor):
             # Convert tensor to numpy array to minimize main process time
             image = image.cpu().numpy()
-        self.queue.put((image, fpath))
+
+        self._collect_written_images()
+        if self.max_queue_size > 0 and self.queue_size >= self.max_queue_size:
+            if self.drop_when_full:
+                if self.dropped_frames == 0:
+                    logging.warning(f"The image writer fell behind, dropping images such as {fpath}.")
+                self.dropped_frames += 1
+                return False
+            while self.queue_size >= self.max_queue_size:
+                self._collect_written_images(timeout=0.1)
+
+        if self.num_processes > 0 and isinstance(image, np.ndarray):
+            # Images are pickled through the queue when all the slots are in use
+            image = self._share_frame(image) or image
+        with self._lock:
+            self.num_queued += 1
+            self.pending_by_dir[Path(fpath).parent] += 1
+        self.queue.put((image, fpath, time.monotonic()))
+        return True
+
+    def get_metrics(self) -> dict[str, float]:
+        """Number of images waiting to be written and of dropped images, and latency between queuing and
+        writing the last 1000 images."""
+        self._collect_written_images()
+        latencies_ms = np.array(self.write_latencies) * 1e3
+        return {
+            "queue_size": self.queue_size,
+            "dropped_frames": self.dropped_frames,
+            "write_latency_p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies_ms) else 0.0,
+            "write_latency_p99_ms": float(np.percentile(latencies_ms, 99)) if len(latencies_ms) else 0.0,
+            "write_latency_max_ms": float(latencies_ms.max()) if len(latencies_ms) else 0.0,
+        }
 
     def wait_until_done(self):
+        with self._lock:
+            num_queued = self.num_queued
         self.queue.join()
+        # Reports of written images may still be in flight from the subprocesses
+        while self._num_written() < num_queued:
+            self._collect_written_images(timeout=0.1)
+
+    def wait_until_written(self, directories: list[Path]) -> None:
+        """Waits for the images queued so far in `directories` to be written. Can be called from another
+        thread than the one queuing images, which may keep queuing images in other directories meanwhile."""
+        directories = [Path(directory) for directory in directories]
+        while self._num_pending(directories) > 0:
+            self._collect_written_images(timeout=0.1)
+
+    def _num_written(self) -> int:
+        with self._lock:
+            return self.num_written
+
+    def _num_pending(self, directories: list[Path]) -> int:
+        with self._lock:
+            return sum(self.pending_by_dir[directory] for directory in directories)
 
     def stop(self):
         if self._stopped:
@@ -165,6 +354,8 @@ class AsyncImageWriter:
             for t in self.threads:
                 t.join()
         else:
+            # Subprocesses can't exit before the reports of their written images are read
+            self.wait_until_done()
             num_nones = self.num_processes * self.num_threads
             for _ in range(num_nones):
                 self.queue.put(None)
@@ -174,5 +365,9 @@ class AsyncImageWriter:
                     p.terminate()
             self.queue.close()
             self.queue.join_thread()
+            self.done_queue.close()
+            self.done_queue.join_thread()
+            for frame_buffer in self.frame_buffers.values():
+                frame_buffer.close()
 
         self._stopped = True
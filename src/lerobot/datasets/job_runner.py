@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import logging
+import multiprocessing
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+
+def load_progress_manifest(manifest_path: Path) -> dict[int, Any]:
+    """Loads the results of the episodes completed by a previous run of `run_episode_jobs`. The last line is
+    ignored when it was only partially written (e.g. when the run was killed while writing it)."""
+    if not manifest_path.is_file():
+        return {}
+
+    results = {}
+    with open(manifest_path) as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            results[item["episode_index"]] = item["result"]
+    return results
+
+
+def run_episode_jobs(
+    job_fn: Callable[..., Any],
+    jobs: dict[int, tuple],
+    manifest_path: Path | None = None,
+    num_workers: int = 0,
+    description: str = "Processed",
+) -> dict[int, Any]:
+    """Runs `job_fn(*args)` for each episode of `jobs` (which maps episode indices to their arguments) and
+    returns their results by episode index.
+
+    Jobs run in a pool of `num_workers` processes, or in the current process when `num_workers` is 0. They are
+    started with "spawn", like `LeRobotDataset._parallel_encode_videos`: `job_fn` must be defined at the top
+    level of a module and its arguments must be picklable.
+
+    When `manifest_path` is given, the result of each episode is appended to it as soon as its job completes,
+    and the episodes found in it are skipped: a conversion which was interrupted or failed resumes where it
+    stopped when it is run again. Results must be JSON-serializable in that case.
+    """
+    results = load_progress_manifest(manifest_path) if manifest_path is not None else {}
+    num_resumed = len(results.keys() & jobs.keys())
+    pending = {ep_idx: args for ep_idx, args in jobs.items() if ep_idx not in results}
+    if manifest_path is not None:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        manifest = open(manifest_path, "a")  # noqa: SIM115
+
+    def on_completed(ep_idx: int, result: Any) -> None:
+        results[ep_idx] = result
+        if manifest_path is not None:
+            manifest.write(json.dumps({"episode_index": ep_idx, "result": result}) + "\n")
+            manifest.flush()
+
+    start_time = time.perf_counter()
+    try:
+        if num_workers == 0:
+            for ep_idx, args in pending.items():
+                on_completed(ep_idx, job_fn(*args))
+        else:
+            mp_context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context) as executor:
+                futures = {executor.submit(job_fn, *args): ep_idx for ep_idx, args in pending.items()}
+                try:
+                    for future in as_completed(futures):
+                        on_completed(futures[future], future.result())
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+    finally:
+        if manifest_path is not None:
+            manifest.close()
+
+    elapsed = time.perf_counter() - start_time
+    logging.info(
+        f"{description} {len(pending)} episodes in {elapsed:.1f}s with {num_workers} workers "
+        f"({len(pending) / max(elapsed, 1e-9):.1f} episodes/s), {num_resumed} episodes resumed"
+    )
+    return {ep_idx: results[ep_idx] for ep_idx in sorted(jobs)}
@@ -13,16 +13,25 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import bisect
 import contextlib
 import logging
+import multiprocessing
+import os
 import shutil
+import threading
+import time
 from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
 
 import datasets
 import numpy as np
 import packaging.version
 import PIL.Image
+import pyarrow as pa
+import pyarrow.parquet as pq
 import torch
 import torch.utils
 from datasets import concatenate_datasets, load_dataset
@@ -31,8 +40,15 @@ from huggingface_hub.constants import REPOCARD_NAME
 from huggingface_hub.errors import RevisionNotFoundError
 
 from lerobot.constants import HF_LEROBOT_HOME
-from lerobot.datasets.compute_stats import aggregate_stats, compute_episode_stats
+from lerobot.datasets.compute_stats import (
+    RunningFeatureStats,
+    RunningImageStats,
+    aggregate_stats,
+    compute_episode_stats,
+)
+from lerobot.datasets.episode_finalizer import AsyncEpisodeFinalizer
 from lerobot.datasets.image_writer import AsyncImageWriter, write_image
+from lerobot.datasets.metadata_index import METADATA_INDEX_DIR, load_metadata_index, write_metadata_index
 from lerobot.datasets.utils import (
     DEFAULT_FEATURES,
     DEFAULT_IMAGE_PATH,
@@ -51,6 +67,8 @@ from lerobot.datasets.utils import (
     get_episode_data_index,
     get_hf_features_from_features,
     get_safe_version,
+    get_video_frame_indices,
+    hf_column_to_torch,
     hf_transform_to_torch,
     is_valid_version,
     load_episodes,
@@ -58,6 +76,7 @@ from lerobot.datasets.utils import (
     load_info,
     load_stats,
     load_tasks,
+    read_parquet_rows,
     validate_episode_buffer,
     validate_frame,
     write_episode,
@@ -66,11 +85,17 @@ from lerobot.datasets.utils import (
     write_json,
 )
 from lerobot.datasets.video_utils import (
+    DecodedFrameCache,
+    StreamingVideoEncoder,
+    VideoDecoderCache,
+    VideoEncodingProfile,
     VideoFrame,
     decode_video_frames,
+    decode_video_frames_at_indices,
     encode_video_frames,
     get_safe_default_codec,
     get_video_info,
+    probe_decode_latency,
 )
 
 CODEBASE_VERSION = "v2.1"
@@ -103,14 +128,24 @@ class LeRobotDatasetMetadata:
     def load_metadata(self):
         self.info = load_info(self.root)
         check_version_compatibility(self.repo_id, self._version, CODEBASE_VERSION)
-        self.tasks, self.task_to_task_index = load_tasks(self.root)
-        self.episodes = load_episodes(self.root)
         if self._version < packaging.version.parse("v2.1"):
+            self.tasks, self.task_to_task_index = load_tasks(self.root)
+            self.episodes = load_episodes(self.root)
             self.stats = load_stats(self.root)
             self.episodes_stats = backward_compatible_episodes_stats(self.stats, self.episodes)
-        else:
-            self.episodes_stats = load_episodes_stats(self.root)
-            self.stats = aggregate_stats(list(self.episodes_stats.values()))
+            return
+
+        index = load_metadata_index(self.root)
+        if index is not None:
+            self.tasks, self.episodes, self.episodes_stats, self.stats = index
+            self.task_to_task_index = {task: task_index for task_index, task in self.tasks.items()}
+            return
+
+        self.tasks, self.task_to_task_index = load_tasks(self.root)
+        self.episodes = load_episodes(self.root)
+        self.episodes_stats = load_episodes_stats(self.root)
+        self.stats = aggregate_stats(list(self.episodes_stats.values()))
+        write_metadata_index(self.root, self.tasks, self.episodes, self.episodes_stats, self.stats)
 
     def pull_from_repo(
         self,
@@ -144,6 +179,24 @@ class LeRobotDatasetMetadata:
     def get_episode_chunk(self, ep_index: int) -> int:
         return ep_index // self.chunks_size
 
+    def get_video_timestamp_offset(self, ep_index: int, vid_key: str) -> float:
+        """Timestamp of the first frame of an episode in its video file, which is 0 unless episodes share their
+        video files (see `multi_episode_files`)."""
+        if not self.multi_episode_files:
+            return 0.0
+        return self.episodes[ep_index]["video_timestamp_offsets"][vid_key]
+
+    def get_data_row_range(self, ep_index: int) -> tuple[int, int]:
+        """Rows `start:end` of an episode in its parquet file, which only holds this episode unless episodes
+        share their files (see `multi_episode_files`)."""
+        start = self.episodes[ep_index]["data_row_offset"] if self.multi_episode_files else 0
+        return start, start + self.episodes[ep_index]["length"]
+
+    @property
+    def multi_episode_files(self) -> bool:
+        """True if the episodes of a chunk share the same parquet file and videos, see `compact_dataset`."""
+        return "{episode_index" not in self.data_path
+
     @property
     def data_path(self) -> str:
         """Formattable string for the parquet files."""
@@ -184,6 +237,13 @@ class LeRobotDatasetMetadata:
         """Keys to access visual modalities (regardless of their storage method)."""
         return [key for key, ft in self.features.items() if ft["dtype"] in ["video", "image"]]
 
+    @property
+    def video_encoding(self) -> VideoEncodingProfile:
+        """Profile the videos are encoded with, which defaults to the parameters of `encode_video_frames` when
+        the dataset doesn't declare one."""
+        profile = self.info.get("video_encoding")
+        return VideoEncodingProfile.from_dict(profile) if profile else VideoEncodingProfile()
+
     @property
     def names(self) -> dict[str, list | dict]:
         """Names of the various dimensions of vector modalities."""
@@ -261,8 +321,6 @@ class LeRobotDatasetMetadata:
         self.info["splits"] = {"train": f"0:{self.info['total_episodes']}"}
         self.info["total_videos"] += len(self.video_keys)
 
-        write_info(self.info, self.root)
-
         episode_dict = {
             "episode_index": episode_index,
             "tasks": episode_tasks,
@@ -275,16 +333,42 @@ class LeRobotDatasetMetadata:
         self.stats = aggregate_stats([self.stats, episode_stats]) if self.stats else episode_stats
         write_episode_stats(episode_index, episode_stats, self.root)
 
-    def update_video_info(self) -> None:
+        # Written last, so that episodes counted in info.json are complete (see `recover_unfinished_episodes`)
+        write_info(self.info, self.root)
+
+    def update_video_info(self, video_backend: str | None = None) -> None:
         """
         Warning: this function writes info from first episode videos, implicitly assuming that all videos have
         been encoded the same way. Also, this means it assumes the first episode exists.
+
+        When the dataset declares a `VideoEncodingProfile` with `probe_decode`, the latency of reading these
+        videos with its access pattern is also measured with `video_backend` (see `probe_decode_latency`).
         """
         for key in self.video_keys:
             if not self.features[key].get("info", None):
                 video_path = self.root / self.get_video_file_path(ep_index=0, vid_key=key)
                 self.info["features"][key]["info"] = get_video_info(video_path)
 
+        if "video_encoding" not in self.info:
+            return
+        profile = self.video_encoding
+        if not profile.probe_decode:
+            return
+        for key in self.video_keys:
+            if key in profile.decode_probe:
+                continue
+            video_path = self.root / self.get_video_file_path(ep_index=0, vid_key=key)
+            probe = probe_decode_latency(
+                video_path, self.fps, profile.frame_window, profile.block_size, backend=video_backend
+            )
+            self.info["video_encoding"]["decode_probe"][key] = probe
+            if profile.max_decode_latency_ms is not None and probe["p99_ms"] > profile.max_decode_latency_ms:
+                logging.warning(
+                    f"Decoding frames of {key} takes {probe['p99_ms']:.1f}ms (p99) with the "
+                    f"'{probe['backend']}' backend, more than {profile.max_decode_latency_ms=}. Consider a "
+                    "smaller `g` or `fast_decode`."
+                )
+
     def __repr__(self):
         feature_keys = list(self.features)
         return (
@@ -305,8 +389,10 @@ class LeRobotDatasetMetadata:
         robot_type: str | None = None,
         root: str | Path | None = None,
         use_videos: bool = True,
+        video_encoding: VideoEncodingProfile | None = None,
     ) -> "LeRobotDatasetMetadata":
-        """Creates metadata for a LeRobotDataset."""
+        """Creates metadata for a LeRobotDataset. Videos are encoded with `video_encoding`, which is recorded
+        in info.json, or with the defaults of `encode_video_frames` if it is None."""
         obj = cls.__new__(cls)
         obj.repo_id = repo_id
         obj.root = Path(root) if root is not None else HF_LEROBOT_HOME / repo_id
@@ -322,6 +408,8 @@ class LeRobotDatasetMetadata:
         obj.info = create_empty_dataset_info(CODEBASE_VERSION, fps, features, use_videos, robot_type)
         if len(obj.video_keys) > 0 and not use_videos:
             raise ValueError()
+        if video_encoding is not None:
+            obj.info["video_encoding"] = video_encoding.to_dict()
         write_json(obj.info, obj.root / INFO_PATH)
         obj.revision = None
         return obj
@@ -341,6 +429,12 @@ class LeRobotDataset(torch.utils.data.Dataset):
         download_videos: bool = True,
         video_backend: str | None = None,
         batch_encoding_size: int = 1,
+        frame_cache_bytes: int = 0,
+        decoded_video_dir: str | Path | None = None,
+        return_uint8: bool = False,
+        columns: list[str] | None = None,
+        streaming_encoding: bool = False,
+        batch_encoding_workers: int = 1,
     ):
         """
         2 modes are available for instantiating this class, depending on 2 different use cases:
@@ -444,6 +538,30 @@ class LeRobotDataset(torch.utils.data.Dataset):
                 You can also use the 'pyav' decoder used by Torchvision, which used to be the default option, or 'video_reader' which is another decoder of Torchvision.
             batch_encoding_size (int, optional): Number of episodes to accumulate before batch encoding videos.
                 Set to 1 for immediate encoding (default), or higher for batched encoding. Defaults to 1.
+            frame_cache_bytes (int, optional): Size in bytes of the cache of decoded video frames kept by each
+                process reading this dataset. Neighbouring samples querying the same frames (e.g. with
+                `delta_timestamps` spanning several observation steps and an episode-contiguous sampler) then
+                only decode the frames they don't share. Set to 0 to disable the cache. Defaults to 0.
+            decoded_video_dir (str | Path | None, optional): Directory of frames decoded once into uint8
+                memmaps by `lerobot.datasets.video_memmap`. Frames are then read from these memmaps instead
+                of being decoded from the videos, at the resolution they were stored with. The videos are
+                decoded into this directory first if it doesn't exist yet. Defaults to None.
+            return_uint8 (bool, optional): Return the frames of camera keys as uint8 tensors in [0, 255]
+                instead of float32 tensors in [0, 1], which divides by 4 the amount of data passed from
+                DataLoader workers to the training process. They are converted to float on the training
+                device by `Normalize`. Note that `image_transforms` are then applied to uint8 frames.
+                Defaults to False.
+            columns (list[str] | None, optional): Features to load. Only these columns are read from the
+                parquet files (and converted to the arrow cache), and only these videos are downloaded and
+                decoded, which saves time and memory when a policy only consumes some of the features, in
+                particular with embedded images. The default features (index, timestamp, etc.) are always
+                loaded. Defaults to None, which loads all the features.
+            streaming_encoding (bool, optional): When recording, encode the frames of video features as they are
+                added with `add_frame`, in a background thread per camera, instead of writing them as PNG files
+                encoded by `save_episode`. Their stats are computed over all the frames instead of a sample of
+                them. `batch_encoding_size` is then ignored. Defaults to False.
+            batch_encoding_workers (int, optional): Number of videos encoded concurrently by processes when
+                batch encoding, see `batch_encode_videos`. Defaults to 1.
         """
         super().__init__()
         self.repo_id = repo_id
@@ -454,13 +572,28 @@ class LeRobotDataset(torch.utils.data.Dataset):
         self.tolerance_s = tolerance_s
         self.revision = revision if revision else CODEBASE_VERSION
         self.video_backend = video_backend if video_backend else get_safe_default_codec()
+        self.decoder_cache = VideoDecoderCache()
+        self.frame_cache = DecodedFrameCache(frame_cache_bytes) if frame_cache_bytes > 0 else None
+        self.decoded_videos = None
+        self.return_uint8 = return_uint8
+        self.columns = None
         self.delta_indices = None
         self.batch_encoding_size = batch_encoding_size
         self.episodes_since_last_encoding = 0
+        self.streaming_encoding = streaming_encoding
+        self.batch_encoding_workers = batch_encoding_workers
+        self._columns = {}
+        self._column_keys = None
+        self._row_dataset = None
+        self._video_frame_indices = None
+        self._pending_episode_tables = []
+        self._pending_tables_lock = threading.Lock()
 
         # Unused attributes
         self.image_writer = None
+        self.finalizer = None
         self.episode_buffer = None
+        self.video_encoders = {}
 
         self.root.mkdir(exist_ok=True, parents=True)
 
@@ -472,6 +605,14 @@ class LeRobotDataset(torch.utils.data.Dataset):
             episodes_stats = [self.meta.episodes_stats[ep_idx] for ep_idx in self.episodes]
             self.stats = aggregate_stats(episodes_stats)
 
+        if columns is not None:
+            unknown_columns = set(columns).difference(self.meta.features)
+            if unknown_columns:
+                raise ValueError(
+                    f"Columns {unknown_columns} are not features of the dataset: {list(self.meta.features)}."
+                )
+            self.columns = list(DEFAULT_FEATURES) + [key for key in columns if key not in DEFAULT_FEATURES]
+
         # Load actual data
         try:
             if force_cache_sync:
@@ -486,16 +627,43 @@ class LeRobotDataset(torch.utils.data.Dataset):
         self.episode_data_index = get_episode_data_index(self.meta.episodes, self.episodes)
 
         # Check timestamps
-        timestamps = torch.stack(self.hf_dataset["timestamp"]).numpy()
-        episode_indices = torch.stack(self.hf_dataset["episode_index"]).numpy()
+        timestamps = self._get_column("timestamp").numpy()
+        episode_indices = self._get_column("episode_index").numpy()
         ep_data_index_np = {k: t.numpy() for k, t in self.episode_data_index.items()}
         check_timestamps_sync(timestamps, episode_indices, ep_data_index_np, self.fps, self.tolerance_s)
 
+        # Frames are looked up by index in the videos when all timestamps are within tolerance of a frame
+        if len(self.video_keys) > 0:
+            self._video_frame_indices = get_video_frame_indices(timestamps, self.fps, self.tolerance_s)
+            if self._video_frame_indices is None:
+                logging.warning(
+                    f"Some timestamps are further than {self.tolerance_s=} from a video frame, frames will be "
+                    "looked up by timestamp and checked against this tolerance when loaded."
+                )
+
         # Setup delta_indices
         if self.delta_timestamps is not None:
             check_delta_timestamps(self.delta_timestamps, self.fps, self.tolerance_s)
+            if self.columns is not None and not set(self.delta_timestamps).issubset(self.columns):
+                raise ValueError(
+                    f"Keys {set(self.delta_timestamps).difference(self.columns)} of delta_timestamps are not "
+                    f"in the loaded columns: {self.columns}."
+                )
             self.delta_indices = get_delta_indices(self.delta_timestamps, self.fps)
 
+        if "video_encoding" in self.meta.info and len(self.video_keys) > 0:
+            self._check_video_encoding()
+
+        # Load columns before DataLoader workers are started so that they all read the same memory
+        for key in self._get_column_keys():
+            self._get_column(key)
+
+        if decoded_video_dir is not None and len(self.video_keys) > 0:
+            # Imported here since video_memmap depends on this module through online_buffer
+            from lerobot.datasets.video_memmap import load_decoded_video_memmap
+
+            self.decoded_videos = load_decoded_video_memmap(self, decoded_video_dir)
+
     def push_to_hub(
         self,
         branch: str | None = None,
@@ -508,7 +676,8 @@ class LeRobotDataset(torch.utils.data.Dataset):
         upload_large_folder: bool = False,
         **card_kwargs,
     ) -> None:
-        ignore_patterns = ["images/"]
+        self.flush()
+        ignore_patterns = ["images/", f"{METADATA_INDEX_DIR}/"]
         if not push_videos:
             ignore_patterns.append("videos/")
 
@@ -575,33 +744,82 @@ class LeRobotDataset(torch.utils.data.Dataset):
         # TODO(rcadene, aliberts): implement faster transfer
         # https://huggingface.co/docs/huggingface_hub/en/guides/download#faster-downloads
         files = None
-        ignore_patterns = None if download_videos else "videos/"
+        ignore_patterns = [] if download_videos else ["videos/"]
         if self.episodes is not None:
             files = self.get_episodes_file_paths()
+        elif self.columns is not None:
+            # Videos of the features which aren't loaded
+            ignore_patterns += [
+                f"videos/*/{key}/*" for key in self.meta.video_keys if key not in self.video_keys
+            ]
+        ignore_patterns = ignore_patterns if ignore_patterns else None
 
         self.pull_from_repo(allow_patterns=files, ignore_patterns=ignore_patterns)
 
     def get_episodes_file_paths(self) -> list[Path]:
         episodes = self.episodes if self.episodes is not None else list(range(self.meta.total_episodes))
         fpaths = [str(self.meta.get_data_file_path(ep_idx)) for ep_idx in episodes]
-        if len(self.meta.video_keys) > 0:
+        if len(self.video_keys) > 0:
             video_files = [
                 str(self.meta.get_video_file_path(ep_idx, vid_key))
-                for vid_key in self.meta.video_keys
+                for vid_key in self.video_keys
                 for ep_idx in episodes
             ]
             fpaths += video_files
 
-        return fpaths
+        # Episodes share their files with the multi-episode layout
+        return list(dict.fromkeys(fpaths))
+
+    def _check_video_encoding(self) -> None:
+        """Warns when items read fewer consecutive video frames than the access pattern the videos were
+        encoded for, which makes each access decode frames it does not use (see `VideoEncodingProfile`).
+
+        The sampler is not known here, so items are assumed to be read one at a time: videos encoded for
+        blocks of items (`block_size`) or for sequential reads (`block_size=None`) warn unless a single item
+        spans as many frames as a block.
+        """
+        profile = self.meta.video_encoding
+        delta_indices = self.delta_indices or {}
+        window = [d for key in self.meta.video_keys for d in delta_indices.get(key, [0])]
+        frames_per_item = 1 + max(window) - min(window)
+        if profile.block_size is None:
+            encoded_for = "items read sequentially"
+        else:
+            frames_per_access = profile.block_size + max(profile.frame_window) - min(profile.frame_window)
+            if frames_per_item >= frames_per_access:
+                return
+            encoded_for = f"items reading the frames {profile.frame_window}"
+            if profile.block_size > 1:
+                encoded_for = f"blocks of {profile.block_size} {encoded_for}"
+        logging.warning(
+            f"Videos of {self.repo_id} were encoded (g={profile.g}) for {encoded_for}, but items read the "
+            f"frames {sorted(set(window))}. Decoding may be slower than expected, unless items are read by "
+            "blocks of consecutive frames (see `EpisodeAwareSampler`)."
+        )
 
     def load_hf_dataset(self) -> datasets.Dataset:
         """hf_dataset contains all the observations, states, actions, rewards, etc."""
+        kwargs = {}
+        if self.columns is not None:
+            # Only the selected columns are read from the parquet files
+            kwargs["columns"] = [key for key in self.columns if self.meta.features[key]["dtype"] != "video"]
         if self.episodes is None:
             path = str(self.root / "data")
-            hf_dataset = load_dataset("parquet", data_dir=path, split="train")
+            hf_dataset = load_dataset("parquet", data_dir=path, split="train", **kwargs)
+        elif self.meta.multi_episode_files:
+            # Files also contain the other episodes of their chunk, only the rows of the selected ones are read
+            parquet_files = {}
+            tables = []
+            for ep_idx in self.episodes:
+                path = self.root / self.meta.get_data_file_path(ep_idx)
+                if path not in parquet_files:
+                    parquet_files[path] = pq.ParquetFile(path)
+                start, end = self.meta.get_data_row_range(ep_idx)
+                tables.append(read_parquet_rows(parquet_files[path], start, end, kwargs.get("columns")))
+            hf_dataset = datasets.Dataset(pa.concat_tables(tables))
         else:
             files = [str(self.root / self.meta.get_data_file_path(ep_idx)) for ep_idx in self.episodes]
-            hf_dataset = load_dataset("parquet", data_files=files, split="train")
+            hf_dataset = load_dataset("parquet", data_files=files, split="train", **kwargs)
 
         # TODO(aliberts): hf_dataset.set_format("torch")
         hf_dataset.set_transform(hf_transform_to_torch)
@@ -616,6 +834,34 @@ class LeRobotDataset(torch.utils.data.Dataset):
         hf_dataset.set_transform(hf_transform_to_torch)
         return hf_dataset
 
+    @property
+    def hf_dataset(self) -> datasets.Dataset | None:
+        """Table of the frames of the selected episodes.
+
+        While recording, the tables of the saved episodes are only concatenated to it when it is accessed, so
+        that saving an episode doesn't copy the frames of all the previous ones. Tables are appended by the
+        episode finalizer thread, which is kept out by `_pending_tables_lock` while they are concatenated.
+        """
+        with self._pending_tables_lock:
+            if self._pending_episode_tables:
+                tables = [self._hf_dataset, *self._pending_episode_tables]
+                self._hf_dataset = concatenate_datasets(tables)
+                self._hf_dataset.set_transform(hf_transform_to_torch)
+                self._pending_episode_tables = []
+                self._columns = {}
+                self._column_keys = None
+                self._row_dataset = None
+            return self._hf_dataset
+
+    @hf_dataset.setter
+    def hf_dataset(self, hf_dataset: datasets.Dataset | None) -> None:
+        with self._pending_tables_lock:
+            self._hf_dataset = hf_dataset
+            self._pending_episode_tables = []
+            self._columns = {}
+            self._column_keys = None
+            self._row_dataset = None
+
     @property
     def fps(self) -> int:
         """Frames per second used during data collection."""
@@ -624,7 +870,10 @@ class LeRobotDataset(torch.utils.data.Dataset):
     @property
     def num_frames(self) -> int:
         """Number of frames in selected episodes."""
-        return len(self.hf_dataset) if self.hf_dataset is not None else self.meta.total_frames
+        with self._pending_tables_lock:
+            if self._hf_dataset is None:
+                return self.meta.total_frames
+            return len(self._hf_dataset) + sum(len(table) for table in self._pending_episode_tables)
 
     @property
     def num_episodes(self) -> int:
@@ -635,27 +884,39 @@ class LeRobotDataset(torch.utils.data.Dataset):
     def features(self) -> dict[str, dict]:
         return self.meta.features
 
+    @property
+    def image_keys(self) -> list[str]:
+        """Keys of the images loaded by this dataset, which are all the image keys unless `columns` is given."""
+        return [key for key in self.meta.image_keys if self.columns is None or key in self.columns]
+
+    @property
+    def video_keys(self) -> list[str]:
+        """Keys of the videos loaded by this dataset, which are all the video keys unless `columns` is given."""
+        return [key for key in self.meta.video_keys if self.columns is None or key in self.columns]
+
+    @property
+    def camera_keys(self) -> list[str]:
+        """Keys of the images and videos loaded by this dataset."""
+        return [key for key in self.meta.camera_keys if self.columns is None or key in self.columns]
+
     @property
     def hf_features(self) -> datasets.Features:
         """Features of the hf_dataset."""
-        if self.hf_dataset is not None:
-            return self.hf_dataset.features
+        if self._hf_dataset is not None:
+            return self._hf_dataset.features
         else:
             return get_hf_features_from_features(self.features)
 
-    def _get_query_indices(self, idx: int, ep_idx: int) -> tuple[dict[str, list[int | bool]]]:
-        ep_start = self.episode_data_index["from"][ep_idx]
-        ep_end = self.episode_data_index["to"][ep_idx]
-        query_indices = {
-            key: [max(ep_start.item(), min(ep_end.item() - 1, idx + delta)) for delta in delta_idx]
-            for key, delta_idx in self.delta_indices.items()
-        }
-        padding = {  # Pad values outside of current episode range
-            f"{key}_is_pad": torch.BoolTensor(
-                [(idx + delta < ep_start.item()) | (idx + delta >= ep_end.item()) for delta in delta_idx]
-            )
-            for key, delta_idx in self.delta_indices.items()
-        }
+    def _get_query_indices(self, idx: int, ep_idx: int) -> tuple[dict[str, np.ndarray]]:
+        ep_start = self.episode_data_index["from"][ep_idx].item()
+        ep_end = self.episode_data_index["to"][ep_idx].item()
+        query_indices = {}
+        padding = {}
+        for key, delta_idx in self.delta_indices.items():
+            indices = idx + np.asarray(delta_idx, dtype=np.int64)
+            # Pad values outside of current episode range
+            padding[f"{key}_is_pad"] = torch.from_numpy((indices < ep_start) | (indices >= ep_end))
+            query_indices[key] = np.clip(indices, ep_start, ep_end - 1)
         return query_indices, padding
 
     def _get_query_timestamps(
@@ -664,32 +925,136 @@ class LeRobotDataset(torch.utils.data.Dataset):
         query_indices: dict[str, list[int]] | None = None,
     ) -> dict[str, list[float]]:
         query_timestamps = {}
-        for key in self.meta.video_keys:
+        for key in self.video_keys:
             if query_indices is not None and key in query_indices:
-                timestamps = self.hf_dataset.select(query_indices[key])["timestamp"]
-                query_timestamps[key] = torch.stack(timestamps).tolist()
+                query_timestamps[key] = self._get_column("timestamp")[query_indices[key]].tolist()
             else:
                 query_timestamps[key] = [current_ts]
 
         return query_timestamps
 
-    def _query_hf_dataset(self, query_indices: dict[str, list[int]]) -> dict:
-        return {
-            key: torch.stack(self.hf_dataset.select(q_idx)[key])
-            for key, q_idx in query_indices.items()
-            if key not in self.meta.video_keys
-        }
+    def _get_query_frame_indices(
+        self, idx: int, query_indices: dict[str, np.ndarray] | None = None
+    ) -> dict[str, list[int]]:
+        """Same as `_get_query_timestamps` but returns the indices of the queried frames in the videos."""
+        query_frame_indices = {}
+        for key in self.video_keys:
+            if query_indices is not None and key in query_indices:
+                query_frame_indices[key] = self._video_frame_indices[query_indices[key]].tolist()
+            else:
+                query_frame_indices[key] = [self._video_frame_indices[idx].item()]
+
+        return query_frame_indices
+
+    def _get_column_keys(self) -> list[str]:
+        """Keys of the columns of hf_dataset which can be loaded in memory with `_get_column`.
+
+        They are listed once for each version of hf_dataset (i.e. when it is loaded, set or extended with the
+        tables of saved episodes), along with `_row_dataset`, the view of hf_dataset restricted to the other
+        columns (images and strings) which are still read row by row.
+        """
+        # Tables appended while recording are concatenated by the hf_dataset getter, which resets the keys
+        if self._column_keys is None or self._pending_episode_tables:
+            hf_dataset = self.hf_dataset
+            self._column_keys = [
+                key
+                for key in hf_dataset.column_names
+                if key not in self.features or self.features[key]["dtype"] not in ["image", "string"]
+            ]
+            row_keys = [key for key in hf_dataset.column_names if key not in self._column_keys]
+            self._row_dataset = hf_dataset.select_columns(row_keys) if row_keys else None
+        return self._column_keys
+
+    def _get_column(self, key: str) -> torch.Tensor:
+        """Returns the whole `key` column of hf_dataset as a single tensor (see `hf_column_to_torch`), loaded in
+        memory on first access.
+
+        Columns are moved to shared memory so that DataLoader workers index the same tensors instead of each
+        holding a copy, whether they are forked or spawned (shared tensors are passed by handle).
+        """
+        if key not in self._columns:
+            column = hf_column_to_torch(self.hf_dataset, key)
+            try:
+                column.share_memory_()
+            except RuntimeError as e:
+                logging.warning(f"Column '{key}' is kept in private memory, it couldn't be shared: {e}")
+            self._columns[key] = column
+        return self._columns[key]
+
+    def _get_row(self, idx: int) -> dict:
+        """Same as `self.hf_dataset[idx]`, with values read from the columns loaded by `_get_column`.
+
+        Only images and strings, which can't be stored in a tensor column, are still read from hf_dataset.
+        """
+        column_keys = self._get_column_keys()
+        item = self._row_dataset[idx] if self._row_dataset is not None else {}
+        for key in column_keys:
+            item[key] = self._get_column(key)[idx]
+        return item
+
+    def _query_hf_dataset(self, query_indices: dict[str, np.ndarray]) -> dict:
+        result = {}
+        column_keys = self._get_column_keys()
+        for key, q_idx in query_indices.items():
+            if key in self.meta.video_keys:
+                continue
+            if key not in column_keys:
+                result[key] = torch.stack(self._row_dataset.select(q_idx)[key])
+            else:
+                result[key] = self._get_column(key)[torch.from_numpy(q_idx)]
+        return result
 
     def _query_videos(self, query_timestamps: dict[str, list[float]], ep_idx: int) -> dict[str, torch.Tensor]:
-        """Note: When using data workers (e.g. DataLoader with num_workers>0), do not call this function
-        in the main process (e.g. by using a second Dataloader with num_workers=0). It will result in a
-        Segmentation Fault. This probably happens because a memory reference to the video loader is created in
-        the main process and a subprocess fails to access it.
+        """Decoders are kept open across calls in `self.decoder_cache`. The cache is bound to the process
+        which opened them: DataLoader workers forked after this function has been called in the main process
+        drop the inherited decoders and open their own, which makes it safe to call it from both the main
+        process and data workers. Hits and misses can be monitored with `self.decoder_cache.stats()`.
         """
+        if self.decoded_videos is not None:
+            frames = self.decoded_videos.query(
+                ep_idx, query_timestamps, self.tolerance_s, return_uint8=self.return_uint8
+            )
+            return {vid_key: vid_frames.squeeze(0) for vid_key, vid_frames in frames.items()}
+
         item = {}
         for vid_key, query_ts in query_timestamps.items():
             video_path = self.root / self.meta.get_video_file_path(ep_idx, vid_key)
-            frames = decode_video_frames(video_path, query_ts, self.tolerance_s, self.video_backend)
+            offset = self.meta.get_video_timestamp_offset(ep_idx, vid_key)
+            frames = decode_video_frames(
+                video_path,
+                [offset + ts for ts in query_ts],
+                self.tolerance_s,
+                self.video_backend,
+                decoder_cache=self.decoder_cache,
+                frame_cache=self.frame_cache,
+                fps=self.fps,
+                return_uint8=self.return_uint8,
+            )
+            item[vid_key] = frames.squeeze(0)
+
+        return item
+
+    def _query_video_frames(
+        self, query_frame_indices: dict[str, list[int]], ep_idx: int
+    ) -> dict[str, torch.Tensor]:
+        """Same as `_query_videos` with frames queried by index, see `decode_video_frames_at_indices`."""
+        if self.decoded_videos is not None:
+            query_timestamps = {key: [i / self.fps for i in idx] for key, idx in query_frame_indices.items()}
+            return self._query_videos(query_timestamps, ep_idx)
+
+        item = {}
+        for vid_key, frame_indices in query_frame_indices.items():
+            video_path = self.root / self.meta.get_video_file_path(ep_idx, vid_key)
+            first_frame = round(self.meta.get_video_timestamp_offset(ep_idx, vid_key) * self.fps)
+            frames = decode_video_frames_at_indices(
+                video_path,
+                [first_frame + i for i in frame_indices],
+                self.fps,
+                self.video_backend,
+                decoder_cache=self.decoder_cache,
+                frame_cache=self.frame_cache,
+                return_uint8=self.return_uint8,
+            )
             item[vid_key] = frames.squeeze(0)
 
         return item
@@ -702,8 +1067,18 @@ class LeRobotDataset(torch.utils.data.Dataset):
     def __len__(self):
         return self.num_frames
 
+    def __getstate__(self) -> dict:
+        # Locks can't be pickled (e.g. to "spawn" DataLoader workers)
+        state = self.__dict__.copy()
+        del state["_pending_tables_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._pending_tables_lock = threading.Lock()
+
     def __getitem__(self, idx) -> dict:
-        item = self.hf_dataset[idx]
+        item = self._get_row(idx)
         ep_idx = item["episode_index"].item()
 
         query_indices = None
@@ -714,15 +1089,23 @@ class LeRobotDataset(torch.utils.data.Dataset):
             for key, val in query_result.items():
                 item[key] = val
 
-        if len(self.meta.video_keys) > 0:
+        if len(self.video_keys) > 0 and self._video_frame_indices is not None:
+            query_frame_indices = self._get_query_frame_indices(idx, query_indices)
+            video_frames = self._query_video_frames(query_frame_indices, ep_idx)
+            item = {**video_frames, **item}
+        elif len(self.video_keys) > 0:
             current_ts = item["timestamp"].item()
             query_timestamps = self._get_query_timestamps(current_ts, query_indices)
             video_frames = self._query_videos(query_timestamps, ep_idx)
             item = {**video_frames, **item}
 
+        if self.return_uint8:
+            for key in self.image_keys:
+                # Images are decoded to float in [0, 1] by `hf_transform_to_torch`, this conversion is exact
+                item[key] = (item[key] * 255).round().type(torch.uint8)
+
         if self.image_transforms is not None:
-            image_keys = self.meta.camera_keys
-            for cam in image_keys:
+            for cam in self.camera_keys:
                 item[cam] = self.image_transforms(item[cam])
 
         # Add task as a string
@@ -743,15 +1126,49 @@ class LeRobotDataset(torch.utils.data.Dataset):
         )
 
     def create_episode_buffer(self, episode_index: int | None = None) -> dict:
-        current_ep_idx = self.meta.total_episodes if episode_index is None else episode_index
+        if episode_index is not None:
+            current_ep_idx = episode_index
+        elif self.finalizer is not None:
+            # Episodes may be waiting to be finalized
+            current_ep_idx = self.finalizer.next_episode_index
+        else:
+            current_ep_idx = self.meta.total_episodes
         ep_buffer = {}
         # size and task are special cases that are not in self.features
         ep_buffer["size"] = 0
         ep_buffer["task"] = []
         for key in self.features:
             ep_buffer[key] = current_ep_idx if key == "episode_index" else []
+        # stats is also a special case: stats of the frames are updated by `add_frame`, except for the indices
+        # set by `save_episode` and for the videos encoded on the fly, whose stats come from their encoder
+        ep_buffer["stats"] = {}
+        for key, ft in self.features.items():
+            if key in ["index", "episode_index", "task_index"] or ft["dtype"] == "string":
+                continue
+            if ft["dtype"] == "video" and self.streaming_encoding:
+                continue
+            if ft["dtype"] in ["image", "video"]:
+                # About 10 frames per second are enough for the stats of images (see `sample_images`)
+                ep_buffer["stats"][key] = RunningImageStats(
+                    sample_every=max(1, self.fps // 10), frame_shape=self._get_frame_shape(key)
+                )
+            else:
+                ep_buffer["stats"][key] = RunningFeatureStats()
         return ep_buffer
 
+    def _get_frame_shape(self, key: str) -> tuple[int, int, int]:
+        """(h, w, c) shape of the frames of an image or video feature, from the names of its dimensions."""
+        shape = tuple(self.features[key]["shape"])
+        names = self.features[key].get("names")
+        if names is not None:
+            channel_first = names[0] in ["channel", "channels"]
+        else:
+            # Undeclared layout (e.g. features guessed from tensors), the channels are the smaller dimension
+            channel_first = shape[0] < shape[-1]
+        if channel_first:  # (c, h, w) -> (h, w, c)
+            shape = (shape[1], shape[2], shape[0])
+        return shape
+
     def _get_image_file_path(self, episode_index: int, image_key: str, frame_index: int) -> Path:
         fpath = DEFAULT_IMAGE_PATH.format(
             image_key=image_key, episode_index=episode_index, frame_index=frame_index
@@ -764,13 +1181,14 @@ class LeRobotDataset(torch.utils.data.Dataset):
                 image = image.cpu().numpy()
             write_image(image, fpath)
         else:
+            # Images dropped with `drop_when_full` are replaced when the episode is saved
             self.image_writer.save_image(image=image, fpath=fpath)
 
     def add_frame(self, frame: dict, task: str, timestamp: float | None = None) -> None:
         """
         This function only adds the frame to the episode_buffer. Apart from images — which are written in a
-        temporary directory — nothing is written to disk. To save those frames, the 'save_episode()' method
-        then needs to be called.
+        temporary directory, or encoded on the fly with `streaming_encoding` — nothing is written to disk. To
+        save those frames, the 'save_episode()' method then needs to be called.
         """
         # Convert torch to numpy if needed
         for name in frame:
@@ -789,6 +1207,9 @@ class LeRobotDataset(torch.utils.data.Dataset):
         self.episode_buffer["frame_index"].append(frame_index)
         self.episode_buffer["timestamp"].append(timestamp)
         self.episode_buffer["task"].append(task)
+        ep_stats = self.episode_buffer["stats"]
+        ep_stats["frame_index"].update(frame_index)
+        ep_stats["timestamp"].update(timestamp)
 
         # Add frame features to episode_buffer
         for key in frame:
@@ -797,7 +1218,13 @@ class LeRobotDataset(torch.utils.data.Dataset):
                     f"An element of the frame is not in the features. '{key}' not in '{self.features.keys()}'."
                 )
 
-            if self.features[key]["dtype"] in ["image", "video"]:
+            if self.features[key]["dtype"] == "video" and self.streaming_encoding:
+                if frame_index == 0:
+                    self.video_encoders[key] = self._start_video_encoder(
+                        self.episode_buffer["episode_index"], key
+                    )
+                self.video_encoders[key].add_frame(frame[key])
+            elif self.features[key]["dtype"] in ["image", "video"]:
                 img_path = self._get_image_file_path(
                     episode_index=self.episode_buffer["episode_index"], image_key=key, frame_index=frame_index
                 )
@@ -805,8 +1232,11 @@ class LeRobotDataset(torch.utils.data.Dataset):
                     img_path.parent.mkdir(parents=True, exist_ok=True)
                 self._save_image(frame[key], img_path)
                 self.episode_buffer[key].append(str(img_path))
+                ep_stats[key].update(frame[key])
             else:
                 self.episode_buffer[key].append(frame[key])
+                if key in ep_stats:
+                    ep_stats[key].update(frame[key])
 
         self.episode_buffer["size"] += 1
 
@@ -818,25 +1248,68 @@ class LeRobotDataset(torch.utils.data.Dataset):
         - If batch_encoding_size == 1: Videos are encoded immediately after each episode
         - If batch_encoding_size > 1: Videos are encoded in batches.
 
+        With an episode finalizer (see `start_episode_finalizer`), the episode is only queued and this returns
+        right away: it is written in the background, and `flush()` waits for it.
+
         Args:
             episode_data (dict | None, optional): Dict containing the episode data to save. If None, this will
                 save the current episode in self.episode_buffer, which is filled with 'add_frame'. Defaults to
                 None.
         """
+        if self.meta.multi_episode_files:
+            raise NotImplementedError(
+                "Episodes can't be added to a dataset with the multi-episode layout, see `compact_dataset`."
+            )
         if not episode_data:
             episode_buffer = self.episode_buffer
 
-        validate_episode_buffer(episode_buffer, self.meta.total_episodes, self.features)
+        if self.finalizer is not None:
+            num_episodes, num_frames = self.finalizer.next_episode_index, self.finalizer.next_frame_index
+        else:
+            num_episodes, num_frames = self.meta.total_episodes, self.meta.total_frames
+        validate_episode_buffer(episode_buffer, num_episodes, self.features)
 
         # size and task are special cases that won't be added to hf_dataset
         episode_length = episode_buffer.pop("size")
         tasks = episode_buffer.pop("task")
-        episode_tasks = list(set(tasks))
+        running_stats = episode_buffer.pop("stats", {})
         episode_index = episode_buffer["episode_index"]
 
-        episode_buffer["index"] = np.arange(self.meta.total_frames, self.meta.total_frames + episode_length)
+        episode_buffer["index"] = np.arange(num_frames, num_frames + episode_length)
         episode_buffer["episode_index"] = np.full((episode_length,), episode_index)
 
+        for key, ft in self.features.items():
+            # index, episode_index, task_index are already processed above, and image and video
+            # are processed separately by storing image path and frame info as meta data
+            if key in ["index", "episode_index", "task_index"] or ft["dtype"] in ["image", "video"]:
+                continue
+            episode_buffer[key] = np.stack(episode_buffer[key])
+
+        # The encoders of the next episode are started by `add_frame`
+        video_encoders, self.video_encoders = self.video_encoders, {}
+        if self.finalizer is not None:
+            self.finalizer.submit(
+                partial(self._finalize_episode, episode_buffer, tasks, video_encoders, running_stats),
+                episode_length,
+            )
+        else:
+            self._finalize_episode(episode_buffer, tasks, video_encoders, running_stats)
+
+        if not episode_data:  # Reset the buffer
+            self.episode_buffer = self.create_episode_buffer()
+
+    def _finalize_episode(
+        self,
+        episode_buffer: dict,
+        tasks: list[str],
+        video_encoders: dict[str, StreamingVideoEncoder],
+        running_stats: dict[str, RunningFeatureStats],
+    ) -> None:
+        """Writes an episode prepared by `save_episode`: its parquet file, its videos, and then its metadata."""
+        episode_index = int(episode_buffer["episode_index"][0])
+        episode_length = len(tasks)
+        episode_tasks = list(set(tasks))
+
         # Add new tasks to the tasks dictionary
         for task in episode_tasks:
             task_index = self.meta.get_task_index(task)
@@ -846,19 +1319,22 @@ class LeRobotDataset(torch.utils.data.Dataset):
         # Given tasks in natural language, find their corresponding task indices
         episode_buffer["task_index"] = np.array([self.meta.get_task_index(task) for task in tasks])
 
-        for key, ft in self.features.items():
-            # index, episode_index, task_index are already processed above, and image and video
-            # are processed separately by storing image path and frame info as meta data
-            if key in ["index", "episode_index", "task_index"] or ft["dtype"] in ["image", "video"]:
-                continue
-            episode_buffer[key] = np.stack(episode_buffer[key])
-
-        self._wait_image_writer()
+        self._wait_image_writer(episode_index)
+        if self.image_writer is not None and self.image_writer.drop_when_full:
+            self._fill_dropped_images(episode_index, episode_length)
         self._save_episode_table(episode_buffer, episode_index)
-        ep_stats = compute_episode_stats(episode_buffer, self.features)
+        # Stats of the frames were updated while they were recorded, and videos encoded on the fly come with the
+        # stats of their frames. Only the stats of the indices set by `save_episode` are left to compute.
+        ep_stats = {key: stats.get_stats() for key, stats in running_stats.items()}
+        ep_stats.update({key: encoder.finish() for key, encoder in video_encoders.items()})
+        ep_stats.update(
+            compute_episode_stats(
+                {key: val for key, val in episode_buffer.items() if key not in ep_stats}, self.features
+            )
+        )
 
         has_video_keys = len(self.meta.video_keys) > 0
-        use_batched_encoding = self.batch_encoding_size > 1
+        use_batched_encoding = self.batch_encoding_size > 1 and not self.streaming_encoding
 
         if has_video_keys and not use_batched_encoding:
             self.encode_episode_videos(episode_index)
@@ -878,9 +1354,8 @@ class LeRobotDataset(torch.utils.data.Dataset):
                 self.batch_encode_videos(start_ep, end_ep)
                 self.episodes_since_last_encoding = 0
 
-        # Episode data index and timestamp checking
-        ep_data_index = get_episode_data_index(self.meta.episodes, [episode_index])
-        ep_data_index_np = {k: t.numpy() for k, t in ep_data_index.items()}
+        # Timestamp checking
+        ep_data_index_np = {"from": np.array([0]), "to": np.array([episode_length])}
         check_timestamps_sync(
             episode_buffer["timestamp"],
             episode_buffer["episode_index"],
@@ -889,29 +1364,61 @@ class LeRobotDataset(torch.utils.data.Dataset):
             self.tolerance_s,
         )
 
-        # Verify that we have one parquet file per episode and the number of video files matches the number of encoded episodes
-        parquet_files = list(self.root.rglob("*.parquet"))
-        assert len(parquet_files) == self.num_episodes
-        video_files = list(self.root.rglob("*.mp4"))
-        assert len(video_files) == (self.num_episodes - self.episodes_since_last_encoding) * len(
-            self.meta.video_keys
-        )
-
-        if not episode_data:  # Reset the buffer
-            self.episode_buffer = self.create_episode_buffer()
+        # Verify that the files of the episode were written, rather than listing all the files of the dataset
+        assert (self.root / self.meta.get_data_file_path(episode_index)).is_file()
+        if has_video_keys and not use_batched_encoding:
+            for key in self.meta.video_keys:
+                assert (self.root / self.meta.get_video_file_path(episode_index, key)).is_file()
+
+    def _fill_dropped_images(self, episode_index: int, episode_length: int) -> None:
+        """Replaces the images of an episode dropped by the image writer with the previous frame of the
+        episode (the first frame left for the first ones), so that each frame counted by `add_frame` has its
+        image."""
+        for key in self.meta.camera_keys:
+            if self.features[key]["dtype"] == "video" and self.streaming_encoding:
+                continue
+            paths = [self._get_image_file_path(episode_index, key, i) for i in range(episode_length)]
+            dropped = [i for i, path in enumerate(paths) if not path.is_file()]
+            if not dropped:
+                continue
+            if len(dropped) == episode_length:
+                raise RuntimeError(f"All the images of '{key}' were dropped in episode {episode_index}.")
+            logging.warning(
+                f"Replacing {len(dropped)} images of '{key}' dropped in episode {episode_index} by the "
+                "previous frames."
+            )
+            first_kept = next(i for i, path in enumerate(paths) if path.is_file())
+            for i in dropped:
+                shutil.copyfile(paths[i - 1] if i > first_kept else paths[first_kept], paths[i])
 
     def _save_episode_table(self, episode_buffer: dict, episode_index: int) -> None:
         episode_dict = {key: episode_buffer[key] for key in self.hf_features}
         ep_dataset = datasets.Dataset.from_dict(episode_dict, features=self.hf_features, split="train")
-        ep_dataset = embed_images(ep_dataset)
-        self.hf_dataset = concatenate_datasets([self.hf_dataset, ep_dataset])
-        self.hf_dataset.set_transform(hf_transform_to_torch)
+        if self.meta.image_keys:
+            ep_dataset = embed_images(ep_dataset)
+        with self._pending_tables_lock:
+            self._pending_episode_tables.append(ep_dataset)
         ep_data_path = self.root / self.meta.get_data_file_path(ep_index=episode_index)
         ep_data_path.parent.mkdir(parents=True, exist_ok=True)
         ep_dataset.to_parquet(ep_data_path)
 
+    def _start_video_encoder(self, episode_index: int, video_key: str) -> StreamingVideoEncoder:
+        video_path = self.root / self.meta.get_video_file_path(episode_index, video_key)
+        return StreamingVideoEncoder(
+            video_path,
+            self.fps,
+            frame_shape=self._get_frame_shape(video_key),
+            **self.meta.video_encoding.encoding_kwargs(),
+        )
+
+    def _cancel_video_encoders(self) -> None:
+        for encoder in self.video_encoders.values():
+            encoder.cancel()
+        self.video_encoders = {}
+
     def clear_episode_buffer(self) -> None:
         episode_index = self.episode_buffer["episode_index"]
+        self._cancel_video_encoders()
 
         # Clean up image files for the current episode buffer
         if self.image_writer is not None:
@@ -925,7 +1432,17 @@ class LeRobotDataset(torch.utils.data.Dataset):
         # Reset the buffer
         self.episode_buffer = self.create_episode_buffer()
 
-    def start_image_writer(self, num_processes: int = 0, num_threads: int = 4) -> None:
+    def start_image_writer(
+        self,
+        num_processes: int = 0,
+        num_threads: int = 4,
+        max_queue_size: int = 0,
+        drop_when_full: bool = False,
+    ) -> None:
+        """Starts writing the images of `add_frame` asynchronously (see `AsyncImageWriter`). With
+        `max_queue_size>0`, `add_frame` blocks when that many images are waiting to be written, or drops the
+        image if `drop_when_full=True`. Dropped images are replaced by the previous frame of their episode
+        when it is saved (see `_fill_dropped_images`)."""
         if isinstance(self.image_writer, AsyncImageWriter):
             logging.warning(
                 "You are starting a new AsyncImageWriter that is replacing an already existing one in the dataset."
@@ -934,6 +1451,8 @@ class LeRobotDataset(torch.utils.data.Dataset):
         self.image_writer = AsyncImageWriter(
             num_processes=num_processes,
             num_threads=num_threads,
+            max_queue_size=max_queue_size,
+            drop_when_full=drop_when_full,
         )
 
     def stop_image_writer(self) -> None:
@@ -945,12 +1464,42 @@ class LeRobotDataset(torch.utils.data.Dataset):
             self.image_writer.stop()
             self.image_writer = None
 
-    def _wait_image_writer(self) -> None:
-        """Wait for asynchronous image writer to finish."""
-        if self.image_writer is not None:
+    def _wait_image_writer(self, episode_index: int | None = None) -> None:
+        """Wait for asynchronous image writer to finish writing the images of `episode_index`, or all the
+        images if it is None. Images of the next episodes may be queued meanwhile by `add_frame`."""
+        if self.image_writer is None:
+            return
+        if episode_index is None:
             self.image_writer.wait_until_done()
-
-    def encode_episode_videos(self, episode_index: int) -> None:
+        else:
+            image_dirs = [
+                self._get_image_file_path(episode_index=episode_index, image_key=key, frame_index=0).parent
+                for key in self.meta.camera_keys
+            ]
+            self.image_writer.wait_until_written(image_dirs)
+
+    def start_episode_finalizer(self) -> None:
+        """Makes `save_episode` return as soon as the episode is queued, and finalize it in the background."""
+        if self.finalizer is not None:
+            raise ValueError("An episode finalizer is already running.")
+        self.finalizer = AsyncEpisodeFinalizer(self.meta.total_episodes, self.meta.total_frames)
+
+    def stop_episode_finalizer(self) -> None:
+        """Finalizes the pending episodes and stops the episode finalizer, which makes the dataset picklable."""
+        if self.finalizer is not None:
+            try:
+                self.flush()
+            finally:
+                self.finalizer.stop()
+                self.finalizer = None
+
+    def flush(self) -> None:
+        """Waits for the episodes passed to `save_episode` to be written, and raises the error of the first one
+        which couldn't be."""
+        if self.finalizer is not None:
+            self.finalizer.flush()
+
+    def encode_episode_videos(self, episode_index: int, num_threads: int | None = None) -> None:
         """
         Use ffmpeg to convert frames stored as png into mp4 videos.
         Note: `encode_video_frames` is a blocking call. Making it asynchronous shouldn't speedup encoding,
@@ -963,6 +1512,8 @@ class LeRobotDataset(torch.utils.data.Dataset):
 
         Args:
             episode_index (int): Index of the episode to encode.
+            num_threads (int | None, optional): Number of threads used by the encoder. Defaults to None, which
+                uses all the cores.
         """
         for key in self.meta.video_keys:
             video_path = self.root / self.meta.get_video_file_path(episode_index, key)
@@ -972,34 +1523,162 @@ class LeRobotDataset(torch.utils.data.Dataset):
             img_dir = self._get_image_file_path(
                 episode_index=episode_index, image_key=key, frame_index=0
             ).parent
-            encode_video_frames(img_dir, video_path, self.fps, overwrite=True)
+            encode_video_frames(
+                img_dir,
+                video_path,
+                self.fps,
+                overwrite=True,
+                num_threads=num_threads,
+                **self.meta.video_encoding.encoding_kwargs(),
+            )
             shutil.rmtree(img_dir)
 
         # Update video info (only needed when first episode is encoded since it reads from episode 0)
         if len(self.meta.video_keys) > 0 and episode_index == 0:
-            self.meta.update_video_info()
+            self.meta.update_video_info(self.video_backend)
             write_info(self.meta.info, self.meta.root)  # ensure video info always written properly
 
-    def batch_encode_videos(self, start_episode: int = 0, end_episode: int | None = None) -> None:
+    def batch_encode_videos(
+        self,
+        start_episode: int = 0,
+        end_episode: int | None = None,
+        num_workers: int | None = None,
+        threads_per_job: int | None = None,
+    ) -> None:
         """
         Batch encode videos for multiple episodes.
 
+        With several workers, the video of each (episode, camera) pair is encoded by a pool of processes, which
+        produces the same files as encoding them one after the other.
+
         Args:
             start_episode: Starting episode index (inclusive)
             end_episode: Ending episode index (exclusive). If None, encodes all episodes from start_episode
+            num_workers: Number of videos encoded concurrently. If None, uses `batch_encoding_workers`.
+            threads_per_job: Number of threads used to encode each video. If None, the cores are split between
+                the workers (a single worker uses all of them).
         """
         if end_episode is None:
             end_episode = self.meta.total_episodes
+        if num_workers is None:
+            num_workers = self.batch_encoding_workers
 
         logging.info(f"Starting batch video encoding for episodes {start_episode} to {end_episode - 1}")
 
-        # Encode all episodes with cleanup enabled for individual episodes
-        for ep_idx in range(start_episode, end_episode):
-            logging.info(f"Encoding videos for episode {ep_idx}")
-            self.encode_episode_videos(ep_idx)
+        if num_workers <= 1:
+            # Encode all episodes with cleanup enabled for individual episodes
+            for ep_idx in range(start_episode, end_episode):
+                logging.info(f"Encoding videos for episode {ep_idx}")
+                self.encode_episode_videos(ep_idx, num_threads=threads_per_job)
+        else:
+            self._parallel_encode_videos(range(start_episode, end_episode), num_workers, threads_per_job)
 
         logging.info("Batch video encoding completed")
 
+    def _parallel_encode_videos(
+        self, episodes: range, num_workers: int, threads_per_job: int | None = None
+    ) -> None:
+        if threads_per_job is None:
+            threads_per_job = max(1, (os.cpu_count() or 1) // num_workers)
+
+        jobs = {}
+        for ep_idx in episodes:
+            for key in self.meta.video_keys:
+                video_path = self.root / self.meta.get_video_file_path(ep_idx, key)
+                if not video_path.is_file():
+                    img_dir = self._get_image_file_path(
+                        episode_index=ep_idx, image_key=key, frame_index=0
+                    ).parent
+                    jobs[(ep_idx, key)] = (img_dir, video_path)
+
+        total_frames = sum(self.meta.episodes[ep_idx]["length"] for ep_idx, _ in jobs)
+        logging.info(
+            f"Encoding {len(jobs)} videos ({total_frames} frames) with {num_workers} workers "
+            f"of {threads_per_job} threads"
+        )
+        # Spawned workers don't inherit the threads of this process (e.g. image writers)
+        mp_context = multiprocessing.get_context("spawn")
+        encoding_kwargs = self.meta.video_encoding.encoding_kwargs()
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context) as executor:
+            futures = {
+                executor.submit(
+                    encode_video_frames,
+                    img_dir,
+                    video_path,
+                    self.fps,
+                    overwrite=True,
+                    num_threads=threads_per_job,
+                    **encoding_kwargs,
+                ): job
+                for job, (img_dir, video_path) in jobs.items()
+            }
+            start_time = time.perf_counter()
+            encoded_frames = 0
+            try:
+                for i, future in enumerate(as_completed(futures), start=1):
+                    future.result()
+                    ep_idx, key = futures[future]
+                    shutil.rmtree(jobs[(ep_idx, key)][0])
+                    encoded_frames += self.meta.episodes[ep_idx]["length"]
+                    elapsed = time.perf_counter() - start_time
+                    logging.info(
+                        f"Encoded {i}/{len(jobs)} videos: episode {ep_idx}, {key} "
+                        f"({encoded_frames / elapsed:.1f} frames/s)"
+                    )
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        # Update video info (only needed when first episode is encoded since it reads from episode 0)
+        if len(self.meta.video_keys) > 0 and 0 in episodes:
+            self.meta.update_video_info(self.video_backend)
+            write_info(self.meta.info, self.meta.root)
+
+    def delete_episodes(self, episode_indices: list[int]) -> None:
+        """Deletes episodes from the dataset on disk. The following episodes are renumbered so that episode
+        indices stay contiguous, see `lerobot.datasets.edit_dataset`."""
+        self._edit_episodes(delete_episodes=episode_indices)
+
+    def trim_episodes(self, frame_ranges: dict[int, tuple[int, int]]) -> None:
+        """Keeps only the frames `start` to `end` (excluded) of each episode of `frame_ranges`, given as
+        `{episode_index: (start, end)}`, on disk (see `lerobot.datasets.edit_dataset`)."""
+        self._edit_episodes(trim_episodes=frame_ranges)
+
+    def _edit_episodes(
+        self,
+        delete_episodes: list[int] | None = None,
+        trim_episodes: dict[int, tuple[int, int]] | None = None,
+    ) -> None:
+        # Imported here since edit_dataset depends on this module
+        from lerobot.datasets.edit_dataset import edit_episodes
+
+        if self.episodes is not None:
+            raise ValueError("Episodes can't be edited when only some of them are loaded.")
+        if self.finalizer is not None:
+            raise ValueError("The episode finalizer must be stopped before editing episodes.")
+        if self.episodes_since_last_encoding > 0:
+            raise ValueError("The videos of the last episodes must be encoded before editing episodes.")
+        if self.episode_buffer is not None and self.episode_buffer["size"] > 0:
+            raise ValueError("The episode being recorded must be saved or cleared before editing episodes.")
+
+        edit_episodes(self.meta, delete_episodes=delete_episodes, trim_episodes=trim_episodes)
+
+        # Reload the frames and forget the ones decoded from the previous files
+        self.hf_dataset = self.load_hf_dataset()
+        self.episode_data_index = get_episode_data_index(self.meta.episodes, self.episodes)
+        if self._video_frame_indices is not None:
+            timestamps = self._get_column("timestamp").numpy()
+            self._video_frame_indices = get_video_frame_indices(timestamps, self.fps, self.tolerance_s)
+        self.decoder_cache.clear()
+        if self.frame_cache is not None:
+            self.frame_cache.clear()
+        if self.decoded_videos is not None:
+            logging.warning("Frames are decoded from the edited videos instead of `decoded_video_dir`.")
+            self.decoded_videos = None
+        if self.episode_buffer is not None:
+            self.episode_buffer = self.create_episode_buffer()
+
     @classmethod
     def create(
         cls,
@@ -1012,10 +1691,17 @@ class LeRobotDataset(torch.utils.data.Dataset):
         tolerance_s: float = 1e-4,
         image_writer_processes: int = 0,
         image_writer_threads: int = 0,
+        image_writer_queue_size: int = 0,
         video_backend: str | None = None,
         batch_encoding_size: int = 1,
+        streaming_encoding: bool = False,
+        async_finalization: bool = False,
+        batch_encoding_workers: int = 1,
+        video_encoding: VideoEncodingProfile | None = None,
+        image_writer_drop_when_full: bool = False,
     ) -> "LeRobotDataset":
-        """Create a LeRobot Dataset from scratch in order to record data."""
+        """Create a LeRobot Dataset from scratch in order to record data. See `VideoEncodingProfile` to pick
+        the encoding parameters of the videos from the way they will be read in training."""
         obj = cls.__new__(cls)
         obj.meta = LeRobotDatasetMetadata.create(
             repo_id=repo_id,
@@ -1024,28 +1710,51 @@ class LeRobotDataset(torch.utils.data.Dataset):
             features=features,
             root=root,
             use_videos=use_videos,
+            video_encoding=video_encoding,
         )
         obj.repo_id = obj.meta.repo_id
         obj.root = obj.meta.root
         obj.revision = None
         obj.tolerance_s = tolerance_s
         obj.image_writer = None
+        obj.finalizer = None
         obj.batch_encoding_size = batch_encoding_size
         obj.episodes_since_last_encoding = 0
+        obj.streaming_encoding = streaming_encoding
+        obj.batch_encoding_workers = batch_encoding_workers
+        obj.video_encoders = {}
 
         if image_writer_processes or image_writer_threads:
-            obj.start_image_writer(image_writer_processes, image_writer_threads)
+            obj.start_image_writer(
+                image_writer_processes,
+                image_writer_threads,
+                image_writer_queue_size,
+                drop_when_full=image_writer_drop_when_full,
+            )
+        if async_finalization:
+            obj.start_episode_finalizer()
 
         # TODO(aliberts, rcadene, alexander-soare): Merge this with OnlineBuffer/DataBuffer
         obj.episode_buffer = obj.create_episode_buffer()
 
         obj.episodes = None
-        obj.hf_dataset = obj.create_hf_dataset()
         obj.image_transforms = None
         obj.delta_timestamps = None
         obj.delta_indices = None
         obj.episode_data_index = None
+        obj._columns = {}
+        obj._column_keys = None
+        obj._row_dataset = None
+        obj._video_frame_indices = None
+        obj._pending_episode_tables = []
+        obj._pending_tables_lock = threading.Lock()
+        obj.hf_dataset = obj.create_hf_dataset()
         obj.video_backend = video_backend if video_backend is not None else get_safe_default_codec()
+        obj.decoder_cache = VideoDecoderCache()
+        obj.decoded_videos = None
+        obj.return_uint8 = False
+        obj.columns = None
+        obj.frame_cache = None
         return obj
 
 
@@ -1054,6 +1763,11 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
 
     The underlying `LeRobotDataset`s are effectively concatenated, and this class adopts much of the API
     structure of `LeRobotDataset`.
+
+    Features which are not common to all the datasets are disabled, and are not loaded by the underlying
+    datasets. With `lazy=True`, only the info.json of each dataset is read by the constructor. Each `LeRobotDataset` is
+    opened on the first access to one of its frames (in each DataLoader worker), and their metadata is only
+    loaded when `stats` is first accessed.
     """
 
     def __init__(
@@ -1066,53 +1780,108 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
         tolerances_s: dict | None = None,
         download_videos: bool = True,
         video_backend: str | None = None,
+        lazy: bool = False,
     ):
         super().__init__()
         self.repo_ids = repo_ids
         self.root = Path(root) if root else HF_LEROBOT_HOME
+        self.episodes = episodes
         self.tolerances_s = tolerances_s if tolerances_s else dict.fromkeys(repo_ids, 0.0001)
-        # Construct the underlying datasets passing everything but `transform` and `delta_timestamps` which
-        # are handled by this class.
-        self._datasets = [
-            LeRobotDataset(
-                repo_id,
-                root=self.root / repo_id,
-                episodes=episodes[repo_id] if episodes else None,
-                image_transforms=image_transforms,
-                delta_timestamps=delta_timestamps,
-                tolerance_s=self.tolerances_s[repo_id],
-                download_videos=download_videos,
-                video_backend=video_backend,
-            )
-            for repo_id in repo_ids
-        ]
+        self.download_videos = download_videos
+        self.video_backend = video_backend
+        self.lazy = lazy
+        self.image_transforms = image_transforms
+        self.delta_timestamps = delta_timestamps
+
+        self._datasets: list[LeRobotDataset | None] = [None] * len(repo_ids)
+        self._metas: list[LeRobotDatasetMetadata | None] = [None] * len(repo_ids)
+        self._stats = None
+        self._infos = [self._load_info(i) for i in range(len(repo_ids))]
 
         # Disable any data keys that are not common across all of the datasets. Note: we may relax this
         # restriction in future iterations of this class. For now, this is necessary at least for being able
         # to use PyTorch's default DataLoader collate function.
         self.disabled_features = set()
-        intersection_features = set(self._datasets[0].features)
-        for ds in self._datasets:
-            intersection_features.intersection_update(ds.features)
+        intersection_features = set(self._infos[0]["features"])
+        for info in self._infos:
+            intersection_features.intersection_update(info["features"])
         if len(intersection_features) == 0:
             raise RuntimeError(
                 "Multiple datasets were provided but they had no keys common to all of them. "
                 "The multi-dataset functionality currently only keeps common keys."
             )
-        for repo_id, ds in zip(self.repo_ids, self._datasets, strict=True):
-            extra_keys = set(ds.features).difference(intersection_features)
+        for repo_id, info in zip(self.repo_ids, self._infos, strict=True):
+            extra_keys = set(info["features"]).difference(intersection_features)
             logging.warning(
                 f"keys {extra_keys} of {repo_id} were disabled as they are not contained in all the "
                 "other datasets."
             )
             self.disabled_features.update(extra_keys)
+        # Disabled features are not loaded by the underlying datasets
+        self._loaded_features = sorted(intersection_features) if self.disabled_features else None
+
+        if lazy:
+            lengths = [self._get_num_frames(i) for i in range(len(repo_ids))]
+            self._num_episodes = [
+                len(episodes[repo_id]) if episodes else info["total_episodes"]
+                for info, repo_id in zip(self._infos, repo_ids, strict=True)
+            ]
+        else:
+            for dataset_idx in range(len(repo_ids)):
+                self._get_dataset(dataset_idx)
+            lengths = [ds.num_frames for ds in self._datasets]
+            self._num_episodes = [ds.num_episodes for ds in self._datasets]
 
-        self.image_transforms = image_transforms
-        self.delta_timestamps = delta_timestamps
-        # TODO(rcadene, aliberts): We should not perform this aggregation for datasets
-        # with multiple robots of different ranges. Instead we should have one normalization
-        # per robot.
-        self.stats = aggregate_stats([dataset.meta.stats for dataset in self._datasets])
+        # Cumulative number of frames, used to find the dataset of an index by bisection
+        self.cumulative_sizes = np.cumsum(lengths).tolist()
+
+    def _load_info(self, dataset_idx: int) -> dict:
+        try:
+            return load_info(self.root / self.repo_ids[dataset_idx])
+        except FileNotFoundError:
+            # Not available locally, the metadata is downloaded from the hub
+            return self._get_meta(dataset_idx).info
+
+    def _get_num_frames(self, dataset_idx: int) -> int:
+        if not self.episodes:
+            return self._infos[dataset_idx]["total_frames"]
+        episodes = self._get_meta(dataset_idx).episodes
+        return sum(episodes[ep_idx]["length"] for ep_idx in self.episodes[self.repo_ids[dataset_idx]])
+
+    def _get_meta(self, dataset_idx: int) -> LeRobotDatasetMetadata:
+        if self._datasets[dataset_idx] is not None:
+            return self._datasets[dataset_idx].meta
+        if self._metas[dataset_idx] is None:
+            repo_id = self.repo_ids[dataset_idx]
+            self._metas[dataset_idx] = LeRobotDatasetMetadata(repo_id, root=self.root / repo_id)
+        return self._metas[dataset_idx]
+
+    def _get_dataset(self, dataset_idx: int) -> LeRobotDataset:
+        if self._datasets[dataset_idx] is None:
+            repo_id = self.repo_ids[dataset_idx]
+            # Construct the underlying dataset passing everything but `transform` and `delta_timestamps`
+            # which are handled by this class.
+            self._datasets[dataset_idx] = LeRobotDataset(
+                repo_id,
+                root=self.root / repo_id,
+                episodes=self.episodes[repo_id] if self.episodes else None,
+                image_transforms=self.image_transforms,
+                delta_timestamps=self.delta_timestamps,
+                tolerance_s=self.tolerances_s[repo_id],
+                download_videos=self.download_videos,
+                video_backend=self.video_backend,
+                columns=self._loaded_features,
+            )
+        return self._datasets[dataset_idx]
+
+    @property
+    def stats(self) -> dict[str, dict[str, np.ndarray]]:
+        if self._stats is None:
+            # TODO(rcadene, aliberts): We should not perform this aggregation for datasets
+            # with multiple robots of different ranges. Instead we should have one normalization
+            # per robot.
+            self._stats = aggregate_stats([self._get_meta(i).stats for i in range(len(self.repo_ids))])
+        return self._stats
 
     @property
     def repo_id_to_index(self):
@@ -1133,7 +1902,7 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
 
         NOTE: Fow now, this relies on a check in __init__ to make sure all sub-datasets have the same info.
         """
-        return self._datasets[0].meta.info["fps"]
+        return self._infos[0]["fps"]
 
     @property
     def video(self) -> bool:
@@ -1143,13 +1912,14 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
 
         NOTE: Fow now, this relies on a check in __init__ to make sure all sub-datasets have the same info.
         """
-        return self._datasets[0].meta.info.get("video", False)
+        return self._infos[0].get("video", False)
 
     @property
     def features(self) -> datasets.Features:
         features = {}
-        for dataset in self._datasets:
-            features.update({k: v for k, v in dataset.hf_features.items() if k not in self.disabled_features})
+        for info in self._infos:
+            hf_features = get_hf_features_from_features(info["features"])
+            features.update({k: v for k, v in hf_features.items() if k not in self.disabled_features})
         return features
 
     @property
@@ -1178,12 +1948,12 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
     @property
     def num_frames(self) -> int:
         """Number of samples/frames."""
-        return sum(d.num_frames for d in self._datasets)
+        return self.cumulative_sizes[-1]
 
     @property
     def num_episodes(self) -> int:
         """Number of episodes."""
-        return sum(d.num_episodes for d in self._datasets)
+        return sum(self._num_episodes)
 
     @property
     def tolerance_s(self) -> float:
@@ -1201,21 +1971,10 @@ class MultiLeRobotDataset(torch.utils.data.Dataset):
         if idx >= len(self):
             raise IndexError(f"Index {idx} out of bounds.")
         # Determine which dataset to get an item from based on the index.
-        start_idx = 0
-        dataset_idx = 0
-        for dataset in self._datasets:
-            if idx >= start_idx + dataset.num_frames:
-                start_idx += dataset.num_frames
-                dataset_idx += 1
-                continue
-            break
-        else:
-            raise AssertionError("We expect the loop to break out as long as the index is within bounds.")
-        item = self._datasets[dataset_idx][idx - start_idx]
+        dataset_idx = bisect.bisect_right(self.cumulative_sizes, idx)
+        start_idx = self.cumulative_sizes[dataset_idx - 1] if dataset_idx > 0 else 0
+        item = self._get_dataset(dataset_idx)[idx - start_idx]
         item["dataset_index"] = torch.tensor(dataset_idx)
-        for data_key in self.disabled_features:
-            if data_key in item:
-                del item[data_key]
 
         return item
 
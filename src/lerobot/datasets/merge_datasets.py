@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Merges local datasets into a new one, whose episodes are those of the first dataset, followed by those of the
+second one, and so on.
+
+The `index`, `episode_index` and `task_index` columns of the parquet files are rewritten with Arrow, tasks are
+merged (a task shared by several datasets keeps a single index), and the stats of the episodes are carried
+over (with the stats of the rewritten columns recomputed) to be aggregated with `aggregate_stats`. Videos
+aren't re-encoded or copied: they are hardlinked when the output is on the same file system, or else copied
+with `os.copy_file_range`, which clones them on file systems supporting it (e.g. Btrfs or XFS). Each input
+dataset is processed by its own worker.
+
+The datasets must have the same fps and features, and the per-episode layout (see `compact_dataset`, which can
+be run on the merged dataset).
+
+Usage:
+```bash
+python -m lerobot.datasets.merge_datasets \
+    --repo-ids lerobot/koch_pick lerobot/koch_place \
+    --roots ~/datasets/koch_pick ~/datasets/koch_place \
+    --output-repo-id lerobot/koch_pick_place \
+    --output-root ~/datasets/koch_pick_place
+```
+"""
+
+import argparse
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from lerobot.datasets.compute_stats import compute_episode_stats
+from lerobot.datasets.lerobot_dataset import CODEBASE_VERSION, LeRobotDatasetMetadata
+from lerobot.datasets.utils import (
+    EPISODES_PATH,
+    EPISODES_STATS_PATH,
+    TASKS_PATH,
+    serialize_dict,
+    write_info,
+    write_jsonlines,
+)
+from lerobot.utils.utils import init_logging
+
+# Columns whose values depend on the position of the episodes and tasks in the dataset
+INDEX_COLUMNS = ["index", "episode_index", "task_index"]
+
+
+def link_or_copy_file(src: Path, dst: Path) -> None:
+    """Hardlinks `src` to `dst`, or copies it when they are on different file systems."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            # Copies within the kernel, which clones the file on file systems supporting reflinks
+            while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30) > 0:
+                pass
+        except (AttributeError, OSError):
+            # Not supported by the platform or the file systems, the copy continues from where it stopped
+            shutil.copyfileobj(fsrc, fdst)
+
+
+def _comparable_features(features: dict) -> dict:
+    """Features without the info of the videos, which depends on how they were encoded."""
+    return {key: {k: v for k, v in ft.items() if k != "info"} for key, ft in features.items()}
+
+
+def _check_compatibility(metas: list[LeRobotDatasetMetadata]) -> None:
+    first = metas[0]
+    for meta in metas:
+        if meta._version != first._version or meta.info["codebase_version"] != CODEBASE_VERSION:
+            raise ValueError(
+                f"Only datasets of version {CODEBASE_VERSION} can be merged, but {meta.repo_id} is of version "
+                f"{meta.info['codebase_version']}."
+            )
+        if meta.multi_episode_files:
+            raise NotImplementedError(
+                f"{meta.repo_id} has the multi-episode layout, only datasets with one file per episode can be "
+                "merged."
+            )
+        if meta.fps != first.fps:
+            raise ValueError(f"{meta.repo_id} has {meta.fps} fps, but {first.repo_id} has {first.fps} fps.")
+        if _comparable_features(meta.features) != _comparable_features(first.features):
+            raise ValueError(f"The features of {meta.repo_id} differ from those of {first.repo_id}.")
+        if meta.robot_type != first.robot_type:
+            logging.warning(
+                f"{meta.repo_id} was recorded with {meta.robot_type}, and {first.repo_id} with "
+                f"{first.robot_type}. The robot type of the merged dataset is {first.robot_type}."
+            )
+
+
+def _merge_tasks(metas: list[LeRobotDatasetMetadata]) -> tuple[dict[int, str], list[np.ndarray]]:
+    """Returns the tasks of the merged dataset, and for each dataset, the new index of each of its tasks."""
+    task_to_task_index = {}
+    task_mappings = []
+    for meta in metas:
+        mapping = np.zeros(max(meta.tasks, default=-1) + 1, dtype=np.int64)
+        for task_index, task in meta.tasks.items():
+            mapping[task_index] = task_to_task_index.setdefault(task, len(task_to_task_index))
+        task_mappings.append(mapping)
+    return {task_index: task for task, task_index in task_to_task_index.items()}, task_mappings
+
+
+def _merge_dataset(
+    meta: LeRobotDatasetMetadata,
+    output_meta: LeRobotDatasetMetadata,
+    task_mapping: np.ndarray,
+    episode_offset: int,
+    frame_offset: int,
+) -> tuple[list[dict], list[dict]]:
+    """Writes the episodes of `meta` in the merged dataset, starting at `episode_offset` and `frame_offset`.
+    Returns their episode dicts and stats."""
+    episodes, episodes_stats = [], []
+    index_features = {key: meta.features[key] for key in INDEX_COLUMNS}
+    for i, ep_idx in enumerate(sorted(meta.episodes)):
+        new_ep_idx = episode_offset + i
+        table = pq.read_table(meta.root / meta.get_data_file_path(ep_idx))
+        num_frames = len(table)
+        new_columns = {
+            "index": np.arange(frame_offset, frame_offset + num_frames),
+            "episode_index": np.full(num_frames, new_ep_idx),
+            "task_index": task_mapping[table["task_index"].to_numpy()],
+        }
+        for key, values in new_columns.items():
+            field_idx = table.schema.get_field_index(key)
+            field = table.schema.field(field_idx)
+            table = table.set_column(field_idx, field, pa.array(values, type=field.type))
+        output_path = output_meta.root / output_meta.get_data_file_path(new_ep_idx)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, output_path)
+
+        for vid_key in meta.video_keys:
+            link_or_copy_file(
+                meta.root / meta.get_video_file_path(ep_idx, vid_key),
+                output_meta.root / output_meta.get_video_file_path(new_ep_idx, vid_key),
+            )
+
+        episode = deepcopy(meta.episodes[ep_idx])
+        episode["episode_index"] = new_ep_idx
+        episodes.append(episode)
+        ep_stats = dict(meta.episodes_stats[ep_idx])
+        ep_stats.update(compute_episode_stats(new_columns, index_features))
+        episodes_stats.append({"episode_index": new_ep_idx, "stats": serialize_dict(ep_stats)})
+        frame_offset += num_frames
+
+    return episodes, episodes_stats
+
+
+def merge_datasets(
+    repo_ids: list[str],
+    output_repo_id: str,
+    roots: list[str | Path] | None = None,
+    output_root: str | Path | None = None,
+    num_workers: int = 4,
+) -> LeRobotDatasetMetadata:
+    """Merges the local datasets `repo_ids` into `output_repo_id`, see the module docstring.
+
+    Returns the metadata of the merged dataset.
+    """
+    if len(repo_ids) < 2:
+        raise ValueError("At least two datasets are needed to merge them.")
+    if roots is not None and len(roots) != len(repo_ids):
+        raise ValueError(f"{len(roots)} roots were given for {len(repo_ids)} datasets.")
+    roots = roots if roots is not None else [None] * len(repo_ids)
+    metas = [LeRobotDatasetMetadata(repo_id, root) for repo_id, root in zip(repo_ids, roots, strict=True)]
+    _check_compatibility(metas)
+
+    first = metas[0]
+    output_meta = LeRobotDatasetMetadata.create(
+        output_repo_id,
+        first.fps,
+        first.features,
+        robot_type=first.robot_type,
+        root=output_root,
+        use_videos=len(first.video_keys) > 0,
+    )
+    # Keep the layout of the inputs and the info of their videos
+    for key in ["chunks_size", "data_path", "video_path", "features"]:
+        output_meta.info[key] = deepcopy(first.info[key])
+    # The videos are copied as is, their encoding profile is only kept when all the inputs share it
+    profiles = [meta.info.get("video_encoding") for meta in metas]
+    if profiles[0] is not None and all(profile == profiles[0] for profile in profiles):
+        output_meta.info["video_encoding"] = deepcopy(profiles[0])
+
+    tasks, task_mappings = _merge_tasks(metas)
+    episode_offsets = np.cumsum([0] + [meta.total_episodes for meta in metas])
+    frame_offsets = np.cumsum([0] + [meta.total_frames for meta in metas])
+
+    logging.info(f"Merging {episode_offsets[-1]} episodes of {len(metas)} datasets into {output_meta.root}")
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(
+                _merge_dataset,
+                meta,
+                output_meta,
+                task_mappings[i],
+                int(episode_offsets[i]),
+                int(frame_offsets[i]),
+            )
+            for i, meta in enumerate(metas)
+        ]
+        results = [future.result() for future in futures]
+
+    write_jsonlines(
+        [{"task_index": idx, "task": task} for idx, task in tasks.items()], output_meta.root / TASKS_PATH
+    )
+    write_jsonlines([ep for episodes, _ in results for ep in episodes], output_meta.root / EPISODES_PATH)
+    write_jsonlines([ep for _, stats in results for ep in stats], output_meta.root / EPISODES_STATS_PATH)
+
+    num_episodes = int(episode_offsets[-1])
+    output_meta.info.update(
+        {
+            "total_episodes": num_episodes,
+            "total_frames": int(frame_offsets[-1]),
+            "total_tasks": len(tasks),
+            "total_videos": num_episodes * len(first.video_keys),
+            "total_chunks": (num_episodes - 1) // output_meta.chunks_size + 1,
+            "splits": {"train": f"0:{num_episodes}"},
+        }
+    )
+    # The stats of the merged dataset are aggregated from those of its episodes when it is loaded
+    write_info(output_meta.info, output_meta.root)
+    return LeRobotDatasetMetadata(output_repo_id, output_meta.root)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--repo-ids",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Repository identifiers of the datasets to merge, in the order of their episodes in the merged "
+        "dataset (e.g. `lerobot/koch_pick lerobot/koch_place`).",
+    )
+    parser.add_argument(
+        "--roots",
+        type=Path,
+        nargs="+",
+        default=None,
+        help="Root directories of the datasets stored locally, one per repository identifier. By default, the "
+        "datasets are loaded from the hugging face cache folder.",
+    )
+    parser.add_argument(
+        "--output-repo-id",
+        type=str,
+        required=True,
+        help="Repository identifier of the merged dataset.",
+    )
+    parser.add_argument(
+        "--output-root",
+        type=Path,
+        default=None,
+        help="Root directory of the merged dataset, which must not exist. By default, it is created in the "
+        "hugging face cache folder.",
+    )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=4,
+        help="Number of datasets processed in parallel.",
+    )
+
+    args = parser.parse_args()
+    init_logging()
+    merge_datasets(
+        args.repo_ids,
+        args.output_repo_id,
+        roots=args.roots,
+        output_root=args.output_root,
+        num_workers=args.num_workers,
+    )
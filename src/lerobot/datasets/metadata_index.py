@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Binary index of the jsonl metadata of a dataset, so that `LeRobotDatasetMetadata` doesn't have to parse
+`tasks.jsonl`, `episodes.jsonl` and `episodes_stats.jsonl` line by line every time a dataset is opened.
+
+The index is written in a subdirectory of `meta/index/` named after a hash of the size and modification time of
+the jsonl files it was built from. Appending to or rewriting any of these files changes the hash, so a stale
+index is never read: the metadata is parsed from the jsonl files again and a new index is written. Writing to
+a temporary directory renamed at the end makes concurrent writers (e.g. DataLoader workers) safe.
+
+An index directory looks like this:
+.
+├── manifest.json          # tasks and names of the stats
+├── episode_index.npy      # (num_episodes,)
+├── length.npy             # (num_episodes,)
+├── offset.npy             # (num_episodes,) index of the first frame of each episode
+├── task_index.npy         # task indices of all the episodes, concatenated
+├── task_offset.npy        # (num_episodes + 1,) range of each episode in task_index.npy
+├── episode_field_000.npy  # (num_episodes,) one file per extra numeric field of the episodes (e.g. offsets)
+├── stats.npz              # stats aggregated over all the episodes
+└── episodes_stats_000.npy # (num_episodes, *shape) one file per stat of each feature
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+from collections.abc import Iterator, MutableMapping
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+
+from lerobot.datasets.utils import (
+    EPISODES_PATH,
+    EPISODES_STATS_PATH,
+    TASKS_PATH,
+    flatten_dict,
+    load_json,
+    unflatten_dict,
+    write_json,
+)
+
+METADATA_INDEX_DIR = "meta/index"
+METADATA_INDEX_MANIFEST = "manifest.json"
+METADATA_INDEX_SOURCES = [TASKS_PATH, EPISODES_PATH, EPISODES_STATS_PATH]
+EPISODE_KEYS = {"episode_index", "tasks", "length"}
+
+
+class IndexedEpisodesStats(MutableMapping):
+    """Mapping from episode index to episode stats, read from the memory-mapped arrays of the index only when
+    an episode is accessed. Stats set after loading (e.g. by `save_episode`) are kept in memory.
+    """
+
+    def __init__(self, episode_indices: list[int], stats_keys: list[str], stats_arrays: list[np.ndarray]):
+        self._rows = {ep_idx: row for row, ep_idx in enumerate(episode_indices)}
+        self._stats_keys = stats_keys
+        self._stats_arrays = stats_arrays
+        self._stats = {}
+
+    def __getitem__(self, ep_idx: int) -> dict[str, dict[str, np.ndarray]]:
+        if ep_idx not in self._stats:
+            row = self._rows[ep_idx]
+            flat_stats = {
+                key: array[row] for key, array in zip(self._stats_keys, self._stats_arrays, strict=True)
+            }
+            self._stats[ep_idx] = unflatten_dict(flat_stats)
+        return self._stats[ep_idx]
+
+    def __setitem__(self, ep_idx: int, stats: dict[str, dict[str, np.ndarray]]) -> None:
+        self._rows.setdefault(ep_idx, None)
+        self._stats[ep_idx] = stats
+
+    def __delitem__(self, ep_idx: int) -> None:
+        del self._rows[ep_idx]
+        self._stats.pop(ep_idx, None)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+def get_metadata_index_dir(local_dir: Path) -> Path | None:
+    """Returns the directory of the index matching the current jsonl files, or None if one of them is missing."""
+    signature = []
+    for path in METADATA_INDEX_SOURCES:
+        try:
+            stat = (local_dir / path).stat()
+        except FileNotFoundError:
+            return None
+        signature.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    digest = hashlib.sha1("\n".join(signature).encode()).hexdigest()[:16]
+    return local_dir / METADATA_INDEX_DIR / digest
+
+
+def load_metadata_index(local_dir: Path) -> tuple[dict, dict, IndexedEpisodesStats, dict] | None:
+    """Loads the tasks, episodes, episodes stats and aggregated stats from the index of `local_dir`.
+
+    Returns None if there is no index matching the current jsonl files. Per-episode arrays are memory-mapped.
+    """
+    index_dir = get_metadata_index_dir(local_dir)
+    if index_dir is None or not (index_dir / METADATA_INDEX_MANIFEST).is_file():
+        return None
+
+    manifest = load_json(index_dir / METADATA_INDEX_MANIFEST)
+    tasks = dict(manifest["tasks"])
+
+    episode_index = np.load(index_dir / "episode_index.npy", mmap_mode="r")
+    length = np.load(index_dir / "length.npy", mmap_mode="r")
+    task_index = np.load(index_dir / "task_index.npy", mmap_mode="r")
+    task_offset = np.load(index_dir / "task_offset.npy", mmap_mode="r")
+    episode_fields = [
+        np.load(index_dir / f"episode_field_{j:03d}.npy").tolist()
+        for j in range(len(manifest.get("episode_fields", [])))
+    ]
+    episodes = {}
+    for i, ep_idx in enumerate(episode_index.tolist()):
+        episodes[ep_idx] = {
+            "episode_index": ep_idx,
+            "tasks": [tasks[t] for t in task_index[task_offset[i] : task_offset[i + 1]].tolist()],
+            "length": int(length[i]),
+        }
+        if episode_fields:
+            extra = {
+                key: values[i] for key, values in zip(manifest["episode_fields"], episode_fields, strict=True)
+            }
+            episodes[ep_idx].update(unflatten_dict(extra))
+
+    stats_arrays = [
+        np.load(index_dir / f"episodes_stats_{j:03d}.npy", mmap_mode="r").view(np.ndarray)
+        for j in range(len(manifest["stats_keys"]))
+    ]
+    episodes_stats = IndexedEpisodesStats(episode_index.tolist(), manifest["stats_keys"], stats_arrays)
+
+    with np.load(index_dir / "stats.npz") as stats:
+        stats = unflatten_dict({key: stats[key] for key in stats.files})
+
+    return tasks, episodes, episodes_stats, stats
+
+
+def write_metadata_index(
+    local_dir: Path, tasks: dict, episodes: dict, episodes_stats: dict, stats: dict
+) -> Path | None:
+    """Writes the index of the metadata parsed from the jsonl files of `local_dir`.
+
+    Nothing is written if the metadata can't be represented by the index (e.g. episodes with non-numeric extra
+    fields or stats of varying shapes), in which case the jsonl files keep being parsed. Returns the index
+    directory.
+    """
+    index_dir = get_metadata_index_dir(local_dir)
+    if index_dir is None or index_dir.is_dir():
+        return index_dir
+
+    task_to_task_index = {task: task_index for task_index, task in tasks.items()}
+    if list(episodes) != list(episodes_stats):
+        return None
+    if any(
+        not EPISODE_KEYS <= set(ep) or not set(ep["tasks"]) <= task_to_task_index.keys()
+        for ep in episodes.values()
+    ):
+        return None
+
+    flat_fields = [
+        flatten_dict({key: val for key, val in ep.items() if key not in EPISODE_KEYS})
+        for ep in episodes.values()
+    ]
+    field_keys = list(flat_fields[0]) if flat_fields else []
+    if any(list(fields) != field_keys for fields in flat_fields) or any(
+        isinstance(val, bool) or not isinstance(val, int | float)
+        for fields in flat_fields
+        for val in fields.values()
+    ):
+        return None
+
+    flat_stats = [flatten_dict(ep_stats) for ep_stats in episodes_stats.values()]
+    stats_keys = list(flat_stats[0]) if flat_stats else []
+    if any(list(ep_stats) != stats_keys for ep_stats in flat_stats):
+        return None
+    try:
+        stats_arrays = [np.stack([ep_stats[key] for ep_stats in flat_stats]) for key in stats_keys]
+    except ValueError:
+        return None
+
+    lengths = np.array([ep["length"] for ep in episodes.values()], dtype=np.int64)
+    ep_task_indices = [[task_to_task_index[task] for task in ep["tasks"]] for ep in episodes.values()]
+
+    tmp_dir = index_dir.with_name(f"{index_dir.name}.tmp{os.getpid()}")
+    try:
+        tmp_dir.mkdir(parents=True)
+        np.save(tmp_dir / "episode_index.npy", np.array(list(episodes), dtype=np.int64))
+        np.save(tmp_dir / "length.npy", lengths)
+        np.save(tmp_dir / "offset.npy", np.cumsum(lengths) - lengths)
+        np.save(tmp_dir / "task_index.npy", np.array(list(chain(*ep_task_indices)), dtype=np.int64))
+        np.save(tmp_dir / "task_offset.npy", np.cumsum([0] + [len(t) for t in ep_task_indices]))
+        for j, key in enumerate(field_keys):
+            np.save(tmp_dir / f"episode_field_{j:03d}.npy", np.array([fields[key] for fields in flat_fields]))
+        for j, array in enumerate(stats_arrays):
+            np.save(tmp_dir / f"episodes_stats_{j:03d}.npy", array)
+        np.savez(tmp_dir / "stats.npz", **flatten_dict(stats))
+        write_json(
+            {"tasks": list(tasks.items()), "stats_keys": stats_keys, "episode_fields": field_keys},
+            tmp_dir / METADATA_INDEX_MANIFEST,
+        )
+        tmp_dir.rename(index_dir)
+    except OSError as e:
+        # Another process wrote the same index first, or the dataset directory is read-only
+        if not index_dir.is_dir():
+            logging.warning(f"Couldn't write the metadata index of {local_dir}: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return index_dir if index_dir.is_dir() else None
+
+    # Remove the indices of previous versions of the jsonl files
+    for path in index_dir.parent.iterdir():
+        if path != index_dir and ".tmp" not in path.name:
+            shutil.rmtree(path, ignore_errors=True)
+    return index_dir
@@ -26,6 +26,7 @@ class EpisodeAwareSampler:
         drop_n_first_frames: int = 0,
         drop_n_last_frames: int = 0,
         shuffle: bool = False,
+        block_size: int = 1,
     ):
         """Sampler that optionally incorporates episode boundary information.
 
@@ -36,21 +37,48 @@ class EpisodeAwareSampler:
             drop_n_first_frames: Number of frames to drop from the start of each episode.
             drop_n_last_frames: Number of frames to drop from the end of each episode.
             shuffle: Whether to shuffle the indices.
+            block_size: Number of contiguous frames of an episode yielded one after the other when shuffling.
+                Episodes are cut into blocks starting at a random offset at every epoch, and the order of the
+                blocks is shuffled. Samples of a batch are loaded by the same DataLoader worker, so frames of
+                a block are decoded from a video which is already open and close to the previous frame
+                (see `VideoDecoderCache` and `DecodedFrameCache`). 1 shuffles frames independently, larger
+                values trade randomness for decoding throughput. Use a divisor of the batch size so that
+                blocks are not split across batches.
         """
+        if block_size < 1:
+            raise ValueError(f"block_size must be a positive integer, but is {block_size}.")
+
         indices = []
+        episode_ranges = []
         for episode_idx, (start_index, end_index) in enumerate(
             zip(episode_data_index["from"], episode_data_index["to"], strict=True)
         ):
             if episode_indices_to_use is None or episode_idx in episode_indices_to_use:
-                indices.extend(
-                    range(start_index.item() + drop_n_first_frames, end_index.item() - drop_n_last_frames)
+                episode_range = range(
+                    start_index.item() + drop_n_first_frames, end_index.item() - drop_n_last_frames
                 )
+                indices.extend(episode_range)
+                if len(episode_range) > 0:
+                    episode_ranges.append((episode_range.start, episode_range.stop))
 
         self.indices = indices
+        self.episode_ranges = episode_ranges
         self.shuffle = shuffle
+        self.block_size = block_size
+
+    def _shuffled_blocks(self) -> list[tuple[int, int]]:
+        blocks = []
+        for start, end in self.episode_ranges:
+            offset = torch.randint(self.block_size, ()).item()
+            cuts = [start, *range(start + offset, end, self.block_size), end]
+            blocks.extend((a, b) for a, b in zip(cuts[:-1], cuts[1:], strict=True) if a < b)
+        return [blocks[i] for i in torch.randperm(len(blocks))]
 
     def __iter__(self) -> Iterator[int]:
-        if self.shuffle:
+        if self.shuffle and self.block_size > 1:
+            for start, end in self._shuffled_blocks():
+                yield from range(start, end)
+        elif self.shuffle:
             for i in torch.randperm(len(self.indices)):
                 yield self.indices[i]
         else:
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+from collections.abc import Callable, Iterator
+from itertools import chain
+from pathlib import Path
+
+import datasets
+import numpy as np
+import pyarrow.parquet as pq
+import torch
+import torch.distributed as dist
+import torch.utils
+
+from lerobot.constants import HF_LEROBOT_HOME
+from lerobot.datasets.lerobot_dataset import CODEBASE_VERSION, LeRobotDatasetMetadata
+from lerobot.datasets.utils import (
+    check_delta_timestamps,
+    get_delta_indices,
+    get_safe_version,
+    get_video_frame_indices,
+    hf_column_to_torch,
+    hf_transform_to_torch,
+    read_parquet_rows,
+)
+from lerobot.datasets.video_utils import (
+    VideoDecoderCache,
+    decode_video_frames,
+    decode_video_frames_at_indices,
+    get_safe_default_codec,
+)
+
+
+class SequentialVideoReader:
+    """Decodes the frames of a video in consecutive chunks, in order, and keeps them in memory until they are
+    released. Frames are returned as uint8, and indexed from `first_frame` (the first frame of the episode when
+    episodes share their videos).
+    """
+
+    def __init__(
+        self,
+        video_path: Path,
+        fps: int,
+        last_frame: int,
+        backend: str,
+        decoder_cache: VideoDecoderCache | None = None,
+        chunk_size: int = 32,
+        first_frame: int = 0,
+    ):
+        self.video_path = video_path
+        self.fps = fps
+        self.last_frame = last_frame
+        self.backend = backend
+        self.decoder_cache = decoder_cache
+        self.chunk_size = chunk_size
+        self.first_frame = first_frame
+        self.next_frame = 0
+        self.frames = {}
+
+    def get(self, frame_indices: list[int]) -> torch.Tensor:
+        while self.next_frame <= max(frame_indices):
+            chunk = list(range(self.next_frame, min(self.next_frame + self.chunk_size, self.last_frame + 1)))
+            frames = decode_video_frames_at_indices(
+                self.video_path,
+                [self.first_frame + i for i in chunk],
+                self.fps,
+                self.backend,
+                decoder_cache=self.decoder_cache,
+                return_uint8=True,
+            )
+            self.frames.update(zip(chunk, frames, strict=True))
+            self.next_frame = chunk[-1] + 1
+        return torch.stack([self.frames[i] for i in frame_indices])
+
+    def release(self, frame_idx: int) -> None:
+        """Drops the decoded frames before `frame_idx`."""
+        for i in [i for i in self.frames if i < frame_idx]:
+            del self.frames[i]
+
+
+class StreamingLeRobotDataset(torch.utils.data.IterableDataset):
+    """Iterates over the frames of a LeRobotDataset by reading its episodes sequentially, for datasets which
+    don't fit in the page cache and would make the random access of `LeRobotDataset` thrash the disk.
+
+    The parquet file of an episode is read at once, and each of its videos is decoded in order, in chunks of
+    `video_chunk_size` frames, keeping in memory only the frames which can still be queried. Items are the same
+    as those of `LeRobotDataset` (including `delta_timestamps` and the `{key}_is_pad` masks), but come out in a
+    different order:
+    - the order of the episodes is shuffled with `seed` and the epoch set with `set_epoch`,
+    - episodes are sharded across DataLoader workers and distributed ranks, so that each one reads different
+      episodes (shards may thus hold different numbers of frames),
+    - frames go through a shuffle buffer of `buffer_size` items, which approximates random sampling when it
+      spans several episodes.
+    With `shuffle=False`, the frames of each shard are yielded in order.
+    """
+
+    def __init__(
+        self,
+        repo_id: str,
+        root: str | Path | None = None,
+        episodes: list[int] | None = None,
+        image_transforms: Callable | None = None,
+        delta_timestamps: dict[list[float]] | None = None,
+        tolerance_s: float = 1e-4,
+        revision: str | None = None,
+        force_cache_sync: bool = False,
+        download_videos: bool = True,
+        video_backend: str | None = None,
+        return_uint8: bool = False,
+        shuffle: bool = True,
+        buffer_size: int = 1000,
+        seed: int = 0,
+        video_chunk_size: int = 32,
+    ):
+        super().__init__()
+        self.repo_id = repo_id
+        self.root = Path(root) if root else HF_LEROBOT_HOME / repo_id
+        self.image_transforms = image_transforms
+        self.delta_timestamps = delta_timestamps
+        self.tolerance_s = tolerance_s
+        self.revision = revision if revision else CODEBASE_VERSION
+        self.video_backend = video_backend if video_backend else get_safe_default_codec()
+        self.return_uint8 = return_uint8
+        self.shuffle = shuffle
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.video_chunk_size = video_chunk_size
+        self.epoch = 0
+        self.delta_indices = None
+        self.decoder_cache = VideoDecoderCache()
+
+        self.meta = LeRobotDatasetMetadata(
+            self.repo_id, self.root, self.revision, force_cache_sync=force_cache_sync
+        )
+        self.episodes = episodes if episodes is not None else list(range(self.meta.total_episodes))
+
+        if force_cache_sync or not all(
+            (self.root / fpath).is_file() for fpath in self.get_episodes_file_paths()
+        ):
+            self.revision = get_safe_version(self.repo_id, self.revision)
+            ignore_patterns = None if download_videos else "videos/"
+            self.meta.pull_from_repo(
+                allow_patterns=[str(fpath) for fpath in self.get_episodes_file_paths()],
+                ignore_patterns=ignore_patterns,
+            )
+
+        if self.delta_timestamps is not None:
+            check_delta_timestamps(self.delta_timestamps, self.fps, self.tolerance_s)
+            self.delta_indices = get_delta_indices(self.delta_timestamps, self.fps)
+
+    @property
+    def fps(self) -> int:
+        """Frames per second used during data collection."""
+        return self.meta.fps
+
+    @property
+    def num_frames(self) -> int:
+        """Number of frames in selected episodes."""
+        return sum(self.meta.episodes[ep_idx]["length"] for ep_idx in self.episodes)
+
+    @property
+    def num_episodes(self) -> int:
+        """Number of episodes selected."""
+        return len(self.episodes)
+
+    @property
+    def features(self) -> dict[str, dict]:
+        return self.meta.features
+
+    def get_episodes_file_paths(self) -> list[Path]:
+        fpaths = [self.meta.get_data_file_path(ep_idx) for ep_idx in self.episodes]
+        for vid_key in self.meta.video_keys:
+            fpaths += [self.meta.get_video_file_path(ep_idx, vid_key) for ep_idx in self.episodes]
+        return list(dict.fromkeys(fpaths))
+
+    def set_epoch(self, epoch: int) -> None:
+        """Sets the epoch used to shuffle the episodes and frames, before creating the DataLoader iterator."""
+        self.epoch = epoch
+
+    def _get_shard(self) -> tuple[int, int]:
+        """Returns the index of the shard read by this worker and rank, and the total number of shards."""
+        rank, world_size = 0, 1
+        if dist.is_available() and dist.is_initialized():
+            rank, world_size = dist.get_rank(), dist.get_world_size()
+        worker_info = torch.utils.data.get_worker_info()
+        worker_id, num_workers = (worker_info.id, worker_info.num_workers) if worker_info else (0, 1)
+        return rank * num_workers + worker_id, world_size * num_workers
+
+    def __iter__(self) -> Iterator[dict]:
+        episodes = list(self.episodes)
+        if self.shuffle:
+            # Same order in all the shards, so that they read disjoint sets of episodes
+            np.random.default_rng([self.seed, self.epoch]).shuffle(episodes)
+        shard_id, num_shards = self._get_shard()
+        if len(episodes) < num_shards:
+            logging.warning(f"Only {len(episodes)} episodes for {num_shards} shards, some shards are empty.")
+        items = chain.from_iterable(self._iter_episode(ep_idx) for ep_idx in episodes[shard_id::num_shards])
+        if not self.shuffle:
+            yield from items
+            return
+
+        rng = np.random.default_rng([self.seed, self.epoch, shard_id])
+        buffer = []
+        for item in items:
+            if len(buffer) < self.buffer_size:
+                buffer.append(item)
+                continue
+            i = rng.integers(len(buffer))
+            yield buffer[i]
+            buffer[i] = item
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def _load_episode(self, ep_idx: int) -> datasets.Dataset:
+        path = self.root / self.meta.get_data_file_path(ep_idx)
+        if self.meta.multi_episode_files:
+            # Files of the multi-episode layout also contain the other episodes of their chunk
+            table = read_parquet_rows(pq.ParquetFile(path), *self.meta.get_data_row_range(ep_idx))
+        else:
+            table = pq.read_table(path)
+        ep_dataset = datasets.Dataset(table)
+        ep_dataset.set_transform(hf_transform_to_torch)
+        return ep_dataset
+
+    def _get_query_indices(self, idx: int, ep_length: int) -> tuple[dict[str, np.ndarray]]:
+        """Same as `LeRobotDataset._get_query_indices`, with indices relative to the start of the episode."""
+        query_indices = {}
+        padding = {}
+        for key, delta_idx in self.delta_indices.items():
+            indices = idx + np.asarray(delta_idx, dtype=np.int64)
+            padding[f"{key}_is_pad"] = torch.from_numpy((indices < 0) | (indices >= ep_length))
+            query_indices[key] = np.clip(indices, 0, ep_length - 1)
+        return query_indices, padding
+
+    def _iter_episode(self, ep_idx: int) -> Iterator[dict]:
+        ep_dataset = self._load_episode(ep_idx)
+        ep_length = len(ep_dataset)
+        column_keys = [
+            key
+            for key in ep_dataset.column_names
+            if key not in self.features or self.features[key]["dtype"] not in ["image", "string"]
+        ]
+        row_keys = [key for key in ep_dataset.column_names if key not in column_keys]
+        columns = {key: hf_column_to_torch(ep_dataset, key) for key in column_keys}
+
+        # Frames of the videos are decoded in order when all timestamps are within tolerance of a frame,
+        # otherwise each frame is looked up by timestamp
+        timestamps = columns["timestamp"].numpy()
+        frame_indices = get_video_frame_indices(timestamps, self.fps, self.tolerance_s)
+        video_readers = {}
+        if frame_indices is not None:
+            # Smallest frame index of each row and the following ones, before which frames can be released
+            min_next_frame = np.minimum.accumulate(frame_indices[::-1])[::-1]
+            video_deltas = [
+                min(self.delta_indices[key]) if self.delta_indices and key in self.delta_indices else 0
+                for key in self.meta.video_keys
+            ]
+            for vid_key in self.meta.video_keys:
+                video_readers[vid_key] = SequentialVideoReader(
+                    self.root / self.meta.get_video_file_path(ep_idx, vid_key),
+                    self.fps,
+                    int(frame_indices.max()),
+                    self.video_backend,
+                    decoder_cache=self.decoder_cache,
+                    chunk_size=self.video_chunk_size,
+                    first_frame=round(self.meta.get_video_timestamp_offset(ep_idx, vid_key) * self.fps),
+                )
+
+        for idx in range(ep_length):
+            item = ep_dataset.select_columns(row_keys)[idx] if row_keys else {}
+            for key in column_keys:
+                item[key] = columns[key][idx]
+
+            query_indices = {}
+            if self.delta_indices is not None:
+                query_indices, padding = self._get_query_indices(idx, ep_length)
+                for key, q_idx in query_indices.items():
+                    if key in self.meta.video_keys:
+                        continue
+                    if key in columns:
+                        item[key] = columns[key][torch.from_numpy(q_idx)]
+                    else:
+                        item[key] = torch.stack(ep_dataset.select(q_idx)[key])
+                item = {**item, **padding}
+
+            video_frames = {}
+            for vid_key in self.meta.video_keys:
+                q_idx = query_indices.get(vid_key, np.array([idx]))
+                if frame_indices is not None:
+                    frames = video_readers[vid_key].get(frame_indices[q_idx].tolist())
+                    if not self.return_uint8:
+                        frames = frames.type(torch.float32) / 255
+                else:
+                    frames = decode_video_frames(
+                        self.root / self.meta.get_video_file_path(ep_idx, vid_key),
+                        (self.meta.get_video_timestamp_offset(ep_idx, vid_key) + timestamps[q_idx]).tolist(),
+                        self.tolerance_s,
+                        self.video_backend,
+                        decoder_cache=self.decoder_cache,
+                        fps=self.fps,
+                        return_uint8=self.return_uint8,
+                    )
+                video_frames[vid_key] = frames.squeeze(0)
+            item = {**video_frames, **item}
+
+            if video_readers:
+                # Frames queried by the next rows are at or after the first frame of the earliest of them
+                next_idx = int(np.clip(idx + 1 + min(video_deltas), 0, ep_length - 1))
+                for reader in video_readers.values():
+                    reader.release(int(min_next_frame[next_idx]))
+
+            if self.return_uint8:
+                for key in self.meta.image_keys:
+                    # Images are decoded to float in [0, 1] by `hf_transform_to_torch`, this conversion is exact
+                    item[key] = (item[key] * 255).round().type(torch.uint8)
+
+            if self.image_transforms is not None:
+                for cam in self.meta.camera_keys:
+                    item[cam] = self.image_transforms(item[cam])
+
+            # Add task as a string
+            task_idx = item["task_index"].item()
+            item["task"] = self.meta.tasks[task_idx]
+
+            yield item
+
+        self.decoder_cache.clear()
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({{\n"
+            f"    Repository ID: '{self.repo_id}',\n"
+            f"    Number of selected episodes: '{self.num_episodes}',\n"
+            f"    Number of selected samples: '{self.num_frames}',\n"
+            f"    Shuffle buffer size: '{self.buffer_size if self.shuffle else 0}',\n"
+            "})',\n"
+        )
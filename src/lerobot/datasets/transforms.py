@@ -179,6 +179,9 @@ class ImageTransformsConfig:
     # By default, transforms are applied in Torchvision's suggested order (shown below).
     # Set this to True to apply them in a random order.
     random_order: bool = False
+    # Set this to True to apply the transforms to whole batches on the training device in train.py rather than
+    # to each sample in the dataloader workers. Parameters are still sampled independently for each sample.
+    batched: bool = False
     tfs: dict[str, ImageTransformConfig] = field(
         default_factory=lambda: {
             "brightness": ImageTransformConfig(
@@ -250,3 +253,103 @@ class ImageTransforms(Transform):
 
     def forward(self, *inputs: Any) -> Any:
         return self.tf(*inputs)
+
+
+def _blend(image1: torch.Tensor, image2: torch.Tensor, ratio: torch.Tensor) -> torch.Tensor:
+    """Same as the float path of torchvision's `_blend`, with a blending ratio per sample."""
+    return (image1 * ratio + image2 * (1.0 - ratio)).clamp(0, 1)
+
+
+def _grayscale(images: torch.Tensor) -> torch.Tensor:
+    return F.rgb_to_grayscale(images) if images.shape[-3] == 3 else images
+
+
+class BatchImageTransforms:
+    """Applies the transforms of an `ImageTransformsConfig` to a batch of images (B, ..., C, H, W).
+
+    This follows the same sampling scheme as `ImageTransforms` applied to each sample separately: every sample
+    gets its own random subset of transforms and its own transform parameters, while the frames of a sample
+    (e.g. several observation steps) share them. Brightness, contrast, saturation and sharpness jitters are
+    computed for the whole batch at once with per-sample factors. Other transforms are applied sample by sample.
+
+    uint8 images are converted to float in [0, 1] first, so that they can be augmented on the training device
+    when loaded with `LeRobotDataset(return_uint8=True)`.
+    """
+
+    def __init__(self, cfg: ImageTransformsConfig) -> None:
+        self._cfg = cfg
+
+        self.weights = []
+        self.transforms = {}
+        for tf_name, tf_cfg in cfg.tfs.items():
+            if tf_cfg.weight <= 0.0:
+                continue
+
+            self.transforms[tf_name] = make_transform_from_config(tf_cfg)
+            self.weights.append(tf_cfg.weight)
+
+        self.n_subset = min(len(self.transforms), cfg.max_num_transforms) if cfg.enable else 0
+
+    def __call__(self, images: torch.Tensor) -> torch.Tensor:
+        images = images.type(torch.float32) / 255 if images.dtype == torch.uint8 else images.clone()
+        if self.n_subset == 0:
+            return images
+
+        batch_size = images.shape[0]
+        p = torch.tensor(self.weights) / sum(self.weights)
+        selected = torch.multinomial(p.expand(batch_size, -1), self.n_subset)
+        if not self._cfg.random_order:
+            selected = selected.sort(dim=1).values
+
+        transforms = list(self.transforms.values())
+        for step in range(self.n_subset):
+            for tf_idx, tf in enumerate(transforms):
+                mask = (selected[:, step] == tf_idx).to(images.device)
+                if mask.any():
+                    images[mask] = self._apply(tf, images[mask])
+        return images
+
+    def _sample_factors(self, bounds: Sequence[float], images: torch.Tensor) -> torch.Tensor:
+        shape = (images.shape[0],) + (1,) * (images.ndim - 1)
+        return torch.empty(shape, device=images.device).uniform_(bounds[0], bounds[1])
+
+    def _apply(self, tf: Callable, images: torch.Tensor) -> torch.Tensor:
+        if isinstance(tf, v2.Identity):
+            return images
+
+        if isinstance(tf, SharpnessJitter):
+            factors = self._sample_factors(tf.sharpness, images)
+            return self.adjust_sharpness(images, factors)
+
+        if isinstance(tf, v2.ColorJitter):
+            jitters = {
+                name: bounds
+                for name in ["brightness", "contrast", "saturation", "hue"]
+                if (bounds := getattr(tf, name)) is not None
+            }
+            if len(jitters) == 1 and "hue" not in jitters:
+                [(name, bounds)] = jitters.items()
+                factors = self._sample_factors(bounds, images)
+                return getattr(self, f"adjust_{name}")(images, factors)
+
+        return torch.stack([tf(image) for image in images])
+
+    @staticmethod
+    def adjust_brightness(images: torch.Tensor, factors: torch.Tensor) -> torch.Tensor:
+        return (images * factors).clamp(0, 1)
+
+    @staticmethod
+    def adjust_contrast(images: torch.Tensor, factors: torch.Tensor) -> torch.Tensor:
+        mean = _grayscale(images).mean(dim=(-3, -2, -1), keepdim=True)
+        return _blend(images, mean, factors)
+
+    @staticmethod
+    def adjust_saturation(images: torch.Tensor, factors: torch.Tensor) -> torch.Tensor:
+        if images.shape[-3] == 1:
+            return images
+        return _blend(images, _grayscale(images), factors)
+
+    @staticmethod
+    def adjust_sharpness(images: torch.Tensor, factors: torch.Tensor) -> torch.Tensor:
+        # A sharpness factor of 0 gives the blurred image, borders excluded
+        return _blend(images, F.adjust_sharpness(images, 0.0), factors)
@@ -28,6 +28,8 @@ import datasets
 import jsonlines
 import numpy as np
 import packaging.version
+import pyarrow as pa
+import pyarrow.parquet as pq
 import torch
 from datasets.table import embed_table_storage
 from huggingface_hub import DatasetCard, DatasetCardData, HfApi
@@ -55,6 +57,10 @@ DEFAULT_VIDEO_PATH = "videos/chunk-{episode_chunk:03d}/{video_key}/episode_{epis
 DEFAULT_PARQUET_PATH = "data/chunk-{episode_chunk:03d}/episode_{episode_index:06d}.parquet"
 DEFAULT_IMAGE_PATH = "images/{image_key}/episode_{episode_index:06d}/frame_{frame_index:06d}.png"
 
+# Layout where all the episodes of a chunk share one parquet file and one video per camera (see compact_dataset.py)
+MULTI_EPISODE_VIDEO_PATH = "videos/chunk-{episode_chunk:03d}/{video_key}/episodes.mp4"
+MULTI_EPISODE_PARQUET_PATH = "data/chunk-{episode_chunk:03d}/episodes.parquet"
+
 DATASET_CARD_TEMPLATE = """
 ---
 # Metadata will go there
@@ -141,6 +147,22 @@ def embed_images(dataset: datasets.Dataset) -> datasets.Dataset:
     return dataset
 
 
+def read_parquet_rows(
+    parquet_file: pq.ParquetFile, start: int, end: int, columns: list[str] | None = None
+) -> pa.Table:
+    """Reads the rows `start:end` of a parquet file, loading only the row groups which hold them."""
+    row_groups = []
+    first_row = offset = 0
+    for i in range(parquet_file.num_row_groups):
+        num_rows = parquet_file.metadata.row_group(i).num_rows
+        if offset < end and offset + num_rows > start:
+            if not row_groups:
+                first_row = offset
+            row_groups.append(i)
+        offset += num_rows
+    return parquet_file.read_row_groups(row_groups, columns=columns).slice(start - first_row, end - start)
+
+
 def load_json(fpath: Path) -> Any:
     with open(fpath) as f:
         return json.load(f)
@@ -169,6 +191,27 @@ def append_jsonlines(data: dict, fpath: Path) -> None:
         writer.write(data)
 
 
+def truncate_jsonlines(fpath: Path, index_key: str, num_items: int) -> int:
+    """Keeps the lines of `fpath` whose `index_key` is lower than `num_items`, dropping incomplete lines.
+    Returns the number of lines removed."""
+    if not fpath.is_file():
+        return 0
+    lines = fpath.read_text().splitlines()
+    kept = []
+    for line in lines:
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if item[index_key] < num_items:
+            kept.append(line)
+    if len(kept) != len(lines):
+        tmp_path = fpath.with_name(f"{fpath.name}.tmp")
+        tmp_path.write_text("".join(f"{line}\n" for line in kept))
+        tmp_path.replace(fpath)
+    return len(lines) - len(kept)
+
+
 def write_info(info: dict, local_dir: Path):
     write_json(info, local_dir / INFO_PATH)
 
@@ -272,6 +315,22 @@ def hf_transform_to_torch(items_dict: dict[torch.Tensor | None]):
     return items_dict
 
 
+def hf_column_to_torch(hf_dataset: datasets.Dataset, key: str) -> torch.Tensor:
+    """Returns the whole `key` column of a Hugging Face dataset as a single tensor.
+
+    Values are cast the same way `hf_transform_to_torch` would cast a row (floats to the default float dtype,
+    integers to int64), so that slicing this column returns the exact same tensors as stacking rows selected
+    from the dataset. Image and string columns are not supported.
+    """
+    array = hf_dataset.with_format("numpy", columns=[key])[key]
+    column = torch.from_numpy(np.ascontiguousarray(array))
+    if column.is_floating_point():
+        column = column.to(torch.get_default_dtype())
+    elif column.dtype != torch.bool:
+        column = column.to(torch.int64)
+    return column
+
+
 def is_valid_version(version: str) -> bool:
     try:
         packaging.version.parse(version)
@@ -581,6 +640,26 @@ def check_timestamps_sync(
     return True
 
 
+def get_video_frame_indices(timestamps: np.ndarray, fps: int, tolerance_s: float) -> np.ndarray | None:
+    """
+    Computes the index of the video frame matching each timestamp, i.e. `round(timestamp * fps)`, as videos
+    are encoded with one frame every 1/fps seconds starting at 0 for each episode.
+
+    Args:
+        timestamps (np.ndarray): Array of timestamps in seconds.
+        fps (int): Frames per second of the videos.
+        tolerance_s (float): Allowed deviation between a timestamp and the timestamp of its frame.
+
+    Returns:
+        np.ndarray | None: The frame indices, or None if a timestamp is further than `tolerance_s` from the
+            timestamp of its frame, in which case frames have to be looked up by timestamp.
+    """
+    frame_indices = np.round(timestamps * fps).astype(np.int64)
+    if not np.all(np.abs(timestamps - frame_indices / fps) < tolerance_s):
+        return None
+    return frame_indices
+
+
 def check_delta_timestamps(
     delta_timestamps: dict[str, list[float]], fps: int, tolerance_s: float, raise_value_error: bool = True
 ) -> bool:
@@ -871,7 +950,7 @@ def validate_episode_buffer(episode_buffer: dict, total_episodes: int, features:
     if episode_buffer["size"] == 0:
         raise ValueError("You must add one or several frames with `add_frame` before calling `add_episode`.")
 
-    buffer_keys = set(episode_buffer.keys()) - {"task", "size"}
+    buffer_keys = set(episode_buffer.keys()) - {"task", "size", "stats"}
     if not buffer_keys == set(features):
         raise ValueError(
             f"Features from `episode_buffer` don't match the ones in `features`."
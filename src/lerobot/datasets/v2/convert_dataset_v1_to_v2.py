@@ -97,6 +97,24 @@ python -m lerobot.datasets.v2.convert_dataset_v1_to_v2 \
     --tasks-col "language_instruction" \
     --local-dir data
 ```
+
+
+# Offline conversion
+Episodes are converted in parallel by '--num-workers' processes. With '--offline', a dataset already stored in
+'<local-dir>/v1.6/<repo-id>' (including its videos) is converted to '<local-dir>/v2.0/<repo-id>' without
+accessing the hub. Interrupting a conversion and running it again resumes it from the episodes which were not
+converted yet.
+
+Example:
+
+```bash
+python -m lerobot.datasets.v2.convert_dataset_v1_to_v2 \
+    --repo-id aliberts/koch_tutorial \
+    --single-task "Pick the Lego block and drop it in the box on the right." \
+    --local-dir data \
+    --num-workers 8 \
+    --offline
+```
 """
 
 import argparse
@@ -108,10 +126,13 @@ import math
 import shutil
 import subprocess
 import tempfile
+from functools import lru_cache
 from pathlib import Path
 
 import datasets
-import pyarrow.compute as pc
+import numpy as np
+import pandas as pd
+import pyarrow as pa
 import pyarrow.parquet as pq
 import torch
 from datasets import Dataset
@@ -119,6 +140,8 @@ from huggingface_hub import HfApi
 from huggingface_hub.errors import EntryNotFoundError, HfHubHTTPError
 from safetensors.torch import load_file
 
+from lerobot.datasets.job_runner import run_episode_jobs
+from lerobot.datasets.merge_datasets import link_or_copy_file
 from lerobot.datasets.utils import (
     DEFAULT_CHUNK_SIZE,
     DEFAULT_PARQUET_PATH,
@@ -132,6 +155,7 @@ from lerobot.datasets.utils import (
     flatten_dict,
     get_safe_version,
     load_json,
+    read_parquet_rows,
     unflatten_dict,
     write_json,
     write_jsonlines,
@@ -142,6 +166,7 @@ from lerobot.datasets.video_utils import (
     get_video_info,
 )
 from lerobot.robots import RobotConfig
+from lerobot.utils.utils import init_logging
 
 V16 = "v1.6"
 V20 = "v2.0"
@@ -150,6 +175,7 @@ GITATTRIBUTES_REF = "aliberts/gitattributes_reference"
 V1_VIDEO_FILE = "{video_key}_episode_{episode_index:06d}.mp4"
 V1_INFO_PATH = "meta_data/info.json"
 V1_STATS_PATH = "meta_data/stats.safetensors"
+V20_PROGRESS_PATH = ".convert_progress.jsonl"
 
 
 def parse_robot_config(robot_cfg: RobotConfig) -> tuple[str, dict]:
@@ -205,7 +231,7 @@ def convert_stats_to_json(v1_dir: Path, v2_dir: Path) -> None:
 def get_features_from_hf_dataset(
     dataset: Dataset, robot_config: RobotConfig | None = None
 ) -> dict[str, list]:
-    robot_config = parse_robot_config(robot_config)
+    robot_config = parse_robot_config(robot_config) if robot_config is not None else None
     features = {}
     for key, ft in dataset.features.items():
         if isinstance(ft, datasets.Value):
@@ -241,66 +267,108 @@ def get_features_from_hf_dataset(
     return features
 
 
-def add_task_index_by_episodes(dataset: Dataset, tasks_by_episodes: dict) -> tuple[Dataset, list[str]]:
-    df = dataset.to_pandas()
-    tasks = list(set(tasks_by_episodes.values()))
-    tasks_to_task_index = {task: task_idx for task_idx, task in enumerate(tasks)}
-    episodes_to_task_index = {ep_idx: tasks_to_task_index[task] for ep_idx, task in tasks_by_episodes.items()}
-    df["task_index"] = df["episode_index"].map(episodes_to_task_index).astype(int)
-
-    features = dataset.features
-    features["task_index"] = datasets.Value(dtype="int64")
-    dataset = Dataset.from_pandas(df, features=features, split="train")
-    return dataset, tasks
-
-
-def add_task_index_from_tasks_col(
-    dataset: Dataset, tasks_col: str
-) -> tuple[Dataset, dict[str, list[str]], list[str]]:
-    df = dataset.to_pandas()
-
+def clean_task(task: str) -> str:
     # HACK: This is to clean some of the instructions in our version of Open X datasets
     prefix_to_clean = "tf.Tensor(b'"
     suffix_to_clean = "', shape=(), dtype=string)"
-    df[tasks_col] = df[tasks_col].str.removeprefix(prefix_to_clean).str.removesuffix(suffix_to_clean)
+    return task.removeprefix(prefix_to_clean).removesuffix(suffix_to_clean)
+
 
-    # Create task_index col
+def get_tasks_from_tasks_col(
+    data_files: list[Path], tasks_col: str
+) -> tuple[list[str], dict[int, list[str]]]:
+    # Only the episode index and tasks columns are loaded
+    df = pd.concat(
+        [pq.read_table(path, columns=["episode_index", tasks_col]).to_pandas() for path in data_files]
+    )
+    df[tasks_col] = df[tasks_col].map(clean_task)
     tasks_by_episode = df.groupby("episode_index")[tasks_col].unique().apply(lambda x: x.tolist()).to_dict()
     tasks = df[tasks_col].unique().tolist()
-    tasks_to_task_index = {task: idx for idx, task in enumerate(tasks)}
-    df["task_index"] = df[tasks_col].map(tasks_to_task_index).astype(int)
-
-    # Build the dataset back from df
-    features = dataset.features
-    features["task_index"] = datasets.Value(dtype="int64")
-    dataset = Dataset.from_pandas(df, features=features, split="train")
-    dataset = dataset.remove_columns(tasks_col)
+    return tasks, tasks_by_episode
+
+
+def get_episode_row_ranges(data_files: list[Path]) -> dict[int, list[tuple[Path, int, int]]]:
+    """Returns the ranges of rows `(path, start, end)` holding the frames of each episode in `data_files`."""
+    row_ranges = {}
+    for path in data_files:
+        ep_indices = pq.read_table(path, columns=["episode_index"])["episode_index"].to_numpy()
+        if len(ep_indices) == 0:
+            continue
+        bounds = (np.flatnonzero(np.diff(ep_indices)) + 1).tolist()
+        for start, end in zip([0, *bounds], [*bounds, len(ep_indices)], strict=True):
+            row_ranges.setdefault(int(ep_indices[start]), []).append((path, start, end))
+    return row_ranges
+
+
+@lru_cache(maxsize=8)
+def open_parquet_file(path: Path) -> pq.ParquetFile:
+    # Episodes are read one after the other from the same files: their metadata is parsed only once by process
+    return pq.ParquetFile(path)
+
+
+def convert_episode(
+    row_ranges: list[tuple[Path, int, int]],
+    output_file: Path,
+    schema: pa.Schema,
+    task_index: int | dict[str, int],
+    tasks_col: str | None,
+    video_files: dict[Path, Path],
+) -> int:
+    """Writes the parquet file of an episode with its task indices, which are either the index of its single
+    task, or read from the `tasks_col` column using the mapping `task_index`. Its videos are linked from their
+    v1 location to their v2 location. Returns the length of the episode.
+
+    This is run in the workers of `split_parquet_by_episodes`.
+    """
+    ep_table = pa.concat_tables(
+        [read_parquet_rows(open_parquet_file(path), start, end) for path, start, end in row_ranges]
+    )
+    if tasks_col is None:
+        task_indices = [task_index] * len(ep_table)
+    else:
+        task_indices = [task_index[clean_task(task)] for task in ep_table[tasks_col].to_pylist()]
+    ep_table = ep_table.append_column("task_index", pa.array(task_indices, type=pa.int64()))
+    # Drops the video and tasks columns, and sets the features of the dataset in the metadata of the file
+    ep_table = ep_table.select(schema.names).cast(schema)
 
-    return dataset, tasks, tasks_by_episode
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(ep_table, output_file)
+    for v1_file, v2_file in video_files.items():
+        link_or_copy_file(v1_file, v2_file)
+    return len(ep_table)
 
 
 def split_parquet_by_episodes(
-    dataset: Dataset,
-    total_episodes: int,
-    total_chunks: int,
+    row_ranges: dict[int, list[tuple[Path, int, int]]],
+    hf_features: datasets.Features,
+    task_indices: dict[int, int | dict[str, int]],
+    tasks_col: str | None,
+    video_files: dict[int, dict[Path, Path]],
     output_dir: Path,
-) -> list:
-    table = dataset.data.table
-    episode_lengths = []
-    for ep_chunk in range(total_chunks):
-        ep_chunk_start = DEFAULT_CHUNK_SIZE * ep_chunk
-        ep_chunk_end = min(DEFAULT_CHUNK_SIZE * (ep_chunk + 1), total_episodes)
-        chunk_dir = "/".join(DEFAULT_PARQUET_PATH.split("/")[:-1]).format(episode_chunk=ep_chunk)
-        (output_dir / chunk_dir).mkdir(parents=True, exist_ok=True)
-        for ep_idx in range(ep_chunk_start, ep_chunk_end):
-            ep_table = table.filter(pc.equal(table["episode_index"], ep_idx))
-            episode_lengths.insert(ep_idx, len(ep_table))
-            output_file = output_dir / DEFAULT_PARQUET_PATH.format(
-                episode_chunk=ep_chunk, episode_index=ep_idx
-            )
-            pq.write_table(ep_table, output_file)
+    num_workers: int = 0,
+) -> list[int]:
+    """Writes one parquet file per episode in `output_dir` with `num_workers` processes, and returns the
+    length of the episodes. The completed episodes are recorded in a progress manifest, so that an interrupted
+    conversion resumes from the remaining episodes when it is run again."""
+    schema = hf_features.arrow_schema
+    jobs = {}
+    for ep_idx, ep_row_ranges in row_ranges.items():
+        output_file = output_dir / DEFAULT_PARQUET_PATH.format(
+            episode_chunk=ep_idx // DEFAULT_CHUNK_SIZE, episode_index=ep_idx
+        )
+        jobs[ep_idx] = (
+            ep_row_ranges,
+            output_file,
+            schema,
+            task_indices[ep_idx],
+            tasks_col,
+            video_files.get(ep_idx, {}),
+        )
 
-    return episode_lengths
+    episode_lengths = run_episode_jobs(
+        convert_episode, jobs, output_dir / V20_PROGRESS_PATH, num_workers, description="Converted"
+    )
+    return list(episode_lengths.values())
 
 
 def move_videos(
@@ -432,31 +500,24 @@ def get_videos_info(repo_id: str, local_dir: Path, video_keys: list[str], branch
     return videos_info_dict
 
 
-def convert_dataset(
-    repo_id: str,
-    local_dir: Path,
+def convert_local_dataset(
+    v1x_dir: Path,
+    v20_dir: Path,
     single_task: str | None = None,
     tasks_path: Path | None = None,
-    tasks_col: Path | None = None,
+    tasks_col: str | None = None,
     robot_config: RobotConfig | None = None,
-    test_branch: str | None = None,
-    **card_kwargs,
-):
-    v1 = get_safe_version(repo_id, V16)
-    v1x_dir = local_dir / V16 / repo_id
-    v20_dir = local_dir / V20 / repo_id
-    v1x_dir.mkdir(parents=True, exist_ok=True)
+    videos_info: dict | None = None,
+    num_workers: int = 0,
+) -> dict:
+    """Converts the v1.6 dataset stored in `v1x_dir` to a v2.0 dataset in `v20_dir` without accessing the hub,
+    and returns its info. Episodes are converted in parallel by `num_workers` processes.
+
+    The videos found in the `videos*/` directories of `v1x_dir` are hardlinked to their v2.0 location, unless
+    `videos_info` is given, in which case the videos are expected to have been moved already (see
+    `move_videos`).
+    """
     v20_dir.mkdir(parents=True, exist_ok=True)
-
-    hub_api = HfApi()
-    hub_api.snapshot_download(
-        repo_id=repo_id, repo_type="dataset", revision=v1, local_dir=v1x_dir, ignore_patterns="videos*/"
-    )
-    branch = "main"
-    if test_branch:
-        branch = test_branch
-        create_branch(repo_id=repo_id, branch=test_branch, repo_type="dataset")
-
     metadata_v1 = load_json(v1x_dir / V1_INFO_PATH)
     dataset = datasets.load_dataset("parquet", data_dir=v1x_dir / "data", split="train")
     features = get_features_from_hf_dataset(dataset, robot_config)
@@ -470,7 +531,9 @@ def convert_dataset(
         tasks_col = "language_instruction"
 
     # Episodes & chunks
-    episode_indices = sorted(dataset.unique("episode_index"))
+    data_files = sorted((v1x_dir / "data").glob("*.parquet"))
+    row_ranges = get_episode_row_ranges(data_files)
+    episode_indices = sorted(row_ranges)
     total_episodes = len(episode_indices)
     assert episode_indices == list(range(total_episodes))
     total_videos = total_episodes * len(video_keys)
@@ -481,41 +544,71 @@ def convert_dataset(
     # Tasks
     if single_task:
         tasks_by_episodes = dict.fromkeys(episode_indices, single_task)
-        dataset, tasks = add_task_index_by_episodes(dataset, tasks_by_episodes)
-        tasks_by_episodes = {ep_idx: [task] for ep_idx, task in tasks_by_episodes.items()}
     elif tasks_path:
         tasks_by_episodes = load_json(tasks_path)
         tasks_by_episodes = {int(ep_idx): task for ep_idx, task in tasks_by_episodes.items()}
-        dataset, tasks = add_task_index_by_episodes(dataset, tasks_by_episodes)
-        tasks_by_episodes = {ep_idx: [task] for ep_idx, task in tasks_by_episodes.items()}
     elif tasks_col:
-        dataset, tasks, tasks_by_episodes = add_task_index_from_tasks_col(dataset, tasks_col)
+        tasks, tasks_by_episodes = get_tasks_from_tasks_col(data_files, tasks_col)
     else:
         raise ValueError
 
+    if tasks_col:
+        tasks_to_task_index = {task: idx for idx, task in enumerate(tasks)}
+        task_indices = {
+            ep_idx: {task: tasks_to_task_index[task] for task in ep_tasks}
+            for ep_idx, ep_tasks in tasks_by_episodes.items()
+        }
+    else:
+        # Tasks are ordered deterministically so that a resumed conversion uses the same task indices
+        tasks = list(dict.fromkeys(tasks_by_episodes.values()))
+        tasks_to_task_index = {task: idx for idx, task in enumerate(tasks)}
+        task_indices = {ep_idx: tasks_to_task_index[task] for ep_idx, task in tasks_by_episodes.items()}
+        tasks_by_episodes = {ep_idx: [task] for ep_idx, task in tasks_by_episodes.items()}
+
     assert set(tasks) == {task for ep_tasks in tasks_by_episodes.values() for task in ep_tasks}
     tasks = [{"task_index": task_idx, "task": task} for task_idx, task in enumerate(tasks)]
     write_jsonlines(tasks, v20_dir / TASKS_PATH)
+    features.pop(tasks_col, None)  # replaced by task_index
     features["task_index"] = {
         "dtype": "int64",
         "shape": (1,),
         "names": None,
     }
+    hf_features = datasets.Features(
+        {key: ft for key, ft in dataset.features.items() if key not in video_keys and key != tasks_col}
+    )
+    hf_features["task_index"] = datasets.Value(dtype="int64")
 
     # Videos
+    video_files = {}
     if video_keys:
         assert metadata_v1.get("video", False)
-        dataset = dataset.remove_columns(video_keys)
-        clean_gitattr = Path(
-            hub_api.hf_hub_download(
-                repo_id=GITATTRIBUTES_REF, repo_type="dataset", local_dir=local_dir, filename=".gitattributes"
-            )
-        ).absolute()
-        with tempfile.TemporaryDirectory() as tmp_video_dir:
-            move_videos(
-                repo_id, video_keys, total_episodes, total_chunks, Path(tmp_video_dir), clean_gitattr, branch
-            )
-        videos_info = get_videos_info(repo_id, v1x_dir, video_keys=video_keys, branch=branch)
+        if videos_info is None:
+            v1_video_files = {path.name: path for path in v1x_dir.glob("videos*/*.mp4")}
+            for ep_idx in episode_indices:
+                video_files[ep_idx] = {
+                    v1_video_files[V1_VIDEO_FILE.format(video_key=key, episode_index=ep_idx)]: v20_dir
+                    / DEFAULT_VIDEO_PATH.format(
+                        episode_chunk=ep_idx // DEFAULT_CHUNK_SIZE, video_key=key, episode_index=ep_idx
+                    )
+                    for key in video_keys
+                }
+    else:
+        assert metadata_v1.get("video", 0) == 0
+
+    # Split data into 1 parquet file by episode
+    episode_lengths = split_parquet_by_episodes(
+        row_ranges, hf_features, task_indices, tasks_col, video_files, v20_dir, num_workers
+    )
+
+    if video_keys:
+        if videos_info is None:
+            videos_info = {
+                key: get_video_info(
+                    v20_dir / DEFAULT_VIDEO_PATH.format(episode_chunk=0, video_key=key, episode_index=0)
+                )
+                for key in video_keys
+            }
         for key in video_keys:
             features[key]["shape"] = (
                 videos_info[key].pop("video.height"),
@@ -526,19 +619,6 @@ def convert_dataset(
             assert math.isclose(videos_info[key]["video.fps"], metadata_v1["fps"], rel_tol=1e-3)
             if "encoding" in metadata_v1:
                 assert videos_info[key]["video.pix_fmt"] == metadata_v1["encoding"]["pix_fmt"]
-    else:
-        assert metadata_v1.get("video", 0) == 0
-        videos_info = None
-
-    # Split data into 1 parquet file by episode
-    episode_lengths = split_parquet_by_episodes(dataset, total_episodes, total_chunks, v20_dir)
-
-    if robot_config is not None:
-        robot_type = robot_config.type
-        repo_tags = [robot_type]
-    else:
-        robot_type = "unknown"
-        repo_tags = None
 
     # Episodes
     episodes = [
@@ -550,9 +630,9 @@ def convert_dataset(
     # Assemble metadata v2.0
     metadata_v2_0 = {
         "codebase_version": V20,
-        "robot_type": robot_type,
+        "robot_type": robot_config.type if robot_config is not None else "unknown",
         "total_episodes": total_episodes,
-        "total_frames": len(dataset),
+        "total_frames": sum(episode_lengths),
         "total_tasks": len(tasks),
         "total_videos": total_videos,
         "total_chunks": total_chunks,
@@ -565,6 +645,66 @@ def convert_dataset(
     }
     write_json(metadata_v2_0, v20_dir / INFO_PATH)
     convert_stats_to_json(v1x_dir, v20_dir)
+    (v20_dir / V20_PROGRESS_PATH).unlink()
+    return metadata_v2_0
+
+
+def convert_dataset(
+    repo_id: str,
+    local_dir: Path,
+    single_task: str | None = None,
+    tasks_path: Path | None = None,
+    tasks_col: Path | None = None,
+    robot_config: RobotConfig | None = None,
+    test_branch: str | None = None,
+    num_workers: int = 4,
+    **card_kwargs,
+):
+    v1 = get_safe_version(repo_id, V16)
+    v1x_dir = local_dir / V16 / repo_id
+    v20_dir = local_dir / V20 / repo_id
+    v1x_dir.mkdir(parents=True, exist_ok=True)
+    v20_dir.mkdir(parents=True, exist_ok=True)
+
+    hub_api = HfApi()
+    hub_api.snapshot_download(
+        repo_id=repo_id, repo_type="dataset", revision=v1, local_dir=v1x_dir, ignore_patterns="videos*/"
+    )
+    branch = "main"
+    if test_branch:
+        branch = test_branch
+        create_branch(repo_id=repo_id, branch=test_branch, repo_type="dataset")
+
+    # Videos are moved on the hub rather than downloaded
+    dataset = datasets.load_dataset("parquet", data_dir=v1x_dir / "data", split="train")
+    features = get_features_from_hf_dataset(dataset, robot_config)
+    video_keys = [key for key, ft in features.items() if ft["dtype"] == "video"]
+    videos_info = None
+    if video_keys:
+        total_episodes = len(dataset.unique("episode_index"))
+        total_chunks = math.ceil(total_episodes / DEFAULT_CHUNK_SIZE)
+        clean_gitattr = Path(
+            hub_api.hf_hub_download(
+                repo_id=GITATTRIBUTES_REF, repo_type="dataset", local_dir=local_dir, filename=".gitattributes"
+            )
+        ).absolute()
+        with tempfile.TemporaryDirectory() as tmp_video_dir:
+            move_videos(
+                repo_id, video_keys, total_episodes, total_chunks, Path(tmp_video_dir), clean_gitattr, branch
+            )
+        videos_info = get_videos_info(repo_id, v1x_dir, video_keys=video_keys, branch=branch)
+
+    metadata_v2_0 = convert_local_dataset(
+        v1x_dir,
+        v20_dir,
+        single_task=single_task,
+        tasks_path=tasks_path,
+        tasks_col=tasks_col,
+        robot_config=robot_config,
+        videos_info=videos_info,
+        num_workers=num_workers,
+    )
+    repo_tags = [robot_config.type] if robot_config is not None else None
     card = create_lerobot_dataset_card(tags=repo_tags, dataset_info=metadata_v2_0, **card_kwargs)
 
     with contextlib.suppress(EntryNotFoundError, HfHubHTTPError):
@@ -670,17 +810,41 @@ def main():
         default=None,
         help="Repo branch to test your conversion first (e.g. 'v2.0.test')",
     )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=4,
+        help="Number of processes converting the episodes in parallel (0 converts them in the main process). "
+        "Defaults to 4.",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Convert the dataset already stored in '<local-dir>/v1.6/<repo-id>' to "
+        "'<local-dir>/v2.0/<repo-id>', without accessing the hub.",
+    )
 
     args = parser.parse_args()
+    init_logging()
     if not args.local_dir:
         args.local_dir = Path("/tmp/lerobot_dataset_v2")
 
-    if args.robot is not None:
-        robot_config = make_robot_config(args.robot)
-
+    robot_config = make_robot_config(args.robot) if args.robot is not None else None
     del args.robot
 
-    convert_dataset(**vars(args), robot_config=robot_config)
+    if args.offline:
+        convert_local_dataset(
+            args.local_dir / V16 / args.repo_id,
+            args.local_dir / V20 / args.repo_id,
+            single_task=args.single_task,
+            tasks_path=args.tasks_path,
+            tasks_col=args.tasks_col,
+            robot_config=robot_config,
+            num_workers=args.num_workers,
+        )
+    else:
+        del args.offline
+        convert_dataset(**vars(args), robot_config=robot_config)
 
 
 if __name__ == "__main__":
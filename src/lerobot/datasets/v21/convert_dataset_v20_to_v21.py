@@ -29,16 +29,28 @@ python -m lerobot.datasets.v21.convert_dataset_v20_to_v21 \
     --repo-id=aliberts/koch_tutorial
 ```
 
+The stats of the episodes are computed in parallel by `--num-workers` processes. A dataset stored locally can
+be converted in place without network access with `--root`, in which case nothing is pushed to the hub:
+
+```bash
+python -m lerobot.datasets.v21.convert_dataset_v20_to_v21 \
+    --root=data/koch_tutorial --num-workers=8
+```
+
+Interrupting a conversion and running it again resumes it from the episodes whose stats were already computed.
+
 """
 
 import argparse
 import logging
+from pathlib import Path
 
 from huggingface_hub import HfApi
 
 from lerobot.datasets.lerobot_dataset import CODEBASE_VERSION, LeRobotDataset
-from lerobot.datasets.utils import EPISODES_STATS_PATH, STATS_PATH, load_stats, write_info
+from lerobot.datasets.utils import STATS_PATH, load_info, load_stats, write_info
 from lerobot.datasets.v21.convert_stats import check_aggregate_stats, convert_stats
+from lerobot.utils.utils import init_logging
 
 V20 = "v2.0"
 V21 = "v2.1"
@@ -53,6 +65,26 @@ class SuppressWarnings:
         logging.getLogger().setLevel(self.previous_level)
 
 
+def convert_local_dataset(root: Path, num_workers: int = 4, video_backend: str | None = None) -> dict:
+    """Converts the dataset stored in `root` from v2.0 to v2.1 in place, without accessing the hub, and
+    returns its updated info."""
+    info = load_info(root)
+    if info["codebase_version"] != V20:
+        raise ValueError(f"Expected a {V20} dataset, got {info['codebase_version']} in {root}.")
+
+    episodes_stats = convert_stats(root, num_workers=num_workers, video_backend=video_backend)
+    ref_stats = load_stats(root)
+    if ref_stats is not None:
+        check_aggregate_stats(episodes_stats, info["features"], ref_stats)
+
+    info["codebase_version"] = CODEBASE_VERSION
+    write_info(info, root)
+
+    # delete old stats.json file
+    (root / STATS_PATH).unlink(missing_ok=True)
+    return info
+
+
 def convert_dataset(
     repo_id: str,
     branch: str | None = None,
@@ -61,22 +93,9 @@ def convert_dataset(
     with SuppressWarnings():
         dataset = LeRobotDataset(repo_id, revision=V20, force_cache_sync=True)
 
-    if (dataset.root / EPISODES_STATS_PATH).is_file():
-        (dataset.root / EPISODES_STATS_PATH).unlink()
-
-    convert_stats(dataset, num_workers=num_workers)
-    ref_stats = load_stats(dataset.root)
-    check_aggregate_stats(dataset, ref_stats)
-
-    dataset.meta.info["codebase_version"] = CODEBASE_VERSION
-    write_info(dataset.meta.info, dataset.root)
-
+    dataset.meta.info = convert_local_dataset(dataset.root, num_workers=num_workers)
     dataset.push_to_hub(branch=branch, tag_version=False, allow_patterns="meta/")
 
-    # delete old stats.json file
-    if (dataset.root / STATS_PATH).is_file:
-        (dataset.root / STATS_PATH).unlink()
-
     hub_api = HfApi()
     if hub_api.file_exists(
         repo_id=dataset.repo_id, filename=STATS_PATH, revision=branch, repo_type="dataset"
@@ -90,13 +109,18 @@ def convert_dataset(
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument(
+    source_args = parser.add_mutually_exclusive_group(required=True)
+    source_args.add_argument(
         "--repo-id",
         type=str,
-        required=True,
         help="Repository identifier on Hugging Face: a community or a user name `/` the name of the dataset "
         "(e.g. `lerobot/pusht`, `cadene/aloha_sim_insertion_human`).",
     )
+    source_args.add_argument(
+        "--root",
+        type=Path,
+        help="Local directory of a dataset to convert in place, without pushing it to the hub.",
+    )
     parser.add_argument(
         "--branch",
         type=str,
@@ -107,8 +131,12 @@ if __name__ == "__main__":
         "--num-workers",
         type=int,
         default=4,
-        help="Number of workers for parallelizing stats compute. Defaults to 4.",
+        help="Number of processes for parallelizing stats compute. Defaults to 4.",
     )
 
     args = parser.parse_args()
-    convert_dataset(**vars(args))
+    init_logging()
+    if args.root is not None:
+        convert_local_dataset(args.root, num_workers=args.num_workers)
+    else:
+        convert_dataset(args.repo_id, branch=args.branch, num_workers=args.num_workers)
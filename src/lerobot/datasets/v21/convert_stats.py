@@ -12,80 +12,129 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import io
+from pathlib import Path
 
 import numpy as np
-from tqdm import tqdm
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from lerobot.datasets.compute_stats import aggregate_stats, get_feature_stats, sample_indices
-from lerobot.datasets.lerobot_dataset import LeRobotDataset
-from lerobot.datasets.utils import write_episode_stats
-
-
-def sample_episode_video_frames(dataset: LeRobotDataset, episode_index: int, ft_key: str) -> np.ndarray:
-    ep_len = dataset.meta.episodes[episode_index]["length"]
-    sampled_indices = sample_indices(ep_len)
-    query_timestamps = dataset._get_query_timestamps(0.0, {ft_key: sampled_indices})
-    video_frames = dataset._query_videos(query_timestamps, episode_index)
-    return video_frames[ft_key].numpy()
-
-
-def convert_episode_stats(dataset: LeRobotDataset, ep_idx: int):
-    ep_start_idx = dataset.episode_data_index["from"][ep_idx]
-    ep_end_idx = dataset.episode_data_index["to"][ep_idx]
-    ep_data = dataset.hf_dataset.select(range(ep_start_idx, ep_end_idx))
+from lerobot.datasets.job_runner import run_episode_jobs
+from lerobot.datasets.utils import (
+    EPISODES_STATS_PATH,
+    cast_stats_to_numpy,
+    load_episodes,
+    load_image_as_numpy,
+    load_info,
+    serialize_dict,
+    write_episode_stats,
+)
+from lerobot.datasets.video_utils import decode_video_frames_at_indices, get_safe_default_codec
+
+STATS_PROGRESS_PATH = ".convert_stats_progress.jsonl"
+
+
+def sample_episode_frames(
+    table: pa.Table, key: str, video_path: Path | None, fps: int, video_backend: str
+) -> np.ndarray:
+    """Loads a sample of the frames of an image or video feature, as channel-first uint8 images."""
+    sampled_indices = sample_indices(len(table))
+    if video_path is not None:
+        frames = decode_video_frames_at_indices(
+            video_path, sampled_indices, fps, video_backend, return_uint8=True
+        )
+        return frames.numpy()
+
+    images = table[key].take(sampled_indices).to_pylist()
+    return np.stack(
+        [load_image_as_numpy(io.BytesIO(img["bytes"]), dtype=np.uint8, channel_first=True) for img in images]
+    )
+
+
+def convert_episode_stats(
+    data_path: Path, video_paths: dict[str, Path], features: dict, fps: int, video_backend: str
+) -> dict:
+    """Computes the stats of an episode from its files, without loading the whole dataset: this is run in the
+    workers of `convert_stats`, which is why the stats are returned serialized."""
+    columns = [key for key, ft in features.items() if ft["dtype"] not in ["video", "string"]]
+    table = pq.read_table(data_path, columns=columns)
 
     ep_stats = {}
-    for key, ft in dataset.features.items():
-        if ft["dtype"] == "video":
-            # We sample only for videos
-            ep_ft_data = sample_episode_video_frames(dataset, ep_idx, key)
+    for key, ft in features.items():
+        if ft["dtype"] == "string":
+            continue
+        elif ft["dtype"] in ["image", "video"]:
+            # We sample only for images and videos
+            ep_ft_data = sample_episode_frames(table, key, video_paths.get(key), fps, video_backend)
+            axes_to_reduce = (0, 2, 3)
+            keepdims = True
         else:
-            ep_ft_data = np.array(ep_data[key])
+            ep_ft_data = np.asarray(table[key].to_pylist(), dtype=ft["dtype"])
+            axes_to_reduce = 0
+            keepdims = ep_ft_data.ndim == 1
 
-        axes_to_reduce = (0, 2, 3) if ft["dtype"] in ["image", "video"] else 0
-        keepdims = True if ft["dtype"] in ["image", "video"] else ep_ft_data.ndim == 1
         ep_stats[key] = get_feature_stats(ep_ft_data, axis=axes_to_reduce, keepdims=keepdims)
 
-        if ft["dtype"] in ["image", "video"]:  # remove batch dim
+        if ft["dtype"] in ["image", "video"]:  # normalize and remove batch dim
             ep_stats[key] = {
-                k: v if k == "count" else np.squeeze(v, axis=0) for k, v in ep_stats[key].items()
-            }
-
-    dataset.meta.episodes_stats[ep_idx] = ep_stats
-
-
-def convert_stats(dataset: LeRobotDataset, num_workers: int = 0):
-    assert dataset.episodes is None
-    print("Computing episodes stats")
-    total_episodes = dataset.meta.total_episodes
-    if num_workers > 0:
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            futures = {
-                executor.submit(convert_episode_stats, dataset, ep_idx): ep_idx
-                for ep_idx in range(total_episodes)
+                k: v if k == "count" else np.squeeze(v / 255.0, axis=0) for k, v in ep_stats[key].items()
             }
-            for future in tqdm(as_completed(futures), total=total_episodes):
-                future.result()
-    else:
-        for ep_idx in tqdm(range(total_episodes)):
-            convert_episode_stats(dataset, ep_idx)
 
-    for ep_idx in tqdm(range(total_episodes)):
-        write_episode_stats(ep_idx, dataset.meta.episodes_stats[ep_idx], dataset.root)
+    return serialize_dict(ep_stats)
+
+
+def convert_stats(
+    root: Path, num_workers: int = 0, video_backend: str | None = None
+) -> dict[int, dict[str, dict[str, np.ndarray]]]:
+    """Computes the stats of each episode of the dataset stored in `root` with `num_workers` processes, and
+    writes them to `episodes_stats.jsonl`.
+
+    The stats of the episodes are recorded in a progress manifest (`STATS_PROGRESS_PATH`) as they are
+    computed, so that an interrupted conversion only computes the remaining episodes when it is run again. The
+    manifest is removed once `episodes_stats.jsonl` has been written.
+    """
+    info = load_info(root)
+    episodes = load_episodes(root)
+    video_backend = video_backend if video_backend is not None else get_safe_default_codec()
+    video_keys = [key for key, ft in info["features"].items() if ft["dtype"] == "video"]
+    jobs = {}
+    for ep_idx in episodes:
+        ep_chunk = ep_idx // info["chunks_size"]
+        data_path = root / info["data_path"].format(episode_chunk=ep_chunk, episode_index=ep_idx)
+        video_paths = {
+            key: root / info["video_path"].format(episode_chunk=ep_chunk, video_key=key, episode_index=ep_idx)
+            for key in video_keys
+        }
+        jobs[ep_idx] = (data_path, video_paths, info["features"], info["fps"], video_backend)
+
+    manifest_path = root / STATS_PROGRESS_PATH
+    results = run_episode_jobs(
+        convert_episode_stats, jobs, manifest_path, num_workers, description="Computed the stats of"
+    )
+    episodes_stats = {ep_idx: cast_stats_to_numpy(ep_stats) for ep_idx, ep_stats in results.items()}
+
+    (root / EPISODES_STATS_PATH).unlink(missing_ok=True)
+    for ep_idx, ep_stats in episodes_stats.items():
+        write_episode_stats(ep_idx, ep_stats, root)
+    manifest_path.unlink()
+    return episodes_stats
 
 
 def check_aggregate_stats(
-    dataset: LeRobotDataset,
+    episodes_stats: dict[int, dict[str, dict[str, np.ndarray]]],
+    features: dict,
     reference_stats: dict[str, dict[str, np.ndarray]],
     video_rtol_atol: tuple[float] = (1e-2, 1e-2),
     default_rtol_atol: tuple[float] = (5e-6, 6e-5),
 ):
     """Verifies that the aggregated stats from episodes_stats are close to reference stats."""
-    agg_stats = aggregate_stats(list(dataset.meta.episodes_stats.values()))
-    for key, ft in dataset.features.items():
+    agg_stats = aggregate_stats(list(episodes_stats.values()))
+    for key, ft in features.items():
+        if key not in agg_stats:
+            continue  # e.g. string features
         # These values might need some fine-tuning
-        if ft["dtype"] == "video":
+        if ft["dtype"] in ["image", "video"]:
             # to account for image sub-sampling
             rtol, atol = video_rtol_atol
         else:
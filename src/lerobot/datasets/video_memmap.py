@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Decode the videos of a LeRobotDataset once into uint8 numpy memmaps, trading disk space for the CPU time spent
+decoding frames at every epoch of a training run.
+
+One memmap of shape (num_frames, channels, height, width) is written per camera, with the frames of the
+dataset stored in the same order as the rows of its `hf_dataset`. Frames are decoded with
+`decode_video_frames` at the timestamps of the dataset, so that they are identical to the frames decoded on the
+fly (up to the optional resizing), and an index maps each episode to its range of rows. Timestamps queried at
+training time are checked against the timestamps of the stored frames with the same tolerance as
+`decode_video_frames`.
+
+The resulting directory looks like this:
+.
+├── index.json
+├── timestamps.npy
+├── observation.images.laptop.uint8
+└── observation.images.phone.uint8
+
+Usage:
+
+```bash
+python -m lerobot.datasets.video_memmap \
+    --repo-id lerobot/aloha_static_coffee \
+    --output-dir outputs/decoded/aloha_static_coffee \
+    --resolution 240 320
+```
+
+The decoded frames are then read by passing `decoded_video_dir` to `LeRobotDataset`.
+"""
+
+import argparse
+import logging
+import shutil
+from pathlib import Path
+
+import numpy as np
+import torch
+import torchvision.transforms.v2.functional as F  # noqa: N812
+
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+from lerobot.datasets.online_buffer import _make_memmap_safe
+from lerobot.datasets.utils import load_json, write_json
+from lerobot.datasets.video_utils import VideoDecoderCache, decode_video_frames
+from lerobot.utils.utils import init_logging
+
+DECODED_VIDEO_INDEX = "index.json"
+DECODED_VIDEO_TIMESTAMPS = "timestamps.npy"
+
+
+class DecodedVideoMemmap:
+    """Read-only access to the frames written by `build_decoded_video_memmap`.
+
+    The memmaps are opened in read mode, so their pages are shared between DataLoader workers through the page
+    cache. They are reopened rather than copied when this object is pickled.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        index = load_json(self.root / DECODED_VIDEO_INDEX)
+        self.fps = index["fps"]
+        self.features = {key: tuple(ft["shape"]) for key, ft in index["features"].items()}
+        self.episodes = {int(ep_idx): tuple(rows) for ep_idx, rows in index["episodes"].items()}
+        self.timestamps = np.load(self.root / DECODED_VIDEO_TIMESTAMPS)
+        self._open_memmaps()
+
+    def _open_memmaps(self) -> None:
+        self._frames = {
+            key: _make_memmap_safe(
+                filename=self.root / f"{key}.uint8",
+                dtype=np.dtype("uint8"),
+                mode="r",
+                shape=(len(self.timestamps), *shape),
+            )
+            for key, shape in self.features.items()
+        }
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_frames"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._open_memmaps()
+
+    @property
+    def video_keys(self) -> list[str]:
+        return list(self.features)
+
+    def query(
+        self,
+        ep_idx: int,
+        query_timestamps: dict[str, list[float]],
+        tolerance_s: float,
+        return_uint8: bool = False,
+    ) -> dict[str, torch.Tensor]:
+        """Returns the frames closest to the queried timestamps of episode `ep_idx`, like `decode_video_frames`.
+
+        The stored timestamps are separated by 1/fps, so the closest frame is found by rounding instead of
+        comparing against every frame of the episode.
+        """
+        if ep_idx not in self.episodes:
+            raise ValueError(f"Episode {ep_idx} has not been decoded in {self.root}.")
+        start, end = self.episodes[ep_idx]
+        ep_timestamps = self.timestamps[start:end]
+
+        item = {}
+        for key, query_ts in query_timestamps.items():
+            query_ts = np.asarray(query_ts)
+            rows = np.round((query_ts - ep_timestamps[0]) * self.fps).astype(np.int64)
+            rows = np.clip(rows, 0, end - start - 1)
+            dist = np.abs(ep_timestamps[rows] - query_ts)
+            is_within_tol = dist < tolerance_s
+            assert is_within_tol.all(), (
+                f"One or several query timestamps unexpectedly violate the tolerance ({dist[~is_within_tol]} > {tolerance_s=})."
+                "It means that the closest frame that can be loaded from the video is too far away in time."
+                "This might be due to synchronization issues with timestamps during data collection."
+                "To be safe, we advise to ignore this item during training."
+                f"\nqueried timestamps: {query_ts}"
+                f"\nloaded timestamps: {ep_timestamps[rows]}"
+            )
+            frames = torch.from_numpy(self._frames[key][start + rows])
+            item[key] = frames if return_uint8 else frames.type(torch.float32) / 255
+
+        return item
+
+
+def build_decoded_video_memmap(
+    dataset: LeRobotDataset,
+    output_dir: str | Path,
+    resolution: tuple[int, int] | None = None,
+    chunk_size: int = 64,
+    overwrite: bool = False,
+) -> DecodedVideoMemmap:
+    """Decodes every video of `dataset` into one uint8 memmap per camera written in `output_dir`.
+
+    Args:
+        dataset: The dataset to decode. Only its selected episodes are decoded.
+        output_dir: Where to write the memmaps and their index.
+        resolution: Optional (height, width) to which frames are resized before being stored.
+        chunk_size: Number of frames decoded at once.
+        overwrite: Whether to replace an existing `output_dir`.
+    """
+    output_dir = Path(output_dir)
+    if output_dir.exists():
+        if not overwrite:
+            raise FileExistsError(f"{output_dir} already exists. Pass `overwrite=True` to replace it.")
+        shutil.rmtree(output_dir)
+    output_dir.mkdir(parents=True)
+
+    # Rows of the memmaps are the rows of hf_dataset
+    timestamps = dataset.hf_dataset.with_format("numpy", columns=["timestamp"])["timestamp"]
+    episode_indices = dataset.hf_dataset.with_format("numpy", columns=["episode_index"])["episode_index"]
+    ep_from = dataset.episode_data_index["from"].tolist()
+    ep_to = dataset.episode_data_index["to"].tolist()
+    episodes = {int(episode_indices[start]): (start, end) for start, end in zip(ep_from, ep_to, strict=True)}
+
+    decoder_cache = VideoDecoderCache()
+    features = {}
+    for key in dataset.video_keys:
+        memmap = None
+        for ep_idx, (start, end) in episodes.items():
+            video_path = dataset.root / dataset.meta.get_video_file_path(ep_idx, key)
+            offset = dataset.meta.get_video_timestamp_offset(ep_idx, key)
+            for chunk_start in range(start, end, chunk_size):
+                chunk_end = min(chunk_start + chunk_size, end)
+                frames = decode_video_frames(
+                    video_path,
+                    (offset + timestamps[chunk_start:chunk_end]).tolist(),
+                    dataset.tolerance_s,
+                    dataset.video_backend,
+                    decoder_cache=decoder_cache,
+                    return_uint8=True,
+                )
+                if resolution is not None:
+                    frames = F.resize(frames, list(resolution), antialias=True)
+                if memmap is None:
+                    features[key] = tuple(frames.shape[1:])
+                    memmap = _make_memmap_safe(
+                        filename=output_dir / f"{key}.uint8",
+                        dtype=np.dtype("uint8"),
+                        mode="w+",
+                        shape=(len(timestamps), *features[key]),
+                    )
+                memmap[chunk_start:chunk_end] = frames.numpy()
+        memmap.flush()
+        decoder_cache.clear()
+        logging.info(f"Decoded '{key}' into {output_dir / f'{key}.uint8'}")
+
+    np.save(output_dir / DECODED_VIDEO_TIMESTAMPS, timestamps)
+    # The index is written last so that an interrupted build is not mistaken for a complete one
+    index = {
+        "fps": dataset.fps,
+        "features": {key: {"dtype": "uint8", "shape": list(shape)} for key, shape in features.items()},
+        "episodes": {str(ep_idx): [start, end] for ep_idx, (start, end) in episodes.items()},
+    }
+    write_json(index, output_dir / DECODED_VIDEO_INDEX)
+    return DecodedVideoMemmap(output_dir)
+
+
+def load_decoded_video_memmap(dataset: LeRobotDataset, decoded_video_dir: str | Path) -> DecodedVideoMemmap:
+    """Opens the decoded videos of `dataset` in `decoded_video_dir`, decoding them first if they are missing."""
+    decoded_video_dir = Path(decoded_video_dir)
+    if not (decoded_video_dir / DECODED_VIDEO_INDEX).is_file():
+        logging.info(f"Decoding the videos of {dataset.repo_id} into {decoded_video_dir}")
+        return build_decoded_video_memmap(dataset, decoded_video_dir, overwrite=True)
+
+    decoded = DecodedVideoMemmap(decoded_video_dir)
+    if decoded.fps != dataset.fps:
+        raise ValueError(
+            f"Videos in {decoded_video_dir} were decoded at {decoded.fps} fps, not {dataset.fps}."
+        )
+    missing_keys = set(dataset.video_keys) - set(decoded.video_keys)
+    episode_indices = dataset.hf_dataset.with_format("numpy", columns=["episode_index"])["episode_index"]
+    missing_episodes = set(np.unique(episode_indices).tolist()) - set(decoded.episodes)
+    if missing_keys or missing_episodes:
+        raise ValueError(
+            f"{decoded_video_dir} does not contain the decoded videos of this dataset "
+            f"(missing keys: {sorted(missing_keys)}, missing episodes: {sorted(missing_episodes)}). "
+            "Rebuild it with `build_decoded_video_memmap(..., overwrite=True)`."
+        )
+    return decoded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--repo-id",
+        type=str,
+        required=True,
+        help="Repository identifier on Hugging Face: a community or a user name `/` the name of the dataset "
+        "(e.g. `lerobot/pusht`, `cadene/aloha_sim_insertion_human`).",
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=None,
+        help="Root directory for the dataset stored locally. By default, the dataset will be loaded from "
+        "hugging face cache folder, or downloaded from the hub if available.",
+    )
+    parser.add_argument(
+        "--output-dir", type=Path, required=True, help="Directory where the decoded frames are written."
+    )
+    parser.add_argument("--episodes", type=int, nargs="*", default=None, help="Episodes to decode.")
+    parser.add_argument(
+        "--resolution",
+        type=int,
+        nargs=2,
+        default=None,
+        help="Height and width to which frames are resized. Defaults to the resolution of the videos.",
+    )
+    parser.add_argument("--video-backend", type=str, default=None, help="Video backend used for decoding.")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Number of frames decoded at once.")
+    parser.add_argument("--overwrite", action="store_true", help="Replace an existing output directory.")
+
+    args = parser.parse_args()
+    init_logging()
+    dataset = LeRobotDataset(
+        args.repo_id, root=args.root, episodes=args.episodes, video_backend=args.video_backend
+    )
+    build_decoded_video_memmap(
+        dataset,
+        args.output_dir,
+        resolution=args.resolution,
+        chunk_size=args.chunk_size,
+        overwrite=args.overwrite,
+    )
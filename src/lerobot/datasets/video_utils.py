@@ -16,19 +16,29 @@
 import glob
 import importlib
 import logging
+import os
+import queue
 import shutil
+import threading
+import time
 import warnings
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from fractions import Fraction
 from pathlib import Path
 from typing import Any, ClassVar
 
 import av
+import numpy as np
 import pyarrow as pa
 import torch
 import torchvision
 from datasets.features.features import register_feature
 from PIL import Image
 
+from lerobot.datasets.compute_stats import RunningImageStats, is_channel_first
+
 
 def get_safe_default_codec():
     if importlib.util.find_spec("torchcodec"):
@@ -40,11 +50,196 @@ def get_safe_default_codec():
         return "pyav"
 
 
+def open_video_decoder(video_path: Path | str, backend: str, device: str = "cpu"):
+    """Opens a decoder on `video_path`: a torchcodec `VideoDecoder` for the "torchcodec" backend, or a
+    `torchvision.io.VideoReader` for the "pyav" and "video_reader" backends.
+    """
+    if backend == "torchcodec":
+        if importlib.util.find_spec("torchcodec"):
+            from torchcodec.decoders import VideoDecoder
+        else:
+            raise ImportError("torchcodec is required but not available.")
+        return VideoDecoder(str(video_path), device=device, seek_mode="approximate")
+    elif backend in ["pyav", "video_reader"]:
+        torchvision.set_video_backend(backend)
+        return torchvision.io.VideoReader(str(video_path), "video")
+    else:
+        raise ValueError(f"Unsupported video backend: {backend}")
+
+
+def close_video_decoder(decoder) -> None:
+    container = getattr(decoder, "container", None)
+    if container is not None:
+        container.close()
+
+
+class VideoDecoderCache:
+    """LRU cache of open video decoders, keyed by video path and backend.
+
+    Opening a video file (container parsing, demuxer and codec setup) is paid only once per file instead of
+    once per decoded item. At most `max_size` decoders are kept open, the least recently used one being
+    closed when a new file is opened.
+
+    The cache is bound to the process which filled it. Decoders are not shared across processes: after a
+    fork (e.g. DataLoader workers) the decoders inherited from the parent are dropped without being used, and
+    pickling the cache (e.g. "spawn" start method) only transfers its settings. Each DataLoader worker thus
+    ends up with its own pool of decoders.
+
+    Args:
+        max_size (int, optional): Maximum number of decoders kept open at the same time. Defaults to 16.
+    """
+
+    def __init__(self, max_size: int = 16):
+        if max_size < 1:
+            raise ValueError(f"max_size must be a positive integer, but is {max_size}.")
+        self.max_size = max_size
+        self._decoders = OrderedDict()
+        self._pid = os.getpid()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, video_path: Path | str, backend: str):
+        """Returns an open decoder for `video_path`, opening it if it isn't already cached."""
+        self._check_pid()
+        key = (str(video_path), backend)
+        if key in self._decoders:
+            self.hits += 1
+            self._decoders.move_to_end(key)
+            return self._decoders[key]
+
+        self.misses += 1
+        decoder = open_video_decoder(video_path, backend)
+        self._decoders[key] = decoder
+        if len(self._decoders) > self.max_size:
+            _, evicted = self._decoders.popitem(last=False)
+            close_video_decoder(evicted)
+            self.evictions += 1
+        return decoder
+
+    def clear(self) -> None:
+        """Closes all cached decoders."""
+        self._check_pid()
+        for decoder in self._decoders.values():
+            close_video_decoder(decoder)
+        self._decoders.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "open_decoders": len(self._decoders),
+        }
+
+    def _check_pid(self) -> None:
+        if os.getpid() != self._pid:
+            # Decoders have been inherited from another process through a fork, they can't be used safely.
+            self._decoders = OrderedDict()
+            self._pid = os.getpid()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        self._check_pid()
+        return len(self._decoders)
+
+    def __getstate__(self) -> dict:
+        return {"max_size": self.max_size}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+
+class DecodedFrameCache:
+    """LRU cache of decoded video frames, keyed by video path and frame index, bounded in bytes.
+
+    Frames are stored as uint8 (channel first) to keep the memory footprint 4 times smaller than the float32
+    frames returned to the user. When `delta_timestamps` query several frames per item (e.g.
+    `n_obs_steps>1`) and neighbouring items are read by the same process (e.g. with an episode-contiguous
+    sampler), most of the frames of an item have already been decoded for the previous one: only the frames
+    missing from the cache are decoded.
+
+    Like `VideoDecoderCache`, only the settings are pickled, so that "spawn" DataLoader workers start with
+    an empty cache.
+
+    Args:
+        max_bytes (int, optional): Maximum number of bytes of frames kept in memory. Defaults to 512MiB.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024**2):
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes must be a positive integer, but is {max_bytes}.")
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, video_path: Path | str, frame_index: int) -> torch.Tensor | None:
+        key = (str(video_path), frame_index)
+        frame = self._frames.get(key)
+        if frame is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._frames.move_to_end(key)
+        return frame
+
+    def put(self, video_path: Path | str, frame_index: int, frame: torch.Tensor) -> None:
+        if frame.dtype != torch.uint8:
+            raise ValueError(f"Only uint8 frames can be cached, but dtype is {frame.dtype}.")
+        key = (str(video_path), frame_index)
+        if key in self._frames:
+            self._frames.move_to_end(key)
+            return
+        # Copy to not keep alive the batch of frames which `frame` may be a view of
+        frame = frame.clone()
+        self._frames[key] = frame
+        self.num_bytes += frame.numel() * frame.element_size()
+        while self.num_bytes > self.max_bytes and len(self._frames) > 1:
+            _, evicted = self._frames.popitem(last=False)
+            self.num_bytes -= evicted.numel() * evicted.element_size()
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._frames.clear()
+        self.num_bytes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "num_frames": len(self._frames),
+            "num_bytes": self.num_bytes,
+        }
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __getstate__(self) -> dict:
+        return {"max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+
 def decode_video_frames(
     video_path: Path | str,
     timestamps: list[float],
     tolerance_s: float,
     backend: str | None = None,
+    decoder_cache: VideoDecoderCache | None = None,
+    frame_cache: DecodedFrameCache | None = None,
+    fps: int | None = None,
+    return_uint8: bool = False,
 ) -> torch.Tensor:
     """
     Decodes video frames using the specified backend.
@@ -54,6 +249,15 @@ def decode_video_frames(
         timestamps (list[float]): List of timestamps to extract frames.
         tolerance_s (float): Allowed deviation in seconds for frame retrieval.
         backend (str, optional): Backend to use for decoding. Defaults to "torchcodec" when available in the platform; otherwise, defaults to "pyav"..
+        decoder_cache (VideoDecoderCache | None, optional): If provided, the video decoder is taken from (and
+            kept open in) this cache instead of being opened for this call only. Defaults to None.
+        frame_cache (DecodedFrameCache | None, optional): If provided, frames already decoded by a previous
+            call are read from this cache and only the missing ones are decoded (and added to it). Requires
+            `fps`. Defaults to None.
+        fps (int | None, optional): Frame rate of the video, used to convert `timestamps` to the frame indices
+            keying `frame_cache`. Defaults to None.
+        return_uint8 (bool, optional): Return frames as uint8 in [0, 255] instead of float32 in [0, 1].
+            Defaults to False.
 
     Returns:
         torch.Tensor: Decoded frames.
@@ -62,12 +266,141 @@ def decode_video_frames(
     """
     if backend is None:
         backend = get_safe_default_codec()
+    if backend not in ["torchcodec", "pyav", "video_reader"]:
+        raise ValueError(f"Unsupported video backend: {backend}")
+
+    if frame_cache is None:
+        return _decode_video_frames(video_path, timestamps, tolerance_s, backend, decoder_cache, return_uint8)
+    if fps is None:
+        raise ValueError("`fps` is required to look up frames in `frame_cache`.")
+
+    frame_indices = [round(ts * fps) for ts in timestamps]
+    timestamp_by_index = dict(zip(frame_indices, timestamps, strict=True))
+    closest_frames = _get_frames_with_cache(
+        video_path,
+        frame_indices,
+        frame_cache,
+        lambda missing: _decode_video_frames(
+            video_path,
+            [timestamp_by_index[i] for i in missing],
+            tolerance_s,
+            backend,
+            decoder_cache,
+            return_uint8=True,
+        ),
+    )
+    if not return_uint8:
+        closest_frames = closest_frames.type(torch.float32) / 255
+    return closest_frames
+
+
+def decode_video_frames_at_indices(
+    video_path: Path | str,
+    frame_indices: list[int],
+    fps: int,
+    backend: str | None = None,
+    decoder_cache: VideoDecoderCache | None = None,
+    frame_cache: DecodedFrameCache | None = None,
+    return_uint8: bool = False,
+) -> torch.Tensor:
+    """
+    Decodes the frames of a video at the given frame indices (i.e. at timestamps `frame_indices / fps`).
+
+    Unlike `decode_video_frames`, the distance between requested and loaded timestamps is not checked here:
+    indices are expected to have been validated against the timestamps of the dataset beforehand (see
+    `get_video_frame_indices`). torchcodec reads frames by index directly, while the torchvision backends seek
+    to the timestamps of the frames and load the closest ones.
+
+    Args:
+        video_path (Path): Path to the video file.
+        frame_indices (list[int]): Indices of the frames to load.
+        fps (int): Frame rate of the video.
+        backend (str, optional): Backend to use for decoding. Defaults to "torchcodec" when available in the
+            platform; otherwise, defaults to "pyav".
+        decoder_cache (VideoDecoderCache | None, optional): See `decode_video_frames`. Defaults to None.
+        frame_cache (DecodedFrameCache | None, optional): See `decode_video_frames`. Defaults to None.
+        return_uint8 (bool, optional): Return frames as uint8 in [0, 255] instead of float32 in [0, 1].
+            Defaults to False.
+
+    Returns:
+        torch.Tensor: Decoded frames.
+    """
+    if backend is None:
+        backend = get_safe_default_codec()
+    if backend not in ["torchcodec", "pyav", "video_reader"]:
+        raise ValueError(f"Unsupported video backend: {backend}")
+
+    def decode(indices: list[int]) -> torch.Tensor:
+        if backend == "torchcodec":
+            if decoder_cache is not None:
+                decoder = decoder_cache.get(video_path, "torchcodec")
+            else:
+                decoder = open_video_decoder(video_path, "torchcodec")
+            return decoder.get_frames_at(indices=indices).data
+        # The closest frame is at most half a frame away from the timestamp of the requested one
+        return decode_video_frames_torchvision(
+            video_path,
+            [i / fps for i in indices],
+            0.5 / fps,
+            backend,
+            decoder_cache=decoder_cache,
+            return_uint8=True,
+        )
+
+    if frame_cache is None:
+        frames = decode(list(frame_indices))
+    else:
+        frames = _get_frames_with_cache(video_path, list(frame_indices), frame_cache, decode)
+    if not return_uint8:
+        frames = frames.type(torch.float32) / 255
+    return frames
+
+
+def _get_frames_with_cache(
+    video_path: Path | str,
+    frame_indices: list[int],
+    frame_cache: DecodedFrameCache,
+    decode_fn: Callable[[list[int]], torch.Tensor],
+) -> torch.Tensor:
+    """Returns the uint8 frames at `frame_indices`, decoding with `decode_fn` only those missing from the cache."""
+    frames = {}
+    missing = []
+    for frame_index in dict.fromkeys(frame_indices):
+        frame = frame_cache.get(video_path, frame_index)
+        if frame is None:
+            missing.append(frame_index)
+        else:
+            frames[frame_index] = frame
+
+    if missing:
+        for frame_index, frame in zip(missing, decode_fn(missing), strict=True):
+            frame_cache.put(video_path, frame_index, frame)
+            frames[frame_index] = frame
+
+    return torch.stack([frames[frame_index] for frame_index in frame_indices])
+
+
+def _decode_video_frames(
+    video_path: Path | str,
+    timestamps: list[float],
+    tolerance_s: float,
+    backend: str,
+    decoder_cache: VideoDecoderCache | None,
+    return_uint8: bool,
+) -> torch.Tensor:
     if backend == "torchcodec":
-        return decode_video_frames_torchcodec(video_path, timestamps, tolerance_s)
-    elif backend in ["pyav", "video_reader"]:
-        return decode_video_frames_torchvision(video_path, timestamps, tolerance_s, backend)
+        return decode_video_frames_torchcodec(
+            video_path, timestamps, tolerance_s, decoder_cache=decoder_cache, return_uint8=return_uint8
+        )
     else:
-        raise ValueError(f"Unsupported video backend: {backend}")
+        return decode_video_frames_torchvision(
+            video_path,
+            timestamps,
+            tolerance_s,
+            backend,
+            decoder_cache=decoder_cache,
+            return_uint8=return_uint8,
+        )
 
 
 def decode_video_frames_torchvision(
@@ -76,6 +409,8 @@ def decode_video_frames_torchvision(
     tolerance_s: float,
     backend: str = "pyav",
     log_loaded_timestamps: bool = False,
+    decoder_cache: VideoDecoderCache | None = None,
+    return_uint8: bool = False,
 ) -> torch.Tensor:
     """Loads frames associated to the requested timestamps of a video
 
@@ -106,7 +441,10 @@ def decode_video_frames_torchvision(
 
     # set a video stream reader
     # TODO(rcadene): also load audio stream at the same time
-    reader = torchvision.io.VideoReader(video_path, "video")
+    if decoder_cache is not None:
+        reader = decoder_cache.get(video_path, backend)
+    else:
+        reader = torchvision.io.VideoReader(video_path, "video")
 
     # set the first and last requested timestamps
     # Note: previous timestamps are usually loaded, since we need to access the previous key frame
@@ -130,7 +468,7 @@ def decode_video_frames_torchvision(
         if current_ts >= last_ts:
             break
 
-    if backend == "pyav":
+    if decoder_cache is None and backend == "pyav":
         reader.container.close()
 
     reader = None
@@ -162,7 +500,8 @@ def decode_video_frames_torchvision(
         logging.info(f"{closest_ts=}")
 
     # convert to the pytorch format which is float32 in [0,1] range (and channel first)
-    closest_frames = closest_frames.type(torch.float32) / 255
+    if not return_uint8:
+        closest_frames = closest_frames.type(torch.float32) / 255
 
     assert len(timestamps) == len(closest_frames)
     return closest_frames
@@ -174,11 +513,15 @@ def decode_video_frames_torchcodec(
     tolerance_s: float,
     device: str = "cpu",
     log_loaded_timestamps: bool = False,
+    decoder_cache: VideoDecoderCache | None = None,
+    return_uint8: bool = False,
 ) -> torch.Tensor:
     """Loads frames associated with the requested timestamps of a video using torchcodec.
 
     Note: Setting device="cuda" outside the main process, e.g. in data loader workers, will lead to CUDA initialization errors.
 
+    Note: Decoders provided by `decoder_cache` are always opened on cpu, `device` is then ignored.
+
     Note: Video benefits from inter-frame compression. Instead of storing every frame individually,
     the encoder stores a reference frame (or a key frame) and subsequent frames as differences relative to
     that key frame. As a consequence, to access a requested frame, we need to load the preceding key frame,
@@ -186,13 +529,11 @@ def decode_video_frames_torchcodec(
     can be adjusted during encoding to take into account decoding time and video size in bytes.
     """
 
-    if importlib.util.find_spec("torchcodec"):
-        from torchcodec.decoders import VideoDecoder
-    else:
-        raise ImportError("torchcodec is required but not available.")
-
     # initialize video decoder
-    decoder = VideoDecoder(video_path, device=device, seek_mode="approximate")
+    if decoder_cache is not None:
+        decoder = decoder_cache.get(video_path, "torchcodec")
+    else:
+        decoder = open_video_decoder(video_path, "torchcodec", device=device)
     loaded_frames = []
     loaded_ts = []
     # get metadata for frame information
@@ -237,12 +578,65 @@ def decode_video_frames_torchcodec(
         logging.info(f"{closest_ts=}")
 
     # convert to float32 in [0,1] range (channel first)
-    closest_frames = closest_frames.type(torch.float32) / 255
+    if not return_uint8:
+        closest_frames = closest_frames.type(torch.float32) / 255
 
     assert len(timestamps) == len(closest_frames)
     return closest_frames
 
 
+def get_video_encoding_options(
+    vcodec: str,
+    pix_fmt: str,
+    g: int | None,
+    crf: int | None,
+    fast_decode: int,
+    num_threads: int | None = None,
+) -> tuple[str, dict[str, str]]:
+    """Checks the encoding parameters, and returns the pixel format and the codec options of the encoder.
+
+    `num_threads` limits the threads used by the encoder, which otherwise uses all the cores.
+    """
+    # Check encoder availability
+    if vcodec not in ["h264", "hevc", "libsvtav1"]:
+        raise ValueError(f"Unsupported video codec: {vcodec}. Supported codecs are: h264, hevc, libsvtav1.")
+
+    # Encoders/pixel formats incompatibility check
+    if (vcodec == "libsvtav1" or vcodec == "hevc") and pix_fmt == "yuv444p":
+        logging.warning(
+            f"Incompatible pixel format 'yuv444p' for codec {vcodec}, auto-selecting format 'yuv420p'"
+        )
+        pix_fmt = "yuv420p"
+
+    # Define video codec options
+    video_options = {}
+
+    if g is not None:
+        video_options["g"] = str(g)
+
+    if crf is not None:
+        video_options["crf"] = str(crf)
+
+    svtav1_params = []
+    if fast_decode:
+        if vcodec == "libsvtav1":
+            svtav1_params.append(f"fast-decode={fast_decode}")
+        else:
+            video_options["tune"] = "fastdecode"
+
+    if num_threads is not None:
+        # libsvtav1 ignores the generic `threads` option
+        if vcodec == "libsvtav1":
+            svtav1_params.append(f"lp={num_threads}")
+        else:
+            video_options["threads"] = str(num_threads)
+
+    if svtav1_params:
+        video_options["svtav1-params"] = ":".join(svtav1_params)
+
+    return pix_fmt, video_options
+
+
 def encode_video_frames(
     imgs_dir: Path | str,
     video_path: Path | str,
@@ -254,24 +648,16 @@ def encode_video_frames(
     fast_decode: int = 0,
     log_level: int | None = av.logging.ERROR,
     overwrite: bool = False,
+    num_threads: int | None = None,
 ) -> None:
     """More info on ffmpeg arguments tuning on `benchmark/video/README.md`"""
-    # Check encoder availability
-    if vcodec not in ["h264", "hevc", "libsvtav1"]:
-        raise ValueError(f"Unsupported video codec: {vcodec}. Supported codecs are: h264, hevc, libsvtav1.")
+    pix_fmt, video_options = get_video_encoding_options(vcodec, pix_fmt, g, crf, fast_decode, num_threads)
 
     video_path = Path(video_path)
     imgs_dir = Path(imgs_dir)
 
     video_path.parent.mkdir(parents=True, exist_ok=overwrite)
 
-    # Encoders/pixel formats incompatibility check
-    if (vcodec == "libsvtav1" or vcodec == "hevc") and pix_fmt == "yuv444p":
-        logging.warning(
-            f"Incompatible pixel format 'yuv444p' for codec {vcodec}, auto-selecting format 'yuv420p'"
-        )
-        pix_fmt = "yuv420p"
-
     # Get input frames
     template = "frame_" + ("[0-9]" * 6) + ".png"
     input_list = sorted(
@@ -284,20 +670,6 @@ def encode_video_frames(
     dummy_image = Image.open(input_list[0])
     width, height = dummy_image.size
 
-    # Define video codec options
-    video_options = {}
-
-    if g is not None:
-        video_options["g"] = str(g)
-
-    if crf is not None:
-        video_options["crf"] = str(crf)
-
-    if fast_decode:
-        key = "svtav1-params" if vcodec == "libsvtav1" else "tune"
-        value = f"fast-decode={fast_decode}" if vcodec == "libsvtav1" else "fastdecode"
-        video_options[key] = value
-
     # Set logging level
     if log_level is not None:
         # "While less efficient, it is generally preferable to modify logging with Python’s logging"
@@ -331,6 +703,374 @@ def encode_video_frames(
         raise OSError(f"Video encoding did not work. File not found: {video_path}.")
 
 
+class StreamingVideoEncoder:
+    """Encodes the frames of a camera into a video while they are being recorded, instead of writing them as
+    PNG files encoded once the episode is over (see `encode_video_frames`, whose encoding parameters are the
+    same). Frames are converted, encoded and muxed by a background thread, which also computes their stats, so
+    that `add_frame` only queues them. When the thread falls behind by `max_queue_size` frames, `add_frame`
+    blocks until it catches up.
+
+    `frame_shape` is the (height, width, channels) shape of the frames, which tells channel first frames from
+    channel last ones. Without it, frames with 3 values along their first dimension and not along their last
+    one are considered channel first.
+    """
+
+    def __init__(
+        self,
+        video_path: Path | str,
+        fps: int,
+        vcodec: str = "libsvtav1",
+        pix_fmt: str = "yuv420p",
+        g: int | None = 2,
+        crf: int | None = 30,
+        fast_decode: int = 0,
+        max_queue_size: int = 256,
+        frame_shape: tuple[int, int, int] | None = None,
+    ):
+        self.video_path = Path(video_path)
+        self.fps = fps
+        self.vcodec = vcodec
+        self.frame_shape = tuple(frame_shape) if frame_shape is not None else None
+        self.num_frames = 0
+        self.pix_fmt, self.video_options = get_video_encoding_options(vcodec, pix_fmt, g, crf, fast_decode)
+        self.stats = RunningImageStats(frame_shape=self.frame_shape)
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self._error = None
+        self._cancelled = False
+
+        self.video_path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self._thread.start()
+
+    def add_frame(self, image: np.ndarray | Image.Image) -> None:
+        """Queues an RGB image, either uint8 or float in [0, 1], with channels first or last."""
+        if self._error is not None:
+            raise RuntimeError(f"Encoding of {self.video_path} failed.") from self._error
+        self.queue.put(image)
+
+    def _encode_loop(self) -> None:
+        try:
+            with av.open(str(self.video_path), "w") as output:
+                output_stream = None
+                while (image := self.queue.get()) is not None:
+                    if self._cancelled:
+                        continue
+                    image = np.asarray(image)
+                    if is_channel_first(image, self.frame_shape):
+                        image = image.transpose(1, 2, 0)
+                    if image.dtype != np.uint8:
+                        image = (image * 255).astype(np.uint8)
+                    self.stats.update(image)
+
+                    if output_stream is None:
+                        output_stream = output.add_stream(self.vcodec, self.fps, options=self.video_options)
+                        output_stream.pix_fmt = self.pix_fmt
+                        output_stream.height, output_stream.width = image.shape[:2]
+                    frame = av.VideoFrame.from_ndarray(np.ascontiguousarray(image), format="rgb24")
+                    output.mux(output_stream.encode(frame))
+                    self.num_frames += 1
+
+                # Flush the encoder
+                if output_stream is not None:
+                    output.mux(output_stream.encode())
+        except Exception as e:
+            self._error = e
+            # Keep consuming the frames so that `add_frame` doesn't block
+            while self.queue.get() is not None:
+                pass
+
+    def finish(self) -> dict[str, np.ndarray]:
+        """Waits for the queued frames to be encoded, closes the video and returns the stats of its frames."""
+        self.queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError(f"Encoding of {self.video_path} failed.") from self._error
+        if self.num_frames == 0:
+            self.video_path.unlink(missing_ok=True)
+            raise RuntimeError(f"No frame was added to {self.video_path}, the video can't be encoded.")
+        if not self.video_path.exists():
+            raise OSError(f"Video encoding did not work. File not found: {self.video_path}.")
+        return self.stats.get_stats()
+
+    def cancel(self) -> None:
+        """Drops the queued frames and removes the video."""
+        self._cancelled = True
+        self.queue.put(None)
+        self._thread.join()
+        self.video_path.unlink(missing_ok=True)
+
+
+def concatenate_video_files(video_paths: list[Path | str], output_path: Path | str, fps: int) -> list[float]:
+    """Concatenates videos encoded with the same parameters (codec, resolution, time base) into a single video,
+    without re-encoding them: their packets are copied with timestamps shifted after the previous videos.
+
+    Returns:
+        list[float]: Timestamp in the output video of the first frame of each input video.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    offsets = []
+    offset = Fraction(0)
+    with av.open(str(output_path), "w", format="mp4") as output:
+        output_stream = None
+        for video_path in video_paths:
+            with av.open(str(video_path)) as input_container:
+                input_stream = input_container.streams.video[0]
+                if output_stream is None:
+                    output_stream = output.add_stream_from_template(input_stream, opaque=True)
+                shift = round(offset / input_stream.time_base)
+                num_frames = 0
+                for packet in input_container.demux(input_stream):
+                    # Skip the empty packets flushing the demuxer
+                    if packet.dts is None:
+                        continue
+                    packet.pts += shift
+                    packet.dts += shift
+                    packet.stream = output_stream
+                    output.mux(packet)
+                    num_frames += 1
+            offsets.append(float(offset))
+            offset += Fraction(num_frames, fps)
+    return offsets
+
+
+def get_video_keyframe_indices(video_path: Path | str, fps: int) -> tuple[list[int], int]:
+    """Reads the packets of a video, without decoding them.
+
+    Returns:
+        tuple[list[int], int]: Indices of the keyframes, from which the video can be decoded without the
+            previous frames, and number of frames of the video.
+    """
+    keyframes = []
+    num_frames = 0
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        for packet in container.demux(stream):
+            if packet.dts is None:
+                continue
+            if packet.is_keyframe:
+                keyframes.append(round(packet.pts * packet.time_base * fps))
+            num_frames += 1
+    return sorted(keyframes), num_frames
+
+
+def trim_video_file(
+    video_path: Path | str,
+    output_path: Path | str,
+    start: int,
+    end: int,
+    fps: int,
+    g: int | None = 2,
+    crf: int | None = 30,
+    fast_decode: int = 0,
+) -> dict[str, np.ndarray] | None:
+    """Writes the frames `start` to `end` (excluded) of a video in `output_path`, starting at timestamp 0.
+
+    When `start` is a keyframe and `end` is a keyframe or the end of the video, the packets of these frames
+    are copied without re-encoding them. Otherwise, the frames are decoded and encoded again with the codec
+    and pixel format of the video, and with `g`, `crf` and `fast_decode` (see `StreamingVideoEncoder`).
+
+    Returns:
+        dict[str, np.ndarray] | None: Stats of the frames when they were re-encoded, None otherwise.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    keyframes, num_frames = get_video_keyframe_indices(video_path, fps)
+    with av.open(str(video_path)) as input_container:
+        input_stream = input_container.streams.video[0]
+        if start in keyframes and (end in keyframes or end >= num_frames):
+            shift = round(Fraction(start, fps) / input_stream.time_base)
+            with av.open(str(output_path), "w", format="mp4") as output:
+                output_stream = output.add_stream_from_template(input_stream, opaque=True)
+                for packet in input_container.demux(input_stream):
+                    if packet.dts is None or not start <= round(packet.pts * packet.time_base * fps) < end:
+                        continue
+                    packet.pts -= shift
+                    packet.dts -= shift
+                    packet.stream = output_stream
+                    output.mux(packet)
+            return None
+
+        # Encoders of the codecs supported by `get_video_encoding_options`
+        codec_name = input_stream.codec.canonical_name
+        vcodec = {"av1": "libsvtav1"}.get(codec_name, codec_name)
+        encoder = StreamingVideoEncoder(
+            output_path,
+            fps,
+            vcodec=vcodec,
+            pix_fmt=input_stream.pix_fmt,
+            g=g,
+            crf=crf,
+            fast_decode=fast_decode,
+        )
+        try:
+            for frame in input_container.decode(input_stream):
+                frame_index = round(frame.pts * frame.time_base * fps)
+                if frame_index >= end:
+                    break
+                if frame_index >= start:
+                    encoder.add_frame(frame.to_ndarray(format="rgb24"))
+        except Exception:
+            encoder.cancel()
+            raise
+        return encoder.finish()
+
+
+# Largest keyframe interval picked for an access pattern, around 8s of video at 30 fps
+MAX_GOP_SIZE = 240
+
+
+@dataclass
+class VideoEncodingProfile:
+    """Encoding parameters of the videos of a dataset, chosen from the way they are read in training.
+
+    Decoding a frame starts from the keyframe which precedes it. When items are drawn at random, each access
+    thus decodes on average `(g - 1) / 2` frames which are not used. `from_access_pattern` picks the largest
+    GOP (keyframe interval `g`) for which this overhead is at most half of the frames read by an access:
+    the frames of `frame_window`, the offsets of the video frames of an item (see `delta_timestamps`), for
+    each of the `block_size` consecutive items read from the same episode (see `EpisodeAwareSampler`).
+    Larger GOPs make smaller files. Videos only read sequentially (`block_size=None`) use `MAX_GOP_SIZE`.
+    Single frames read at random (the default) give `g=2`, the default of `encode_video_frames`.
+
+    The profile of a dataset is recorded in "video_encoding" of `meta/info.json` (see
+    `LeRobotDatasetMetadata.create`). With `probe_decode`, the latency of decoding its first videos with this
+    access pattern is also recorded (see `probe_decode_latency`). The probe decodes the videos of the first
+    episode when it is saved, which delays recording, so it is off by default. When `max_decode_latency_ms`
+    is set, a warning is logged if the probed latency exceeds it.
+
+    Example:
+
+    ```python
+    profile = VideoEncodingProfile.from_delta_timestamps(
+        {"observation.images.top": [-0.1, 0.0]}, fps=10, block_size=8, fast_decode=1, probe_decode=True
+    )
+    dataset = LeRobotDataset.create(repo_id, fps=10, features=features, video_encoding=profile)
+    ```
+    """
+
+    vcodec: str = "libsvtav1"
+    pix_fmt: str = "yuv420p"
+    g: int | None = 2
+    crf: int | None = 30
+    fast_decode: int = 0
+    frame_window: list[int] = field(default_factory=lambda: [0])
+    block_size: int | None = 1
+    probe_decode: bool = False
+    max_decode_latency_ms: float | None = None
+    decode_probe: dict[str, dict] = field(default_factory=dict)
+
+    @classmethod
+    def from_access_pattern(
+        cls,
+        frame_window: list[int],
+        block_size: int | None = 1,
+        max_gop_size: int = MAX_GOP_SIZE,
+        **kwargs,
+    ) -> "VideoEncodingProfile":
+        """Creates a profile whose GOP is picked from `frame_window` and `block_size` (see the class
+        docstring). `kwargs` are the other fields of the profile (e.g. `crf` or `fast_decode`)."""
+        if len(frame_window) == 0:
+            raise ValueError("frame_window must contain at least one frame offset.")
+        if block_size is not None and block_size < 1:
+            raise ValueError(f"block_size must be a positive integer or None, but is {block_size}.")
+        if block_size is None:
+            g = max_gop_size
+        else:
+            frames_per_access = block_size + max(frame_window) - min(frame_window)
+            g = min(max(frames_per_access + 1, 2), max_gop_size)
+        frame_window = sorted(set(frame_window))
+        return cls(g=g, frame_window=frame_window, block_size=block_size, **kwargs)
+
+    @classmethod
+    def from_delta_timestamps(
+        cls,
+        delta_timestamps: dict[str, list[float]] | None,
+        fps: int,
+        video_keys: list[str] | None = None,
+        block_size: int | None = 1,
+        **kwargs,
+    ) -> "VideoEncodingProfile":
+        """Creates a profile for the `delta_timestamps` of a policy (e.g. from
+        `lerobot.datasets.factory.resolve_delta_timestamps`). Only those of `video_keys` are considered when
+        they are given, and items without `delta_timestamps` read a single frame."""
+        frame_window = [
+            round(d * fps)
+            for key, delta_ts in (delta_timestamps or {}).items()
+            if video_keys is None or key in video_keys
+            for d in delta_ts
+        ]
+        return cls.from_access_pattern(frame_window or [0], block_size, **kwargs)
+
+    @classmethod
+    def from_dict(cls, profile: dict) -> "VideoEncodingProfile":
+        return cls(**profile)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def encoding_kwargs(self) -> dict:
+        """Arguments of `encode_video_frames` and `StreamingVideoEncoder` for this profile."""
+        return {
+            "vcodec": self.vcodec,
+            "pix_fmt": self.pix_fmt,
+            "g": self.g,
+            "crf": self.crf,
+            "fast_decode": self.fast_decode,
+        }
+
+
+def probe_decode_latency(
+    video_path: Path | str,
+    fps: int,
+    frame_window: list[int],
+    block_size: int | None = 1,
+    backend: str | None = None,
+    num_items: int = 32,
+    seed: int = 0,
+) -> dict:
+    """Measures the latency of loading the frames of items from a video, as `LeRobotDataset` does in training.
+
+    Items are read by blocks of `block_size` consecutive frames starting at random positions (a single block
+    from the first frame when `block_size` is None), and each of them loads the frames of `frame_window`
+    around its frame, clamped to the video. Decoders are kept open across items (see `VideoDecoderCache`).
+
+    Returns:
+        dict: The backend, the number of items read and the median and 99th percentile latencies of an item
+            in milliseconds.
+    """
+    if backend is None:
+        backend = get_safe_default_codec()
+    _, num_frames = get_video_keyframe_indices(video_path, fps)
+    rng = np.random.default_rng(seed)
+    if block_size is None:
+        items = list(range(min(num_items, num_frames)))
+    else:
+        items = []
+        while len(items) < num_items:
+            start = int(rng.integers(0, num_frames))
+            items.extend(range(start, min(start + block_size, num_frames)))
+        items = items[:num_items]
+
+    decoder_cache = VideoDecoderCache(max_size=1)
+    latencies = []
+    try:
+        for frame_index in items:
+            indices = [min(max(frame_index + d, 0), num_frames - 1) for d in frame_window]
+            start_time = time.perf_counter()
+            decode_video_frames_at_indices(
+                video_path, indices, fps, backend, decoder_cache=decoder_cache, return_uint8=True
+            )
+            latencies.append(time.perf_counter() - start_time)
+    finally:
+        decoder_cache.clear()
+    return {
+        "backend": backend,
+        "num_items": len(latencies),
+        "p50_ms": float(np.percentile(latencies, 50) * 1e3),
+        "p99_ms": float(np.percentile(latencies, 99) * 1e3),
+    }
+
+
 @dataclass
 class VideoFrame:
     # TODO(rcadene, lhoestq): move to Hugging Face `datasets` repo
@@ -459,6 +1199,7 @@ class VideoEncodingManager:
     Context manager that ensures proper video encoding and data cleanup even if exceptions occur.
 
     This manager handles:
+    - Finalizing the episodes saved asynchronously
     - Batch encoding for any remaining episodes when recording interrupted
     - Cleaning up temporary image files from interrupted episodes
     - Removing empty image directories
@@ -474,8 +1215,20 @@ class VideoEncodingManager:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        # Wait for the saved episodes to be written
+        finalized = True
+        if exc_type is None:
+            self.dataset.flush()
+        else:
+            # Raising here would hide the original exception and skip the cleanup below
+            try:
+                self.dataset.flush()
+            except Exception:
+                logging.exception("Finalizing the saved episodes failed while handling another exception.")
+                finalized = False
+
         # Handle any remaining episodes that haven't been batch encoded
-        if self.dataset.episodes_since_last_encoding > 0:
+        if finalized and self.dataset.episodes_since_last_encoding > 0:
             if exc_type is not None:
                 logging.info("Exception occurred. Encoding remaining episodes before exit...")
             else:
@@ -489,8 +1242,9 @@ class VideoEncodingManager:
             )
             self.dataset.batch_encode_videos(start_ep, end_ep)
 
-        # Clean up episode images if recording was interrupted
+        # Clean up episode images and videos if recording was interrupted
         if exc_type is not None:
+            self.dataset._cancel_video_encoders()
             interrupted_episode_index = self.dataset.num_episodes
             for key in self.dataset.meta.video_keys:
                 img_dir = self.dataset._get_image_file_path(
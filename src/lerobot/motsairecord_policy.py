@@ -84,6 +84,8 @@ class DatasetRecordConfig:
     num_image_writer_threads_per_camera: int = 4
     # Number of episodes to record before batch encoding videos
     video_encoding_batch_size: int = 1
+    # Save episodes in the background, so that the reset period and the next episode start right away
+    async_finalization: bool = False
 
     def __post_init__(self):
         if self.single_task is None:
@@ -253,6 +255,7 @@ def create_dataset_from_config(dataset_config: DatasetRecordConfig, robot_config
         image_writer_threads=dataset_config.num_image_writer_threads_per_camera,
         video_backend=None,
         batch_encoding_size=dataset_config.video_encoding_batch_size,
+        async_finalization=dataset_config.async_finalization,
     )
     
     return dataset
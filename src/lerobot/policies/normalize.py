@@ -158,6 +158,11 @@ class Normalize(nn.Module):
                 # FIXME(aliberts, rcadene): This might lead to silent fail!
                 continue
 
+            if ft.type is FeatureType.VISUAL and batch[key].dtype == torch.uint8:
+                # Frames loaded as uint8 (see `LeRobotDataset(return_uint8=True)`) are converted to float in
+                # [0,1] here, on the device of the batch, exactly like the dataset would have done.
+                batch[key] = batch[key].type(torch.float32) / 255
+
             norm_mode = self.norm_map.get(ft.type, NormalizationMode.IDENTITY)
             if norm_mode is NormalizationMode.IDENTITY:
                 continue
@@ -343,6 +348,10 @@ class NormalizeBuffer(nn.Module):
             if key not in batch:
                 continue
 
+            if ft.type is FeatureType.VISUAL and batch[key].dtype == torch.uint8:
+                # See `Normalize.forward`
+                batch[key] = batch[key].type(torch.float32) / 255
+
             norm_mode = self.norm_map.get(ft.type, NormalizationMode.IDENTITY)
             if norm_mode is NormalizationMode.IDENTITY:
                 continue
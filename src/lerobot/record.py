@@ -70,6 +70,8 @@ from lerobot.cameras.opencv.configuration_opencv import OpenCVCameraConfig  # no
 from lerobot.cameras.realsense.configuration_realsense import RealSenseCameraConfig  # noqa: F401
 from lerobot.configs import parser
 from lerobot.configs.policies import PreTrainedConfig
+from lerobot.constants import HF_LEROBOT_HOME
+from lerobot.datasets.episode_finalizer import recover_unfinished_episodes
 from lerobot.datasets.image_writer import safe_stop_image_writer
 from lerobot.datasets.lerobot_dataset import LeRobotDataset
 from lerobot.datasets.utils import build_dataset_frame, hw_to_dataset_features
@@ -149,9 +151,23 @@ class DatasetRecordConfig:
     # Too many threads might cause unstable teleoperation fps due to main thread being blocked.
     # Not enough threads might cause low camera fps.
     num_image_writer_threads_per_camera: int = 4
+    # Maximum number of frames waiting to be written as png images. When the image writer falls behind,
+    # recording blocks until it catches up instead of using more memory. Set to 0 for no limit.
+    image_writer_queue_size: int = 0
+    # When the image writer falls behind with a limited queue, drop the new frames instead of blocking
+    # recording. Dropped frames are replaced by the previous frame of their episode when it is saved.
+    image_writer_drop_when_full: bool = False
     # Number of episodes to record before batch encoding videos
     # Set to 1 for immediate encoding (default behavior), or higher for batched encoding
     video_encoding_batch_size: int = 1
+    # Number of videos encoded concurrently by processes when batch encoding. Each of them gets an equal share
+    # of the cores.
+    video_encoding_workers: int = 1
+    # Encode the frames of the cameras into videos while recording, instead of writing them as PNG images
+    # encoded at the end of each episode. This makes saving episodes almost instant.
+    streaming_encoding: bool = False
+    # Save episodes in the background, so that the reset period and the next episode start right away.
+    async_finalization: bool = False
 
     def __post_init__(self):
         if self.single_task is None:
@@ -321,16 +337,25 @@ def record(cfg: RecordConfig) -> LeRobotDataset:
     dataset_features = {**action_features, **obs_features}
 
     if cfg.resume:
+        # Remove the files of the episodes which were being saved if the previous recording crashed
+        root = cfg.dataset.root if cfg.dataset.root else HF_LEROBOT_HOME / cfg.dataset.repo_id
+        recover_unfinished_episodes(root)
         dataset = LeRobotDataset(
             cfg.dataset.repo_id,
             root=cfg.dataset.root,
             batch_encoding_size=cfg.dataset.video_encoding_batch_size,
+            streaming_encoding=cfg.dataset.streaming_encoding,
+            batch_encoding_workers=cfg.dataset.video_encoding_workers,
         )
+        if cfg.dataset.async_finalization:
+            dataset.start_episode_finalizer()
 
         if hasattr(robot, "cameras") and len(robot.cameras) > 0:
             dataset.start_image_writer(
                 num_processes=cfg.dataset.num_image_writer_processes,
                 num_threads=cfg.dataset.num_image_writer_threads_per_camera * len(robot.cameras),
+                max_queue_size=cfg.dataset.image_writer_queue_size,
+                drop_when_full=cfg.dataset.image_writer_drop_when_full,
             )
         sanity_check_dataset_robot_compatibility(dataset, robot, cfg.dataset.fps, dataset_features)
     else:
@@ -345,7 +370,12 @@ def record(cfg: RecordConfig) -> LeRobotDataset:
             use_videos=cfg.dataset.video,
             image_writer_processes=cfg.dataset.num_image_writer_processes,
             image_writer_threads=cfg.dataset.num_image_writer_threads_per_camera * len(robot.cameras),
+            image_writer_queue_size=cfg.dataset.image_writer_queue_size,
+            image_writer_drop_when_full=cfg.dataset.image_writer_drop_when_full,
             batch_encoding_size=cfg.dataset.video_encoding_batch_size,
+            streaming_encoding=cfg.dataset.streaming_encoding,
+            async_finalization=cfg.dataset.async_finalization,
+            batch_encoding_workers=cfg.dataset.video_encoding_workers,
         )
 
     # Load pretrained policy
@@ -398,6 +428,8 @@ def record(cfg: RecordConfig) -> LeRobotDataset:
 
             dataset.save_episode()
             recorded_episodes += 1
+            if dataset.image_writer is not None:
+                logging.info(f"Image writer: {dataset.image_writer.get_metrics()}")
 
     log_say("Stop recording", cfg.play_sounds, blocking=True)
 
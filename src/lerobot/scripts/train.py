@@ -28,6 +28,7 @@ from lerobot.configs import parser
 from lerobot.configs.train import TrainPipelineConfig
 from lerobot.datasets.factory import make_dataset
 from lerobot.datasets.sampler import EpisodeAwareSampler
+from lerobot.datasets.transforms import BatchImageTransforms
 from lerobot.datasets.utils import cycle
 from lerobot.envs.factory import make_env
 from lerobot.optim.factory import make_optimizer_and_scheduler
@@ -163,12 +164,13 @@ def train(cfg: TrainPipelineConfig):
     logging.info(f"{num_total_params=} ({format_big_number(num_total_params)})")
 
     # create dataloader for offline training
-    if hasattr(cfg.policy, "drop_n_last_frames"):
+    if hasattr(cfg.policy, "drop_n_last_frames") or cfg.sampler_block_size > 1:
         shuffle = False
         sampler = EpisodeAwareSampler(
             dataset.episode_data_index,
-            drop_n_last_frames=cfg.policy.drop_n_last_frames,
+            drop_n_last_frames=getattr(cfg.policy, "drop_n_last_frames", 0),
             shuffle=True,
+            block_size=cfg.sampler_block_size,
         )
     else:
         shuffle = True
@@ -185,6 +187,10 @@ def train(cfg: TrainPipelineConfig):
     )
     dl_iter = cycle(dataloader)
 
+    batch_image_transforms = None
+    if cfg.dataset.image_transforms.enable and cfg.dataset.image_transforms.batched:
+        batch_image_transforms = BatchImageTransforms(cfg.dataset.image_transforms)
+
     policy.train()
 
     train_metrics = {
@@ -209,6 +215,10 @@ def train(cfg: TrainPipelineConfig):
             if isinstance(batch[key], torch.Tensor):
                 batch[key] = batch[key].to(device, non_blocking=device.type == "cuda")
 
+        if batch_image_transforms is not None:
+            for key in dataset.camera_keys:
+                batch[key] = batch_image_transforms(batch[key])
+
         train_tracker, output_dict = update_policy(
             train_tracker,
             policy,
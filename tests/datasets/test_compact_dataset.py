@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+import pytest
+import torch
+
+from lerobot.datasets.compact_dataset import compact_dataset
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+from lerobot.datasets.streaming_dataset import StreamingLeRobotDataset
+from tests.fixtures.constants import DUMMY_HWC, DUMMY_REPO_ID
+
+
+def assert_items_equal(item, expected):
+    assert item.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, torch.Tensor):
+            assert torch.equal(item[key], value), key
+        else:
+            assert item[key] == value, key
+
+
+@pytest.fixture
+def dataset_root(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "video": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+    }
+    root = tmp_path / "test"
+    dataset = empty_lerobot_dataset_factory(root=root, features=features, use_videos=True)
+    for ep_length in [5, 7, 4]:
+        for _ in range(ep_length):
+            frame = {
+                "video": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8),
+                "state": torch.randn(2),
+            }
+            dataset.add_frame(frame, task="Dummy task")
+        dataset.save_episode()
+    return root
+
+
+def test_compact_dataset(dataset_root):
+    kwargs = {
+        "root": dataset_root,
+        "delta_timestamps": {"video": [-1 / 30, 0], "state": [0, 1 / 30]},
+        "video_backend": "pyav",
+    }
+    expected = list(LeRobotDataset(DUMMY_REPO_ID, **kwargs))
+    expected_subset = list(LeRobotDataset(DUMMY_REPO_ID, episodes=[0, 1], **kwargs))
+
+    meta = compact_dataset(DUMMY_REPO_ID, root=dataset_root)
+    assert meta.multi_episode_files
+    assert [ep["data_row_offset"] for ep in meta.episodes.values()] == [0, 5, 12]
+    assert meta.get_data_row_range(2) == (12, 16)
+    assert not list(dataset_root.glob("data/**/episode_*")) + list(dataset_root.glob("videos/**/episode_*"))
+    assert sorted(
+        str(p.relative_to(dataset_root)) for p in dataset_root.glob("*/chunk-000/**/episodes.*")
+    ) == [
+        "data/chunk-000/episodes.parquet",
+        "videos/chunk-000/video/episodes.mp4",
+    ]
+    # Compacting again is a no-op
+    compact_dataset(DUMMY_REPO_ID, root=dataset_root)
+
+    dataset = LeRobotDataset(DUMMY_REPO_ID, **kwargs)
+    assert len(dataset) == len(expected)
+    for item, expected_item in zip(dataset, expected, strict=True):
+        assert_items_equal(item, expected_item)
+
+    subset = LeRobotDataset(DUMMY_REPO_ID, episodes=[0, 1], **kwargs)
+    assert len(subset) == len(expected_subset)
+    for item, expected_item in zip(subset, expected_subset, strict=True):
+        assert_items_equal(item, expected_item)
+
+    streaming = StreamingLeRobotDataset(DUMMY_REPO_ID, shuffle=False, video_chunk_size=2, **kwargs)
+    for item, expected_item in zip(streaming, expected, strict=True):
+        assert_items_equal(item, expected_item)
+
+    with pytest.raises(NotImplementedError):
+        dataset.save_episode()
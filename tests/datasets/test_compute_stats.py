@@ -17,8 +17,11 @@ from unittest.mock import patch
 
 import numpy as np
 import pytest
+from PIL import Image
 
 from lerobot.datasets.compute_stats import (
+    RunningFeatureStats,
+    RunningImageStats,
     _assert_type_and_shape,
     aggregate_feature_stats,
     aggregate_stats,
@@ -27,6 +30,7 @@ from lerobot.datasets.compute_stats import (
     get_feature_stats,
     sample_images,
     sample_indices,
+    subtract_stats,
 )
 
 
@@ -307,3 +311,96 @@ def test_aggregate_stats():
             results[fkey]["std"], expected_agg_stats[fkey]["std"], atol=1e-04, rtol=1e-04
         )
         np.testing.assert_allclose(results[fkey]["count"], expected_agg_stats[fkey]["count"])
+
+
+@pytest.mark.parametrize("shape", [(), (1,), (2, 3)])
+def test_running_feature_stats(shape):
+    data = np.random.default_rng(0).normal(1e4, 1.0, (50, *shape)).astype(np.float32)
+    running_stats = RunningFeatureStats()
+    for value in data:
+        running_stats.update(value)
+
+    expected = get_feature_stats(data, axis=0, keepdims=data.ndim == 1)
+    stats = running_stats.get_stats()
+    for k, v in expected.items():
+        assert stats[k].shape == v.shape, k
+        np.testing.assert_allclose(stats[k], v, rtol=1e-5, err_msg=k)
+
+
+def test_running_image_stats():
+    images = np.random.default_rng(0).integers(0, 256, (10, 3, 32, 48), dtype=np.uint8)
+    running_stats = RunningImageStats(sample_every=3)
+    for i, image in enumerate(images):
+        # Channels first or last, uint8 or float
+        running_stats.update(image if i % 2 else image.transpose(1, 2, 0) / 255.0)
+
+    sampled = images[::3].astype(np.float64)
+    expected = get_feature_stats(sampled, axis=(0, 2, 3), keepdims=True)
+    expected = {k: v if k == "count" else np.squeeze(v / 255.0, axis=0) for k, v in expected.items()}
+    stats = running_stats.get_stats()
+    for k, v in expected.items():
+        assert stats[k].shape == v.shape, k
+        np.testing.assert_allclose(stats[k], v, atol=1e-3, err_msg=k)
+
+
+@pytest.mark.parametrize(
+    "frame_shape, channel_first",
+    [
+        ((64, 48, 1), True),
+        ((64, 48, 1), False),
+        ((32, 48, 4), False),
+        ((3, 48, 4), True),
+    ],
+)
+def test_running_image_stats_not_rgb(tmp_path, frame_shape, channel_first):
+    # Stats match those of the stored images, which are read as RGB
+    rng = np.random.default_rng(0)
+    images = rng.integers(0, 256, (5, *frame_shape), dtype=np.uint8)
+    running_stats = RunningImageStats(frame_shape=frame_shape)
+    paths = []
+    for i, image in enumerate(images):
+        running_stats.update(image.transpose(2, 0, 1) if channel_first else image)
+        paths.append(tmp_path / f"frame_{i}.png")
+        Image.fromarray(image.squeeze(-1) if frame_shape[-1] == 1 else image).save(paths[-1])
+
+    expected = compute_episode_stats({"image": paths}, {"image": {"dtype": "image"}})["image"]
+    stats = running_stats.get_stats()
+    for k, v in expected.items():
+        assert stats[k].shape == v.shape == ((1,) if k == "count" else (3, 1, 1)), k
+        np.testing.assert_allclose(stats[k], v, atol=1e-6, err_msg=k)
+
+
+def test_aggregate_running_stats():
+    rng = np.random.default_rng(0)
+    episodes = [rng.normal(1e4, 1.0, (length, 3)) for length in [1, 7, 20]]
+    episodes_stats = []
+    for data in episodes:
+        running_stats = RunningFeatureStats()
+        for value in data:
+            running_stats.update(value)
+        episodes_stats.append(running_stats.get_stats())
+
+    expected = get_feature_stats(np.concatenate(episodes), axis=0, keepdims=False)
+    result = aggregate_feature_stats(episodes_stats)
+    for k, v in expected.items():
+        np.testing.assert_allclose(result[k], v, rtol=1e-9, err_msg=k)
+
+
+@pytest.mark.parametrize("removed", [[1], [0, 2], [3]])
+def test_subtract_stats(removed):
+    rng = np.random.default_rng(0)
+    episodes = [{"state": rng.normal(10.0, 2.0, (length, 3))} for length in [5, 8, 13, 21]]
+    episodes[2]["state"][0] = [100.0, -100.0, 0.0]
+    episodes_stats = [compute_episode_stats(ep, {"state": {"dtype": "float32"}}) for ep in episodes]
+    stats = aggregate_stats(episodes_stats)
+
+    kept = [i for i in range(len(episodes)) if i not in removed]
+    result = subtract_stats(stats, [episodes_stats[i] for i in removed], (episodes_stats[i] for i in kept))
+    expected = get_feature_stats(np.concatenate([episodes[i]["state"] for i in kept]), axis=0, keepdims=False)
+    for k, v in expected.items():
+        np.testing.assert_allclose(result["state"][k], v, rtol=1e-9, err_msg=k)
+
+
+def test_subtract_all_stats():
+    stats = {"state": get_feature_stats(np.ones((4, 2)), axis=0, keepdims=False)}
+    assert subtract_stats(stats, [stats], []) == {}
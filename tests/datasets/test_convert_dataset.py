@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import datasets
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+import torch
+from safetensors.torch import save_file
+
+from lerobot.datasets.job_runner import load_progress_manifest, run_episode_jobs
+from lerobot.datasets.lerobot_dataset import CODEBASE_VERSION, LeRobotDataset
+from lerobot.datasets.utils import STATS_PATH, load_info, write_json
+from lerobot.datasets.v2.convert_dataset_v1_to_v2 import V1_INFO_PATH, V1_STATS_PATH, convert_local_dataset
+from lerobot.datasets.v21.convert_dataset_v20_to_v21 import convert_local_dataset as convert_local_dataset_v21
+from lerobot.datasets.video_utils import StreamingVideoEncoder, VideoFrame
+from tests.fixtures.constants import DUMMY_HWC, DUMMY_REPO_ID
+
+FPS = 10
+
+
+def square(x: int, fail_on: int | None = None) -> int:
+    if x == fail_on:
+        raise RuntimeError(f"Failed on {x}")
+    return x * x
+
+
+def test_run_episode_jobs_resume(tmp_path):
+    manifest_path = tmp_path / "progress.jsonl"
+    jobs = {ep_idx: (ep_idx, 3) for ep_idx in range(6)}
+    with pytest.raises(RuntimeError, match="Failed on 3"):
+        run_episode_jobs(square, jobs, manifest_path)
+    assert load_progress_manifest(manifest_path) == {0: 0, 1: 1, 2: 4}
+
+    # A line partially written when the run was interrupted is ignored
+    with open(manifest_path, "a") as f:
+        f.write('{"episode_index": 3, "res')
+    resumed_jobs = {ep_idx: (ep_idx + 10,) for ep_idx in range(6)}
+    results = run_episode_jobs(square, resumed_jobs, manifest_path)
+    assert results == {0: 0, 1: 1, 2: 4, 3: 169, 4: 196, 5: 225}
+
+    # Jobs run in worker processes give the same results
+    assert run_episode_jobs(square, resumed_jobs, num_workers=2) == {i: (i + 10) ** 2 for i in range(6)}
+
+
+def make_v1_dataset(root, lengths, with_tasks_col):
+    rows = {key: [] for key in ["observation.state", "episode_index", "frame_index", "timestamp", "index"]}
+    rows["language_instruction"] = []
+    rows["observation.images.cam"] = []
+    for ep_idx, length in enumerate(lengths):
+        video_file = f"videos/observation.images.cam_episode_{ep_idx:06d}.mp4"
+        encoder = StreamingVideoEncoder(root / video_file, FPS)
+        for i in range(length):
+            encoder.add_frame(np.full(DUMMY_HWC, 20 * i + 5 * ep_idx, dtype=np.uint8))
+            rows["observation.state"].append(np.random.rand(2).astype(np.float32))
+            rows["episode_index"].append(ep_idx)
+            rows["frame_index"].append(i)
+            rows["timestamp"].append(i / FPS)
+            rows["index"].append(len(rows["index"]))
+            rows["language_instruction"].append(
+                f"tf.Tensor(b'Task {ep_idx % 2 + i % 2}', shape=(), dtype=string)"
+            )
+            rows["observation.images.cam"].append({"path": video_file, "timestamp": i / FPS})
+        encoder.finish()
+
+    features = datasets.Features(
+        {
+            "observation.state": datasets.Sequence(datasets.Value("float32"), length=2),
+            "episode_index": datasets.Value("int64"),
+            "frame_index": datasets.Value("int64"),
+            "timestamp": datasets.Value("float32"),
+            "index": datasets.Value("int64"),
+            "language_instruction": datasets.Value("string"),
+            "observation.images.cam": VideoFrame(),
+        }
+    )
+    if not with_tasks_col:
+        del rows["language_instruction"], features["language_instruction"]
+    dataset = datasets.Dataset.from_dict(rows, features=features)
+    # Episodes span several row groups and files
+    (root / "data").mkdir()
+    dataset.select(range(10)).to_parquet(root / "data/train-00000-of-00002.parquet", batch_size=4)
+    dataset.select(range(10, len(dataset))).to_parquet(
+        root / "data/train-00001-of-00002.parquet", batch_size=4
+    )
+
+    write_json({"fps": FPS, "video": True}, root / V1_INFO_PATH)
+    states = np.stack(rows["observation.state"])
+    stats = {
+        "observation.state/mean": torch.tensor(states.mean(axis=0)),
+        "observation.state/std": torch.tensor(states.std(axis=0)),
+    }
+    save_file(stats, root / V1_STATS_PATH)
+    return rows
+
+
+@pytest.mark.parametrize("tasks_col, num_workers", [(None, 0), ("language_instruction", 2)])
+def test_convert_v1_to_v21_offline(tmp_path, tasks_col, num_workers):
+    v1_dir = tmp_path / "v1.6"
+    v20_dir = tmp_path / "v2.0"
+    rows = make_v1_dataset(v1_dir, [4, 9, 5], with_tasks_col=tasks_col is not None)
+    single_task = None if tasks_col else "Single task"
+
+    info = convert_local_dataset(
+        v1_dir, v20_dir, single_task=single_task, tasks_col=tasks_col, num_workers=num_workers
+    )
+    assert info["total_episodes"] == 3
+    assert info["total_frames"] == 18
+    assert info["features"]["observation.images.cam"]["shape"] == DUMMY_HWC
+    assert not (v20_dir / ".convert_progress.jsonl").exists()
+    assert pq.read_schema(v20_dir / "data/chunk-000/episode_000001.parquet").names == [
+        "observation.state",
+        "episode_index",
+        "frame_index",
+        "timestamp",
+        "index",
+        "task_index",
+    ]
+
+    info = convert_local_dataset_v21(v20_dir, num_workers=num_workers, video_backend="pyav")
+    assert info == load_info(v20_dir)
+    assert info["codebase_version"] == CODEBASE_VERSION
+    assert not (v20_dir / STATS_PATH).exists()
+
+    dataset = LeRobotDataset(DUMMY_REPO_ID, root=v20_dir, video_backend="pyav")
+    assert len(dataset) == 18
+    np.testing.assert_allclose(
+        dataset.meta.stats["observation.state"]["mean"], np.mean(rows["observation.state"], axis=0), rtol=1e-6
+    )
+    for idx, item in enumerate(dataset):
+        assert item["episode_index"] == rows["episode_index"][idx]
+        assert torch.equal(item["observation.state"], torch.from_numpy(rows["observation.state"][idx]))
+        expected_task = rows["language_instruction"][idx][12:18] if tasks_col else single_task
+        assert item["task"] == expected_task
+        expected_frame = (20 * rows["frame_index"][idx] + 5 * rows["episode_index"][idx]) / 255
+        torch.testing.assert_close(
+            item["observation.images.cam"], torch.full((3, *DUMMY_HWC[:2]), expected_frame), atol=0.02, rtol=0
+        )
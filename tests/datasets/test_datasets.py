@@ -19,6 +19,7 @@ import re
 from copy import deepcopy
 from itertools import chain
 from pathlib import Path
+from unittest.mock import patch
 
 import numpy as np
 import pytest
@@ -37,13 +38,16 @@ from lerobot.datasets.lerobot_dataset import (
     MultiLeRobotDataset,
 )
 from lerobot.datasets.utils import (
+    DEFAULT_FEATURES,
     create_branch,
     flatten_dict,
+    load_info,
     unflatten_dict,
 )
+from lerobot.datasets.video_utils import VideoEncodingProfile, get_video_keyframe_indices
 from lerobot.envs.factory import make_env_config
 from lerobot.policies.factory import make_policy_config
-from tests.fixtures.constants import DUMMY_CHW, DUMMY_HWC, DUMMY_REPO_ID
+from tests.fixtures.constants import DEFAULT_FPS, DUMMY_CHW, DUMMY_HWC, DUMMY_REPO_ID
 from tests.utils import require_x86_64_kernel
 
 
@@ -306,12 +310,313 @@ def test_add_frame_image_pil(image_dataset):
     assert dataset[0]["image"].shape == torch.Size(DUMMY_CHW)
 
 
+def test_dropped_images_are_replaced(tmp_path, empty_lerobot_dataset_factory):
+    features = {"image": {"dtype": "image", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]}}
+    dataset = empty_lerobot_dataset_factory(
+        root=tmp_path / "test",
+        features=features,
+        image_writer_threads=1,
+        image_writer_queue_size=10,
+        image_writer_drop_when_full=True,
+    )
+    save_image = dataset.image_writer.save_image
+
+    def drop_some_images(image, fpath):
+        # As if the writer fell behind when these frames were added
+        if fpath.stem in ["frame_000000", "frame_000002", "frame_000003"]:
+            return False
+        return save_image(image, fpath)
+
+    images = [np.full(DUMMY_HWC, 40 * i, dtype=np.uint8) for i in range(5)]
+    with patch.object(dataset.image_writer, "save_image", side_effect=drop_some_images):
+        for image in images:
+            dataset.add_frame({"image": image}, task="Dummy task")
+        dataset.save_episode()
+    dataset.stop_image_writer()
+
+    assert len(dataset) == 5
+    expected = [images[1], images[1], images[1], images[1], images[4]]
+    for idx, image in enumerate(expected):
+        assert torch.equal(dataset[idx]["image"], torch.from_numpy(image).permute(2, 0, 1) / 255), idx
+
+
 def test_image_array_to_pil_image_wrong_range_float_0_255():
     image = np.random.rand(*DUMMY_HWC) * 255
     with pytest.raises(ValueError):
         image_array_to_pil_image(image)
 
 
+@pytest.mark.parametrize("chunk_size", [1, 16, 100])
+def test_delta_timestamps_query(tmp_path, empty_lerobot_dataset_factory, chunk_size):
+    features = {
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+        "action": {"dtype": "float32", "shape": (2,), "names": None},
+    }
+    root = tmp_path / "test"
+    dataset = empty_lerobot_dataset_factory(root=root, features=features)
+    for ep_length in [10, 25, 15]:
+        for _ in range(ep_length):
+            dataset.add_frame({"state": torch.randn(2), "action": torch.randn(2)}, task="Dummy task")
+        dataset.save_episode()
+
+    fps = dataset.fps
+    delta_timestamps = {
+        "state": [-1 / fps, 0],
+        "action": [i / fps for i in range(chunk_size)],
+        "index": [i / fps for i in range(-3, 3)],
+    }
+    dataset = LeRobotDataset(DUMMY_REPO_ID, root=root, delta_timestamps=delta_timestamps)
+
+    for idx in range(len(dataset)):
+        item = dataset[idx]
+        ep_idx = item["episode_index"].item()
+        ep_start = dataset.episode_data_index["from"][ep_idx].item()
+        ep_end = dataset.episode_data_index["to"][ep_idx].item()
+        for key, delta_idx in dataset.delta_indices.items():
+            # Reference implementation selecting the queried rows one by one from hf_dataset
+            q_idx = [max(ep_start, min(ep_end - 1, idx + delta)) for delta in delta_idx]
+            is_pad = [(idx + delta < ep_start) | (idx + delta >= ep_end) for delta in delta_idx]
+            expected = torch.stack(dataset.hf_dataset.select(q_idx)[key])
+            assert item[key].dtype == expected.dtype
+            assert torch.equal(item[key], expected)
+            assert torch.equal(item[f"{key}_is_pad"], torch.BoolTensor(is_pad))
+
+
+def test_return_uint8(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "image": {"dtype": "image", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "video": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+    }
+    root = tmp_path / "test"
+    dataset = empty_lerobot_dataset_factory(root=root, features=features, use_videos=True)
+    for _ in range(5):
+        frame = {
+            "image": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8),
+            "video": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8),
+            "state": torch.randn(2),
+        }
+        dataset.add_frame(frame, task="Dummy task")
+    dataset.save_episode()
+
+    delta_timestamps = {"image": [-1 / dataset.fps, 0], "video": [-1 / dataset.fps, 0]}
+    kwargs = {"root": root, "delta_timestamps": delta_timestamps, "video_backend": "pyav"}
+    float_dataset = LeRobotDataset(DUMMY_REPO_ID, **kwargs)
+    uint8_dataset = LeRobotDataset(DUMMY_REPO_ID, return_uint8=True, **kwargs)
+
+    for idx in range(len(float_dataset)):
+        float_item = float_dataset[idx]
+        uint8_item = uint8_dataset[idx]
+        for key in ["image", "video"]:
+            assert uint8_item[key].dtype == torch.uint8
+            assert uint8_item[key].shape == (2, *DUMMY_CHW)
+            assert torch.equal(uint8_item[key].type(torch.float32) / 255, float_item[key])
+        assert torch.equal(uint8_item["state"], float_item["state"])
+
+
+def test_video_frames_queried_by_index(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "video": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+    }
+    root = tmp_path / "test"
+    dataset = empty_lerobot_dataset_factory(root=root, features=features, use_videos=True)
+    for ep_length in [6, 4]:
+        for _ in range(ep_length):
+            frame = {"video": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8), "state": torch.randn(2)}
+            dataset.add_frame(frame, task="Dummy task")
+        dataset.save_episode()
+
+    delta_timestamps = {"video": [-2 / dataset.fps, 0, 1 / dataset.fps]}
+    kwargs = {"root": root, "delta_timestamps": delta_timestamps, "video_backend": "pyav"}
+    dataset = LeRobotDataset(DUMMY_REPO_ID, **kwargs)
+    np.testing.assert_array_equal(dataset._video_frame_indices, [0, 1, 2, 3, 4, 5, 0, 1, 2, 3])
+
+    # Frames looked up by timestamp, as done when timestamps don't fall on video frames
+    ts_dataset = LeRobotDataset(DUMMY_REPO_ID, **kwargs)
+    ts_dataset._video_frame_indices = None
+
+    with patch.object(dataset.hf_dataset, "select", side_effect=AssertionError) as select_mock:
+        for idx in range(len(dataset)):
+            assert torch.equal(dataset[idx]["video"], ts_dataset[idx]["video"])
+    select_mock.assert_not_called()
+
+
+def test_streaming_encoding(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "video": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+    }
+    root = tmp_path / "test"
+    dataset = empty_lerobot_dataset_factory(
+        root=root, features=features, use_videos=True, streaming_encoding=True
+    )
+    for ep_length in [6, 4, 5]:
+        for _ in range(ep_length):
+            frame = {"video": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8), "state": torch.randn(2)}
+            dataset.add_frame(frame, task="Dummy task")
+        if ep_length == 5:
+            # Discarded episodes leave no video
+            dataset.clear_episode_buffer()
+        else:
+            dataset.save_episode()
+
+    assert not list(root.rglob("*.png"))
+    assert sorted(p.name for p in root.rglob("*.mp4")) == ["episode_000000.mp4", "episode_000001.mp4"]
+    assert dataset.meta.episodes_stats[1]["video"]["count"].tolist() == [4]
+    assert dataset.meta.info["features"]["video"]["info"] is not None
+
+    dataset = LeRobotDataset(DUMMY_REPO_ID, root=root, video_backend="pyav")
+    assert len(dataset) == 10
+    assert dataset[9]["video"].shape == DUMMY_CHW
+
+
+def test_video_encoding_profile(tmp_path, empty_lerobot_dataset_factory, caplog):
+    features = {
+        "video": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+    }
+    root = tmp_path / "test"
+    profile = VideoEncodingProfile.from_access_pattern(
+        [-1, 0], block_size=4, probe_decode=True, max_decode_latency_ms=1e6
+    )
+    dataset = empty_lerobot_dataset_factory(
+        root=root, features=features, video_encoding=profile, video_backend="pyav"
+    )
+    for _ in range(13):
+        frame = {"video": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8), "state": torch.randn(2)}
+        dataset.add_frame(frame, task="Dummy task")
+    dataset.save_episode()
+
+    info = load_info(root)
+    assert info["video_encoding"]["g"] == 6
+    assert info["video_encoding"]["decode_probe"]["video"]["backend"] == "pyav"
+    assert dataset.meta.video_encoding.g == 6
+    keyframes, _ = get_video_keyframe_indices(
+        root / dataset.meta.get_video_file_path(0, "video"), DEFAULT_FPS
+    )
+    assert keyframes == [0, 6, 12]
+
+    # Items read fewer frames than the blocks the videos were encoded for, unless they span a whole block
+    for delta_frames, warns in [([0], True), ([-1, 0], True), ([-4, 0], False)]:
+        caplog.clear()
+        with caplog.at_level(logging.WARNING):
+            delta_timestamps = {"video": [d / DEFAULT_FPS for d in delta_frames]}
+            LeRobotDataset(DUMMY_REPO_ID, root=root, delta_timestamps=delta_timestamps, video_backend="pyav")
+        assert ("were encoded (g=6) for blocks of 4 items" in caplog.text) == warns
+
+
+def test_video_encoding_profile_without_probe(tmp_path, empty_lerobot_dataset_factory, caplog):
+    features = {"video": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]}}
+    root = tmp_path / "test"
+    profile = VideoEncodingProfile.from_access_pattern([0], block_size=None)
+    dataset = empty_lerobot_dataset_factory(
+        root=root, features=features, video_encoding=profile, video_backend="pyav"
+    )
+    for _ in range(3):
+        dataset.add_frame({"video": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8)}, task="Dummy task")
+    dataset.save_episode()
+
+    assert load_info(root)["video_encoding"]["decode_probe"] == {}
+    # Videos encoded for sequential reads are slow to read at random
+    with caplog.at_level(logging.WARNING):
+        LeRobotDataset(DUMMY_REPO_ID, root=root, video_backend="pyav")
+    assert "for items read sequentially" in caplog.text
+
+
+def test_parallel_batch_encode_videos(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "a": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "b": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+    }
+    datasets = {}
+    for num_workers in [1, 2]:
+        root = tmp_path / f"workers_{num_workers}"
+        dataset = empty_lerobot_dataset_factory(
+            root=root, features=features, batch_encoding_size=10, batch_encoding_workers=num_workers
+        )
+        rng = np.random.default_rng(0)
+        for ep_length in [4, 6, 3]:
+            for _ in range(ep_length):
+                frame = {key: rng.integers(0, 256, DUMMY_HWC, dtype=np.uint8) for key in ["a", "b"]}
+                frame["state"] = torch.zeros(2)
+                dataset.add_frame(frame, task="Dummy task")
+            dataset.save_episode()
+        assert not list(root.rglob("*.mp4"))
+        dataset.batch_encode_videos(threads_per_job=1)
+        datasets[num_workers] = dataset
+
+    serial, parallel = datasets[1], datasets[2]
+    assert not list(parallel.root.rglob("*.png"))
+    assert parallel.meta.info == serial.meta.info
+    for ep_idx in range(3):
+        for key in ["a", "b"]:
+            video_path = serial.meta.get_video_file_path(ep_idx, key)
+            assert (parallel.root / video_path).read_bytes() == (serial.root / video_path).read_bytes()
+
+
+def test_columnar_store(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "image": {"dtype": "image", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+        "reward": {"dtype": "float32", "shape": (1,), "names": None},
+        "done": {"dtype": "bool", "shape": (1,), "names": None},
+    }
+    root = tmp_path / "test"
+    dataset = empty_lerobot_dataset_factory(root=root, features=features)
+    for ep_length in [4, 3]:
+        for i in range(ep_length):
+            frame = {
+                "image": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8),
+                "state": torch.randn(2),
+                "reward": torch.randn(1),
+                "done": np.array([i == ep_length - 1]),
+            }
+            dataset.add_frame(frame, task="Dummy task")
+        dataset.save_episode()
+
+    dataset = LeRobotDataset(DUMMY_REPO_ID, root=root)
+    assert "image" not in dataset._columns
+    for key in ["state", "reward", "done", "timestamp", "frame_index", "episode_index", "index"]:
+        assert dataset._columns[key].is_shared()
+
+    # The columns of the images are selected once, not for each item
+    assert dataset._row_dataset.column_names == ["image"]
+    with patch.object(type(dataset.hf_dataset), "select_columns", side_effect=AssertionError):
+        items = [dataset._get_row(idx) for idx in range(len(dataset))]
+
+    for idx, item in enumerate(items):
+        expected = dataset.hf_dataset[idx]
+        assert item.keys() == expected.keys()
+        for key, value in expected.items():
+            assert item[key].dtype == value.dtype
+            assert item[key].shape == value.shape
+            assert torch.equal(item[key], value)
+
+
+def test_save_episode_appends_lazily(tmp_path, empty_lerobot_dataset_factory):
+    features = {"state": {"dtype": "float32", "shape": (2,), "names": None}}
+    root = tmp_path / "test"
+    dataset = empty_lerobot_dataset_factory(root=root, features=features)
+    states = []
+    for ep_length in [3, 2, 4]:
+        for _ in range(ep_length):
+            states.append(torch.randn(2))
+            dataset.add_frame({"state": states[-1]}, task="Dummy task")
+        dataset.save_episode()
+        if ep_length == 2:
+            assert len(dataset) == 5
+            assert dataset[4]["index"] == 4
+    assert len(dataset._pending_episode_tables) == 1
+    assert len(dataset) == 9
+
+    assert torch.stack(dataset.hf_dataset["episode_index"]).tolist() == [0, 0, 0, 1, 1, 2, 2, 2, 2]
+    assert not dataset._pending_episode_tables
+    assert torch.equal(dataset._get_column("state"), torch.stack(states))
+    assert len(LeRobotDataset(DUMMY_REPO_ID, root=root)) == 9
+
+
 # TODO(aliberts):
 # - [ ] test various attributes & state from init and create
 # - [ ] test init with episodes and check num_frames
@@ -393,6 +698,88 @@ def test_factory(env_name, repo_id, policy_name):
             assert key in item, f"{key}"
 
 
+def test_columns(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "image": {"dtype": "image", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "video": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+        "extra": {"dtype": "float32", "shape": (3,), "names": None},
+    }
+    root = tmp_path / "test"
+    dataset = empty_lerobot_dataset_factory(root=root, features=features, use_videos=True)
+    for _ in range(4):
+        frame = {
+            "image": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8),
+            "video": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8),
+            "state": torch.randn(2),
+            "extra": torch.randn(3),
+        }
+        dataset.add_frame(frame, task="Dummy task")
+    dataset.save_episode()
+
+    delta_timestamps = {"state": [-1 / dataset.fps, 0]}
+    kwargs = {"root": root, "delta_timestamps": delta_timestamps, "video_backend": "pyav"}
+    full_dataset = LeRobotDataset(DUMMY_REPO_ID, **kwargs)
+    dataset = LeRobotDataset(DUMMY_REPO_ID, columns=["state", "video"], **kwargs)
+
+    assert set(dataset.hf_dataset.column_names) == {"state", *DEFAULT_FEATURES}
+    assert dataset.camera_keys == dataset.video_keys == ["video"]
+    assert dataset.image_keys == []
+    for idx in range(len(dataset)):
+        item = dataset[idx]
+        expected = full_dataset[idx]
+        assert set(expected) - set(item) == {"image", "extra"}
+        for key, value in item.items():
+            if isinstance(value, torch.Tensor):
+                assert torch.equal(value, expected[key])
+
+    with pytest.raises(ValueError, match="not features of the dataset"):
+        LeRobotDataset(DUMMY_REPO_ID, columns=["state", "missing"], **kwargs)
+    with pytest.raises(ValueError, match="not in the loaded columns"):
+        LeRobotDataset(DUMMY_REPO_ID, columns=["video"], **kwargs)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_multidataset_index_routing(tmp_path, empty_lerobot_dataset_factory, lazy):
+    repo_ids = ["dummy/repo_0", "dummy/repo_1", "dummy/repo_2"]
+    for i, (repo_id, ep_lengths) in enumerate(zip(repo_ids, [[3, 2], [4], [1, 2]], strict=True)):
+        features = {"state": {"dtype": "float32", "shape": (2,), "names": None}}
+        if i == 1:
+            features["extra"] = {"dtype": "float32", "shape": (1,), "names": None}
+        dataset = empty_lerobot_dataset_factory(repo_id=repo_id, root=tmp_path / repo_id, features=features)
+        for ep_length in ep_lengths:
+            for _ in range(ep_length):
+                frame = {"state": torch.randn(2)}
+                if i == 1:
+                    frame["extra"] = torch.randn(1)
+                dataset.add_frame(frame, task="Dummy task")
+            dataset.save_episode()
+
+    sub_datasets = [LeRobotDataset(repo_id, root=tmp_path / repo_id) for repo_id in repo_ids]
+    dataset = MultiLeRobotDataset(repo_ids, root=tmp_path, lazy=lazy)
+    assert dataset.cumulative_sizes == [5, 9, 12]
+    assert dataset.num_episodes == 5
+    assert dataset.disabled_features == {"extra"}
+    if lazy:
+        assert dataset._datasets == [None, None, None]
+    else:
+        assert "extra" not in dataset._datasets[1].hf_dataset.column_names
+
+    for idx in range(len(dataset)):
+        item = dataset[idx]
+        dataset_idx = item.pop("dataset_index").item()
+        start_idx = ([0] + dataset.cumulative_sizes)[dataset_idx]
+        expected = sub_datasets[dataset_idx][idx - start_idx]
+        expected.pop("extra", None)
+        assert item.keys() == expected.keys()
+        assert torch.equal(item["state"], expected["state"])
+        assert item["index"] == expected["index"]
+    assert dataset_idx == 2
+
+    with pytest.raises(IndexError):
+        dataset[len(dataset)]
+
+
 # TODO(alexander-soare): If you're hunting for savings on testing time, this takes about 5 seconds.
 @pytest.mark.skip("TODO after fix multidataset")
 def test_multidataset_frames():
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+import pytest
+import torch
+
+from lerobot.datasets.compute_stats import aggregate_stats
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+from tests.fixtures.constants import DUMMY_HWC, DUMMY_REPO_ID
+
+FEATURES = {
+    "video": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+    "state": {"dtype": "float32", "shape": (2,), "names": None},
+}
+
+
+def record_dataset(factory, root, lengths):
+    dataset = factory(root=root, features=FEATURES, video_backend="pyav")
+    for ep_idx, length in enumerate(lengths):
+        for i in range(length):
+            # Flat images are encoded almost losslessly
+            frame = {
+                "video": np.full(DUMMY_HWC, 20 * i + 5 * ep_idx, dtype=np.uint8),
+                "state": torch.randn(2),
+            }
+            dataset.add_frame(frame, task=f"Task {ep_idx % 2}")
+        dataset.save_episode()
+    return dataset
+
+
+def assert_stats_consistent(dataset):
+    reloaded = LeRobotDataset(DUMMY_REPO_ID, root=dataset.root, video_backend="pyav")
+    expected_stats = aggregate_stats(list(reloaded.meta.episodes_stats.values()))
+    for key in ["state", "video", "index", "episode_index", "timestamp"]:
+        for stat in ["min", "max", "mean", "std", "count"]:
+            np.testing.assert_allclose(dataset.meta.stats[key][stat], expected_stats[key][stat], rtol=1e-6)
+            np.testing.assert_allclose(reloaded.meta.stats[key][stat], expected_stats[key][stat], rtol=1e-6)
+    for ep_idx, ep_stats in reloaded.meta.episodes_stats.items():
+        np.testing.assert_equal(ep_stats["episode_index"]["min"], [ep_idx])
+    return reloaded
+
+
+def test_delete_episodes(tmp_path, empty_lerobot_dataset_factory):
+    dataset = record_dataset(empty_lerobot_dataset_factory, tmp_path / "dataset", [3, 4, 5, 6, 7])
+    before = LeRobotDataset(DUMMY_REPO_ID, root=dataset.root, video_backend="pyav")
+    expected_items = [item for item in before if item["episode_index"] not in [1, 3]]
+
+    dataset.delete_episodes([1, 3])
+
+    assert dataset.meta.total_episodes == 3
+    assert dataset.meta.total_frames == len(dataset) == 3 + 5 + 7
+    assert [ep["length"] for ep in dataset.meta.episodes.values()] == [3, 5, 7]
+    assert len(list(dataset.root.glob("data/*/*.parquet"))) == 3
+    assert len(list(dataset.root.glob("videos/*/video/*.mp4"))) == 3
+    assert dataset.episode_data_index["from"].tolist() == [0, 3, 8]
+
+    reloaded = assert_stats_consistent(dataset)
+    for ds in [dataset, reloaded]:
+        for idx, (item, expected) in enumerate(zip(ds, expected_items, strict=True)):
+            assert item["index"] == idx
+            assert item["episode_index"] == [0, 1, 2][[0, 2, 4].index(expected["episode_index"])]
+            assert item["task"] == expected["task"]
+            for key in ["state", "timestamp", "frame_index", "video"]:
+                assert torch.equal(item[key], expected[key]), key
+
+    # Episodes can still be recorded afterwards
+    dataset.add_frame({"video": np.zeros(DUMMY_HWC, dtype=np.uint8), "state": torch.randn(2)}, task="Task 0")
+    dataset.save_episode()
+    assert dataset.meta.total_episodes == 4
+    assert dataset[len(dataset) - 1]["episode_index"] == 3
+
+
+@pytest.mark.parametrize("frame_range, reencoded", [((2, 6), False), ((3, 6), True), ((1, 8), True)])
+def test_trim_episodes(tmp_path, empty_lerobot_dataset_factory, frame_range, reencoded):
+    dataset = record_dataset(empty_lerobot_dataset_factory, tmp_path / "dataset", [6, 8, 6])
+    before = LeRobotDataset(DUMMY_REPO_ID, root=dataset.root, video_backend="pyav")
+    start, end = frame_range
+    ep_1 = [item for item in before if item["episode_index"] == 1]
+    expected_items = [*before][:6] + ep_1[start:end] + [*before][14:]
+    video_count = before.meta.episodes_stats[1]["video"]["count"]
+
+    dataset.trim_episodes({1: frame_range})
+
+    assert dataset.meta.total_frames == len(dataset) == 12 + end - start
+    assert dataset.meta.episodes[1]["length"] == end - start
+    # Only re-encoded videos have their stats computed again, from all their frames
+    expected_count = [end - start] if reencoded else video_count
+    np.testing.assert_equal(dataset.meta.episodes_stats[1]["video"]["count"], expected_count)
+    np.testing.assert_equal(dataset.meta.episodes_stats[1]["state"]["count"], [end - start])
+
+    reloaded = assert_stats_consistent(dataset)
+    for ds in [dataset, reloaded]:
+        for idx, (item, expected) in enumerate(zip(ds, expected_items, strict=True)):
+            assert item["index"] == idx
+            assert item["episode_index"] == expected["episode_index"]
+            assert torch.equal(item["state"], expected["state"])
+            if expected["episode_index"] == 1:
+                assert item["frame_index"] == expected["frame_index"] - start
+                torch.testing.assert_close(item["timestamp"], expected["timestamp"] - start / dataset.fps)
+            else:
+                assert torch.equal(item["timestamp"], expected["timestamp"])
+            if reencoded and expected["episode_index"] == 1:
+                torch.testing.assert_close(item["video"], expected["video"], atol=0.02, rtol=0)
+            else:
+                assert torch.equal(item["video"], expected["video"])
+
+
+def test_edit_episodes_invalid(tmp_path, empty_lerobot_dataset_factory):
+    dataset = record_dataset(empty_lerobot_dataset_factory, tmp_path / "dataset", [3, 4])
+    with pytest.raises(ValueError, match="not in"):
+        dataset.delete_episodes([2])
+    with pytest.raises(ValueError, match="All the episodes"):
+        dataset.delete_episodes([0, 1])
+    with pytest.raises(ValueError, match="4 frames"):
+        dataset.trim_episodes({1: (2, 5)})
+    dataset.add_frame({"video": np.zeros(DUMMY_HWC, dtype=np.uint8), "state": torch.randn(2)}, task="Task 0")
+    with pytest.raises(ValueError, match="being recorded"):
+        dataset.delete_episodes([0])
+    assert dataset.meta.total_episodes == 2
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pickle
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import torch
+
+from lerobot.datasets.episode_finalizer import recover_unfinished_episodes
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+from lerobot.datasets.utils import EPISODES_STATS_PATH, load_episodes
+from tests.fixtures.constants import DUMMY_HWC, DUMMY_REPO_ID
+
+FEATURES = {
+    "video": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+    "state": {"dtype": "float32", "shape": (2,), "names": None},
+}
+
+
+def record_episodes(dataset, ep_lengths, tasks=None):
+    rng = np.random.default_rng(0)
+    for ep_idx, ep_length in enumerate(ep_lengths):
+        task = tasks[ep_idx] if tasks else "Dummy task"
+        for _ in range(ep_length):
+            frame = {
+                "video": rng.integers(0, 256, DUMMY_HWC, dtype=np.uint8),
+                "state": torch.from_numpy(rng.random(2, dtype=np.float32)),
+            }
+            dataset.add_frame(frame, task=task)
+        dataset.save_episode()
+
+
+def test_async_finalization(tmp_path, empty_lerobot_dataset_factory):
+    ep_lengths, tasks = [5, 3, 4], ["Task A", "Task B", "Task A"]
+    sync_root, async_root = tmp_path / "sync", tmp_path / "async"
+    sync_dataset = empty_lerobot_dataset_factory(root=sync_root, features=FEATURES, image_writer_threads=2)
+    record_episodes(sync_dataset, ep_lengths, tasks)
+
+    dataset = empty_lerobot_dataset_factory(
+        root=async_root, features=FEATURES, image_writer_threads=2, async_finalization=True
+    )
+    # Episodes are finalized one at a time, after the next ones have been recorded
+    release = threading.Event()
+    finalize_episode = dataset._finalize_episode
+
+    def blocked_finalize_episode(*args):
+        release.wait()
+        finalize_episode(*args)
+
+    with patch.object(dataset, "_finalize_episode", side_effect=blocked_finalize_episode):
+        record_episodes(dataset, ep_lengths, tasks)
+        assert dataset.meta.total_episodes == 0
+        assert dataset.episode_buffer["episode_index"] == 3
+        release.set()
+        dataset.flush()
+
+    assert dataset.meta.total_episodes == 3
+    assert dataset.meta.total_frames == 12
+    assert dataset.meta.tasks == sync_dataset.meta.tasks
+    assert load_episodes(async_root) == load_episodes(sync_root)
+    dataset.stop_episode_finalizer()
+    dataset.stop_image_writer()
+
+    dataset = LeRobotDataset(DUMMY_REPO_ID, root=async_root, video_backend="pyav")
+    sync_dataset = LeRobotDataset(DUMMY_REPO_ID, root=sync_root, video_backend="pyav")
+    # The lock guarding the tables of the episodes being finalized is recreated in "spawn" workers
+    dataset = pickle.loads(pickle.dumps(dataset))
+    assert len(dataset) == 12
+    for idx in range(len(dataset)):
+        item, expected = dataset[idx], sync_dataset[idx]
+        for key in ["state", "index", "episode_index", "task_index", "video"]:
+            assert torch.equal(item[key], expected[key]), key
+
+
+def test_async_finalization_error(tmp_path, empty_lerobot_dataset_factory):
+    dataset = empty_lerobot_dataset_factory(
+        root=tmp_path / "test", features=FEATURES, image_writer_threads=2, async_finalization=True
+    )
+    with patch.object(dataset, "_save_episode_table", side_effect=OSError("Disk full")):
+        record_episodes(dataset, [3, 2])
+        with pytest.raises(RuntimeError) as exc_info:
+            dataset.flush()
+    assert isinstance(exc_info.value.__cause__, OSError)
+    assert dataset.meta.total_episodes == 0
+    with pytest.raises(RuntimeError):
+        record_episodes(dataset, [2])
+    dataset.stop_image_writer()
+
+
+def test_recover_unfinished_episodes(tmp_path, empty_lerobot_dataset_factory):
+    root = tmp_path / "test"
+    dataset = empty_lerobot_dataset_factory(root=root, features=FEATURES)
+    record_episodes(dataset, [4, 3, 5])
+    info_json = (root / "meta/info.json").read_text()
+    info_2_episodes = info_json.replace('"total_episodes": 3', '"total_episodes": 2').replace(
+        '"total_frames": 12', '"total_frames": 7'
+    )
+
+    # Crash while finalizing episode 2, after its stats were written but before info.json, and while recording
+    # episode 3
+    (root / "meta/info.json").write_text(info_2_episodes)
+    images_dir = root / "images/video/episode_000003"
+    images_dir.mkdir(parents=True)
+    with open(root / EPISODES_STATS_PATH, "a") as f:
+        f.write('{"episode_index": 3, "sta')
+
+    assert recover_unfinished_episodes(root) == [2, 3]
+    assert not (root / dataset.meta.get_data_file_path(2)).exists()
+    assert not (root / dataset.meta.get_video_file_path(2, "video")).exists()
+    assert not images_dir.exists()
+    assert list(load_episodes(root)) == [0, 1]
+    assert recover_unfinished_episodes(root) == []
+
+    dataset = LeRobotDataset(DUMMY_REPO_ID, root=root, video_backend="pyav")
+    assert dataset.num_episodes == 2
+    assert len(dataset) == 7
+    record_episodes(dataset, [2])
+    assert dataset.meta.total_episodes == 3
+    assert dataset.hf_dataset["index"][-1].item() == 8
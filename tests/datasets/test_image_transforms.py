@@ -22,6 +22,7 @@ from torchvision.transforms import v2
 from torchvision.transforms.v2 import functional as F  # noqa: N812
 
 from lerobot.datasets.transforms import (
+    BatchImageTransforms,
     ImageTransformConfig,
     ImageTransforms,
     ImageTransformsConfig,
@@ -380,3 +381,61 @@ def test_save_each_transform(img_tensor_factory, tmp_path):
             assert (transform_dir / file_name).exists(), (
                 f"{file_name} was not found in {transform} directory."
             )
+
+
+@pytest.mark.parametrize(
+    "tf_type, kwargs",
+    [
+        ("ColorJitter", {"brightness": (0.5, 0.5)}),
+        ("ColorJitter", {"contrast": (2.0, 2.0)}),
+        ("ColorJitter", {"saturation": (0.5, 0.5)}),
+        ("ColorJitter", {"hue": (0.25, 0.25)}),
+        ("SharpnessJitter", {"sharpness": (2.0, 2.0)}),
+        ("Identity", {}),
+    ],
+)
+def test_batch_image_transforms_match_image_transforms(img_tensor_factory, tf_type, kwargs):
+    images = torch.stack([img_tensor_factory() for _ in range(4)])
+    tf_cfg = ImageTransformsConfig(enable=True, tfs={"tf": ImageTransformConfig(type=tf_type, kwargs=kwargs)})
+    expected = torch.stack([ImageTransforms(tf_cfg)(image) for image in images])
+    torch.testing.assert_close(BatchImageTransforms(tf_cfg)(images), expected)
+
+
+def test_batch_image_transforms_enable_false(img_tensor_factory):
+    images = torch.stack([img_tensor_factory() for _ in range(2)])
+    batch_tf = BatchImageTransforms(ImageTransformsConfig())
+    torch.testing.assert_close(batch_tf(images), images)
+    uint8_images = (images * 255).round().type(torch.uint8)
+    torch.testing.assert_close(batch_tf(uint8_images), uint8_images.type(torch.float32) / 255)
+
+
+def test_batch_image_transforms_per_sample_params(img_tensor_factory):
+    # 8 samples of 2 identical frames each
+    images = img_tensor_factory().expand(8, 2, -1, -1, -1)
+    with seeded_context(1337):
+        outputs = BatchImageTransforms(ImageTransformsConfig(enable=True))(images)
+
+    assert outputs.shape == images.shape
+    # Frames of a sample share their parameters while samples don't
+    torch.testing.assert_close(outputs[:, 0], outputs[:, 1])
+    assert all(not torch.allclose(outputs[0], outputs[i]) for i in range(1, 8))
+
+
+def test_batch_image_transforms_subset_distribution():
+    images = torch.full((4000, 3, 4, 4), 0.25)
+    tf_cfg = ImageTransformsConfig(
+        enable=True,
+        max_num_transforms=1,
+        tfs={
+            "darker": ImageTransformConfig(weight=1.0, type="ColorJitter", kwargs={"brightness": (0.5, 0.5)}),
+            "brighter": ImageTransformConfig(
+                weight=3.0, type="ColorJitter", kwargs={"brightness": (2.0, 2.0)}
+            ),
+        },
+    )
+    with seeded_context(1337):
+        outputs = BatchImageTransforms(tf_cfg)(images)
+
+    # Same multinomial probabilities as RandomSubsetApply
+    brighter_ratio = (outputs[:, 0, 0, 0] == 0.5).float().mean().item()
+    assert abs(brighter_ratio - 0.75) < 0.03
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import queue
+import threading
 import time
 from multiprocessing import queues
 from unittest.mock import MagicMock, patch
@@ -324,6 +325,39 @@ def test_wait_until_done_multiprocessing(tmp_path, img_array_factory):
         writer.stop()
 
 
+def test_wait_until_written(tmp_path, img_array_factory):
+    writer = AsyncImageWriter(num_threads=2)
+    release = threading.Event()
+    blocked_dir, episode_dir = tmp_path / "blocked", tmp_path / "episode"
+
+    def blocked_write_image(image, fpath):
+        if fpath.parent == blocked_dir:
+            release.wait()
+        write_image(image, fpath)
+
+    try:
+        with patch("lerobot.datasets.image_writer.write_image", side_effect=blocked_write_image):
+            for directory in [blocked_dir, episode_dir]:
+                directory.mkdir()
+            writer.save_image(img_array_factory(), blocked_dir / "frame_0.png")
+            for i in range(5):
+                writer.save_image(img_array_factory(), episode_dir / f"frame_{i}.png")
+
+            # Images of other directories are still waiting to be written
+            waiting = threading.Thread(target=writer.wait_until_written, args=([episode_dir],))
+            waiting.start()
+            waiting.join(timeout=5)
+            assert not waiting.is_alive()
+            assert len(list(episode_dir.glob("*.png"))) == 5
+            assert writer.queue_size == 1
+            release.set()
+            writer.wait_until_written([blocked_dir])
+        assert writer.pending_by_dir == {}
+    finally:
+        release.set()
+        writer.stop()
+
+
 def test_exception_handling(tmp_path, img_array_factory):
     writer = AsyncImageWriter()
     try:
@@ -384,3 +418,60 @@ def test_main_process_time(tmp_path, img_tensor_factory):
         assert fpath.exists()
     finally:
         writer.stop()
+
+
+def test_save_image_shared_memory(tmp_path, img_array_factory):
+    writer = AsyncImageWriter(num_processes=1, num_threads=2, num_shared_memory_slots=4)
+    try:
+        image_arrays = [img_array_factory() for _ in range(10)]
+        fpaths = [tmp_path / f"frame_{i:06d}.png" for i in range(len(image_arrays))]
+        for image_array, fpath in zip(image_arrays, fpaths, strict=True):
+            writer.save_image(image_array, fpath)
+        writer.wait_until_done()
+        for image_array, fpath in zip(image_arrays, fpaths, strict=True):
+            assert np.array_equal(np.array(Image.open(fpath)), image_array)
+
+        # Frames of the same shape share a buffer, whose slots are all released
+        assert len(writer.frame_buffers) == 1
+        assert sorted(next(iter(writer.frame_buffers.values())).free_slots) == [0, 1, 2, 3]
+        metrics = writer.get_metrics()
+        assert metrics["queue_size"] == 0
+        assert metrics["dropped_frames"] == 0
+        assert metrics["write_latency_max_ms"] > 0
+    finally:
+        writer.stop()
+
+
+@pytest.mark.parametrize("drop_when_full", [False, True])
+def test_max_queue_size(tmp_path, img_array_factory, drop_when_full):
+    writer = AsyncImageWriter(num_threads=1, max_queue_size=2, drop_when_full=drop_when_full)
+    release = threading.Event()
+
+    def blocked_write_image(image, fpath):
+        release.wait()
+        write_image(image, fpath)
+
+    try:
+        with patch("lerobot.datasets.image_writer.write_image", side_effect=blocked_write_image):
+            for i in range(2):
+                assert writer.save_image(img_array_factory(), tmp_path / f"frame_{i}.png")
+            assert writer.get_metrics()["queue_size"] == 2
+
+            saving = threading.Thread(
+                target=writer.save_image, args=(img_array_factory(), tmp_path / "frame_2.png")
+            )
+            saving.start()
+            saving.join(timeout=0.5)
+            # The third image is dropped, or waits for one of the others to be written
+            assert saving.is_alive() != drop_when_full
+            release.set()
+            saving.join()
+            writer.wait_until_done()
+
+        metrics = writer.get_metrics()
+        assert metrics["queue_size"] == 0
+        assert metrics["dropped_frames"] == int(drop_when_full)
+        assert (tmp_path / "frame_2.png").exists() != drop_when_full
+    finally:
+        release.set()
+        writer.stop()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import torch
+
+from lerobot.datasets.compute_stats import aggregate_stats
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+from lerobot.datasets.merge_datasets import link_or_copy_file, merge_datasets
+from tests.fixtures.constants import DUMMY_HWC, DUMMY_REPO_ID
+
+FEATURES = {
+    "video": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+    "state": {"dtype": "float32", "shape": (2,), "names": None},
+}
+
+
+def record_dataset(factory, root, tasks, fps=30):
+    dataset = factory(root=root, features=FEATURES, fps=fps)
+    for ep_idx, task in enumerate(tasks):
+        for _ in range(3 + ep_idx):
+            frame = {"video": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8), "state": torch.randn(2)}
+            dataset.add_frame(frame, task=task)
+        dataset.save_episode()
+    return root
+
+
+def test_merge_datasets(tmp_path, empty_lerobot_dataset_factory):
+    roots = [
+        record_dataset(empty_lerobot_dataset_factory, tmp_path / "first", ["Task A", "Task B"]),
+        record_dataset(empty_lerobot_dataset_factory, tmp_path / "second", ["Task C", "Task B", "Task C"]),
+    ]
+    inputs = [LeRobotDataset(DUMMY_REPO_ID, root=root, video_backend="pyav") for root in roots]
+
+    output_root = tmp_path / "merged"
+    meta = merge_datasets([DUMMY_REPO_ID] * 2, "dummy/merged", roots=roots, output_root=output_root)
+    assert meta.total_episodes == 5
+    assert meta.total_frames == 7 + 12
+    assert meta.tasks == {0: "Task A", 1: "Task B", 2: "Task C"}
+    assert [ep["tasks"] for ep in meta.episodes.values()] == [
+        ["Task A"],
+        ["Task B"],
+        ["Task C"],
+        ["Task B"],
+        ["Task C"],
+    ]
+
+    expected_stats = aggregate_stats([dataset.meta.stats for dataset in inputs])
+    for key in ["state", "video"]:
+        for stat in ["min", "max", "mean", "std", "count"]:
+            np.testing.assert_allclose(meta.stats[key][stat], expected_stats[key][stat], rtol=1e-6)
+    np.testing.assert_equal(meta.stats["index"]["max"], [18])
+    np.testing.assert_equal(meta.episodes_stats[3]["episode_index"]["min"], [3])
+
+    # Videos are hardlinked
+    src_video = roots[1] / inputs[1].meta.get_video_file_path(0, "video")
+    assert (output_root / meta.get_video_file_path(2, "video")).stat().st_ino == src_video.stat().st_ino
+
+    merged = LeRobotDataset("dummy/merged", root=output_root, video_backend="pyav")
+    expected_items = [item for dataset in inputs for item in dataset]
+    assert len(merged) == len(expected_items)
+    for idx, (item, expected) in enumerate(zip(merged, expected_items, strict=True)):
+        assert item["index"] == idx
+        assert item["task"] == expected["task"]
+        assert item["task_index"] == meta.task_to_task_index[expected["task"]]
+        for key in ["state", "timestamp", "frame_index", "video"]:
+            assert torch.equal(item[key], expected[key]), key
+    assert merged.episode_data_index["from"].tolist() == [0, 3, 7, 10, 14]
+
+
+def test_merge_datasets_incompatible(tmp_path, empty_lerobot_dataset_factory):
+    roots = [
+        record_dataset(empty_lerobot_dataset_factory, tmp_path / "first", ["Task A"], fps=30),
+        record_dataset(empty_lerobot_dataset_factory, tmp_path / "second", ["Task A"], fps=10),
+    ]
+    with pytest.raises(ValueError, match="fps"):
+        merge_datasets([DUMMY_REPO_ID] * 2, "dummy/merged", roots=roots, output_root=tmp_path / "merged")
+    assert not (tmp_path / "merged").exists()
+
+
+def test_link_or_copy_file(tmp_path):
+    src = tmp_path / "src.mp4"
+    src.write_bytes(np.random.bytes(10_000))
+    with patch("os.link", side_effect=OSError("Invalid cross-device link")):
+        link_or_copy_file(src, tmp_path / "copy" / "dst.mp4")
+        with patch("os.copy_file_range", side_effect=OSError("Not supported")):
+            link_or_copy_file(src, tmp_path / "copy" / "dst_fallback.mp4")
+    for name in ["dst.mp4", "dst_fallback.mp4"]:
+        dst = tmp_path / "copy" / name
+        assert dst.read_bytes() == src.read_bytes()
+        assert dst.stat().st_ino != src.stat().st_ino
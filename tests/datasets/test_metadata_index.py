@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import torch
+
+from lerobot.datasets.compute_stats import aggregate_stats
+from lerobot.datasets.lerobot_dataset import LeRobotDatasetMetadata
+from lerobot.datasets.metadata_index import METADATA_INDEX_DIR, get_metadata_index_dir
+from lerobot.datasets.utils import flatten_dict, load_episodes, load_episodes_stats, load_tasks
+from tests.fixtures.constants import DUMMY_REPO_ID
+
+
+def add_episodes(dataset, ep_lengths: list[int]):
+    for ep_length in ep_lengths:
+        for i in range(ep_length):
+            frame = {"state": torch.randn(2), "reward": torch.randn(1)}
+            dataset.add_frame(frame, task=f"Task {i % 2}")
+        dataset.save_episode()
+
+
+def assert_stats_equal(stats, expected):
+    stats, expected = flatten_dict(stats), flatten_dict(expected)
+    assert stats.keys() == expected.keys()
+    for key, value in expected.items():
+        assert stats[key].dtype == value.dtype
+        np.testing.assert_array_equal(stats[key], value)
+
+
+@pytest.fixture
+def dataset(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+        "reward": {"dtype": "float32", "shape": (1,), "names": None},
+    }
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    add_episodes(dataset, [3, 5, 2])
+    return dataset
+
+
+def test_metadata_loaded_from_index(dataset):
+    root = dataset.root
+    meta = LeRobotDatasetMetadata(DUMMY_REPO_ID, root=root)
+    assert (get_metadata_index_dir(root) / "manifest.json").is_file()
+
+    with patch("lerobot.datasets.lerobot_dataset.load_episodes_stats", side_effect=AssertionError):
+        indexed_meta = LeRobotDatasetMetadata(DUMMY_REPO_ID, root=root)
+
+    tasks, task_to_task_index = load_tasks(root)
+    assert indexed_meta.tasks == tasks
+    assert indexed_meta.task_to_task_index == task_to_task_index
+    assert indexed_meta.episodes == load_episodes(root)
+    episodes_stats = load_episodes_stats(root)
+    assert indexed_meta.episodes_stats.keys() == episodes_stats.keys()
+    for ep_idx, ep_stats in episodes_stats.items():
+        assert_stats_equal(indexed_meta.episodes_stats[ep_idx], ep_stats)
+    assert_stats_equal(indexed_meta.stats, meta.stats)
+    assert_stats_equal(indexed_meta.stats, aggregate_stats(list(episodes_stats.values())))
+
+
+def test_index_regenerated_when_jsonl_change(dataset):
+    root = dataset.root
+    LeRobotDatasetMetadata(DUMMY_REPO_ID, root=root)
+    old_index_dir = get_metadata_index_dir(root)
+
+    add_episodes(dataset, [4])
+    meta = LeRobotDatasetMetadata(DUMMY_REPO_ID, root=root)
+    index_dir = get_metadata_index_dir(root)
+
+    assert index_dir != old_index_dir
+    assert [path.name for path in (root / METADATA_INDEX_DIR).iterdir()] == [index_dir.name]
+    assert meta.total_episodes == 4
+    assert meta.episodes == load_episodes(root)
+    assert_stats_equal(meta.stats, aggregate_stats(list(load_episodes_stats(root).values())))
@@ -13,6 +13,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import pytest
+import torch
 from datasets import Dataset
 
 from lerobot.datasets.push_dataset_to_hub.utils import calculate_episode_data_index
@@ -88,3 +90,31 @@ def test_shuffle():
     assert sampler.indices == [0, 1, 2, 3, 4, 5]
     assert len(sampler) == 6
     assert set(sampler) == {0, 1, 2, 3, 4, 5}
+
+
+def test_shuffle_blocks():
+    dataset = Dataset.from_dict(
+        {
+            "timestamp": [0.1 * i for i in range(20)],
+            "index": list(range(20)),
+            "episode_index": [0] * 7 + [1] * 3 + [2] * 10,
+        },
+    )
+    dataset.set_transform(hf_transform_to_torch)
+    episode_data_index = calculate_episode_data_index(dataset)
+    sampler = EpisodeAwareSampler(episode_data_index, drop_n_last_frames=1, shuffle=True, block_size=4)
+    assert len(sampler) == 17
+    for _ in range(10):
+        blocks = sampler._shuffled_blocks()
+        assert all(0 < end - start <= 4 for start, end in blocks)
+        # Blocks never span two episodes
+        assert all(start >= 7 or end <= 6 for start, end in blocks)
+        assert all(start >= 10 or end <= 9 for start, end in blocks)
+        indices = list(sampler)
+        assert sorted(indices) == sampler.indices
+
+
+def test_invalid_block_size():
+    episode_data_index = {"from": torch.tensor([0]), "to": torch.tensor([3])}
+    with pytest.raises(ValueError):
+        EpisodeAwareSampler(episode_data_index, block_size=0)
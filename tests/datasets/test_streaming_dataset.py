@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+import pytest
+import torch
+
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+from lerobot.datasets.streaming_dataset import StreamingLeRobotDataset
+from tests.fixtures.constants import DUMMY_HWC, DUMMY_REPO_ID
+
+
+@pytest.fixture
+def dataset_root(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "image": {"dtype": "image", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "video": {"dtype": "video", "shape": DUMMY_HWC, "names": ["height", "width", "channels"]},
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+    }
+    root = tmp_path / "test"
+    dataset = empty_lerobot_dataset_factory(root=root, features=features, use_videos=True)
+    for ep_length in [9, 4, 6]:
+        for _ in range(ep_length):
+            frame = {
+                "image": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8),
+                "video": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8),
+                "state": torch.randn(2),
+            }
+            dataset.add_frame(frame, task="Dummy task")
+        dataset.save_episode()
+    return root
+
+
+def test_streaming_items_match_dataset_items(dataset_root):
+    delta_timestamps = {
+        "video": [-3 / 30, -1 / 30, 0, 2 / 30],
+        "image": [-1 / 30, 0],
+        "state": [0, 1 / 30, 2 / 30],
+    }
+    kwargs = {"root": dataset_root, "delta_timestamps": delta_timestamps, "video_backend": "pyav"}
+    dataset = LeRobotDataset(DUMMY_REPO_ID, **kwargs)
+    streaming = StreamingLeRobotDataset(DUMMY_REPO_ID, shuffle=False, video_chunk_size=4, **kwargs)
+    assert streaming.num_frames == dataset.num_frames
+
+    items = list(streaming)
+    assert len(items) == len(dataset)
+    for idx, item in enumerate(items):
+        expected = dataset[idx]
+        assert item.keys() == expected.keys()
+        for key, value in expected.items():
+            if isinstance(value, torch.Tensor):
+                assert item[key].dtype == value.dtype, key
+                assert torch.equal(item[key], value), key
+            else:
+                assert item[key] == value
+
+
+def test_streaming_shuffle_and_sharding(dataset_root):
+    streaming = StreamingLeRobotDataset(
+        DUMMY_REPO_ID, root=dataset_root, video_backend="pyav", buffer_size=5, seed=1
+    )
+    dataloader = torch.utils.data.DataLoader(streaming, batch_size=None, num_workers=2)
+    indices = [item["index"].item() for item in dataloader]
+    assert sorted(indices) == list(range(streaming.num_frames))
+    assert indices != sorted(indices)
+
+    # Same order for the same epoch, and a different one for the next epoch
+    assert [item["index"].item() for item in dataloader] == indices
+    streaming.set_epoch(1)
+    assert [item["index"].item() for item in dataloader] != indices
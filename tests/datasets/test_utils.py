@@ -14,12 +14,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import numpy as np
 import torch
 from datasets import Dataset
 from huggingface_hub import DatasetCard
 
 from lerobot.datasets.push_dataset_to_hub.utils import calculate_episode_data_index
-from lerobot.datasets.utils import create_lerobot_dataset_card, hf_transform_to_torch
+from lerobot.datasets.utils import (
+    create_lerobot_dataset_card,
+    get_video_frame_indices,
+    hf_transform_to_torch,
+)
 
 
 def test_default_parameters():
@@ -53,3 +58,13 @@ def test_calculate_episode_data_index():
     episode_data_index = calculate_episode_data_index(dataset)
     assert torch.equal(episode_data_index["from"], torch.tensor([0, 2, 3]))
     assert torch.equal(episode_data_index["to"], torch.tensor([2, 3, 6]))
+
+
+def test_get_video_frame_indices():
+    fps = 30
+    timestamps = np.array([0, 1 / fps, 2 / fps, 0, 1 / fps + 5e-5], dtype=np.float32)
+    frame_indices = get_video_frame_indices(timestamps, fps, tolerance_s=1e-4)
+    np.testing.assert_array_equal(frame_indices, [0, 1, 2, 0, 1])
+
+    timestamps[-1] = 1.5 / fps
+    assert get_video_frame_indices(timestamps, fps, tolerance_s=1e-4) is None
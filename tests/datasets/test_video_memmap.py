@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pickle
+
+import numpy as np
+import pytest
+import torch
+
+from lerobot.datasets.lerobot_dataset import LeRobotDataset
+from lerobot.datasets.video_memmap import DecodedVideoMemmap, build_decoded_video_memmap
+from tests.fixtures.constants import DUMMY_REPO_ID
+
+VIDEO_KEY = "observation.images.cam"
+
+
+@pytest.fixture
+def video_dataset_root(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        VIDEO_KEY: {"dtype": "video", "shape": (32, 48, 3), "names": ["height", "width", "channels"]},
+        "action": {"dtype": "float32", "shape": (2,), "names": None},
+    }
+    root = tmp_path / "dataset"
+    dataset = empty_lerobot_dataset_factory(root=root, features=features, use_videos=True)
+    for ep_length in [8, 12]:
+        for i in range(ep_length):
+            image = np.full((32, 48, 3), fill_value=(i * 16) % 256, dtype=np.uint8)
+            dataset.add_frame({VIDEO_KEY: image, "action": torch.randn(2)}, task="Dummy task")
+        dataset.save_episode()
+    return root
+
+
+def test_decoded_items_match_video_items(tmp_path, video_dataset_root):
+    delta_timestamps = {VIDEO_KEY: [-2 / 30, -1 / 30, 0]}
+    dataset = LeRobotDataset(
+        DUMMY_REPO_ID, root=video_dataset_root, delta_timestamps=delta_timestamps, video_backend="pyav"
+    )
+    decoded = LeRobotDataset(
+        DUMMY_REPO_ID,
+        root=video_dataset_root,
+        delta_timestamps=delta_timestamps,
+        video_backend="pyav",
+        decoded_video_dir=tmp_path / "decoded",
+    )
+
+    assert (tmp_path / "decoded" / f"{VIDEO_KEY}.uint8").is_file()
+    for idx in range(len(dataset)):
+        assert torch.equal(decoded[idx][VIDEO_KEY], dataset[idx][VIDEO_KEY])
+        assert torch.equal(decoded[idx][f"{VIDEO_KEY}_is_pad"], dataset[idx][f"{VIDEO_KEY}_is_pad"])
+
+
+def test_decoded_resolution_and_episode_subset(tmp_path, video_dataset_root):
+    dataset = LeRobotDataset(DUMMY_REPO_ID, root=video_dataset_root, video_backend="pyav")
+    build_decoded_video_memmap(dataset, tmp_path / "decoded", resolution=(16, 24))
+
+    subset = LeRobotDataset(
+        DUMMY_REPO_ID,
+        root=video_dataset_root,
+        episodes=[1],
+        video_backend="pyav",
+        decoded_video_dir=tmp_path / "decoded",
+    )
+    assert subset[0][VIDEO_KEY].shape == (3, 16, 24)
+
+    with pytest.raises(FileExistsError):
+        build_decoded_video_memmap(dataset, tmp_path / "decoded")
+
+
+def test_decoded_tolerance(tmp_path, video_dataset_root):
+    dataset = LeRobotDataset(DUMMY_REPO_ID, root=video_dataset_root, video_backend="pyav")
+    decoded = build_decoded_video_memmap(dataset, tmp_path / "decoded")
+
+    frames = decoded.query(1, {VIDEO_KEY: [1 / 30, 2 / 30]}, tolerance_s=1e-4, return_uint8=True)
+    assert frames[VIDEO_KEY].dtype == torch.uint8
+    assert frames[VIDEO_KEY].shape == (2, 3, 32, 48)
+
+    with pytest.raises(AssertionError):
+        decoded.query(1, {VIDEO_KEY: [1.5 / 30]}, tolerance_s=1e-4)
+    with pytest.raises(ValueError):
+        decoded.query(2, {VIDEO_KEY: [0.0]}, tolerance_s=1e-4)
+
+
+def test_decoded_pickle(tmp_path, video_dataset_root):
+    dataset = LeRobotDataset(DUMMY_REPO_ID, root=video_dataset_root, video_backend="pyav")
+    decoded = build_decoded_video_memmap(dataset, tmp_path / "decoded")
+
+    unpickled = pickle.loads(pickle.dumps(decoded))
+    assert isinstance(unpickled, DecodedVideoMemmap)
+    assert isinstance(unpickled._frames[VIDEO_KEY], np.memmap)
+    query = {VIDEO_KEY: [0.0]}
+    assert torch.equal(unpickled.query(0, query, 1e-4)[VIDEO_KEY], decoded.query(0, query, 1e-4)[VIDEO_KEY])
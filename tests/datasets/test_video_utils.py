@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pickle
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+import torch
+
+from lerobot.datasets import video_utils
+from lerobot.datasets.image_writer import write_image
+from lerobot.datasets.video_utils import (
+    MAX_GOP_SIZE,
+    DecodedFrameCache,
+    StreamingVideoEncoder,
+    VideoDecoderCache,
+    VideoEncodingManager,
+    VideoEncodingProfile,
+    decode_video_frames,
+    decode_video_frames_at_indices,
+    encode_video_frames,
+    get_video_keyframe_indices,
+    probe_decode_latency,
+)
+
+FPS = 30
+TOLERANCE_S = 1e-4
+
+
+@pytest.fixture(scope="module")
+def video_factory(tmp_path_factory):
+    def _create_video(name: str = "video", num_frames: int = 30, height: int = 48, width: int = 64) -> Path:
+        root = tmp_path_factory.mktemp(name)
+        imgs_dir = root / "images"
+        imgs_dir.mkdir()
+        for i in range(num_frames):
+            image = np.full((height, width, 3), fill_value=(i * 8) % 256, dtype=np.uint8)
+            write_image(image, imgs_dir / f"frame_{i:06d}.png")
+        video_path = root / f"{name}.mp4"
+        encode_video_frames(imgs_dir, video_path, FPS, vcodec="h264", g=2, crf=None, overwrite=True)
+        return video_path
+
+    return _create_video
+
+
+def test_decoder_cache_hits_and_misses(video_factory):
+    video_path = video_factory()
+    cache = VideoDecoderCache(max_size=2)
+    timestamps = [0.0, 5 / FPS]
+
+    expected = decode_video_frames(video_path, timestamps, TOLERANCE_S, "pyav")
+    first = decode_video_frames(video_path, timestamps, TOLERANCE_S, "pyav", decoder_cache=cache)
+    second = decode_video_frames(video_path, timestamps, TOLERANCE_S, "pyav", decoder_cache=cache)
+
+    assert torch.equal(first, expected)
+    assert torch.equal(second, expected)
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "open_decoders": 1}
+
+
+def test_decoder_cache_lru_eviction(video_factory):
+    paths = [video_factory(name=f"video_{i}", num_frames=5) for i in range(3)]
+    cache = VideoDecoderCache(max_size=2)
+
+    for path in [paths[0], paths[1], paths[0], paths[2]]:
+        decode_video_frames(path, [0.0], TOLERANCE_S, "pyav", decoder_cache=cache)
+
+    # paths[1] is the least recently used decoder when paths[2] is opened
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    decode_video_frames(paths[0], [0.0], TOLERANCE_S, "pyav", decoder_cache=cache)
+    decode_video_frames(paths[1], [0.0], TOLERANCE_S, "pyav", decoder_cache=cache)
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 4
+
+
+def test_decoder_cache_drops_decoders_after_fork(video_factory):
+    video_path = video_factory()
+    cache = VideoDecoderCache()
+    decode_video_frames(video_path, [0.0], TOLERANCE_S, "pyav", decoder_cache=cache)
+    assert len(cache) == 1
+
+    with patch("lerobot.datasets.video_utils.os.getpid", return_value=-1):
+        assert len(cache) == 0
+        decode_video_frames(video_path, [0.0], TOLERANCE_S, "pyav", decoder_cache=cache)
+        assert cache.stats()["misses"] == 1
+
+
+def test_decoder_cache_pickle(video_factory):
+    video_path = video_factory()
+    cache = VideoDecoderCache(max_size=3)
+    decode_video_frames(video_path, [0.0], TOLERANCE_S, "pyav", decoder_cache=cache)
+
+    unpickled = pickle.loads(pickle.dumps(cache))
+    assert unpickled.max_size == 3
+    assert len(unpickled) == 0
+
+
+def test_decoder_cache_invalid_size():
+    with pytest.raises(ValueError):
+        VideoDecoderCache(max_size=0)
+
+
+def test_frame_cache_decodes_only_missing_frames(video_factory):
+    video_path = video_factory()
+    frame_cache = DecodedFrameCache()
+    first_ts = [i / FPS for i in range(0, 4)]
+    second_ts = [i / FPS for i in range(1, 5)]
+
+    with patch.object(
+        video_utils, "_decode_video_frames", wraps=video_utils._decode_video_frames
+    ) as decode_mock:
+        first = decode_video_frames(
+            video_path, first_ts, TOLERANCE_S, "pyav", frame_cache=frame_cache, fps=FPS
+        )
+        second = decode_video_frames(
+            video_path, second_ts, TOLERANCE_S, "pyav", frame_cache=frame_cache, fps=FPS
+        )
+
+    assert decode_mock.call_count == 2
+    assert decode_mock.call_args_list[1].args[1] == [4 / FPS]
+    assert torch.equal(first, decode_video_frames(video_path, first_ts, TOLERANCE_S, "pyav"))
+    assert torch.equal(second, decode_video_frames(video_path, second_ts, TOLERANCE_S, "pyav"))
+    assert frame_cache.stats()["hits"] == 3
+    assert frame_cache.stats()["misses"] == 5
+    assert frame_cache.hit_rate == 3 / 8
+
+
+def test_frame_cache_uint8_and_padding(video_factory):
+    video_path = video_factory()
+    frame_cache = DecodedFrameCache()
+    # Padded queries repeat the first frame of the episode
+    timestamps = [0.0, 0.0, 1 / FPS]
+
+    frames = decode_video_frames(
+        video_path, timestamps, TOLERANCE_S, "pyav", frame_cache=frame_cache, fps=FPS, return_uint8=True
+    )
+
+    assert frames.dtype == torch.uint8
+    assert frames.shape[0] == 3
+    assert torch.equal(frames[0], frames[1])
+    assert len(frame_cache) == 2
+
+
+def test_frame_cache_max_bytes():
+    frame = torch.zeros(3, 4, 4, dtype=torch.uint8)
+    frame_cache = DecodedFrameCache(max_bytes=2 * frame.numel())
+    for i in range(3):
+        frame_cache.put("video.mp4", i, frame)
+
+    assert len(frame_cache) == 2
+    assert frame_cache.num_bytes == 2 * frame.numel()
+    assert frame_cache.get("video.mp4", 0) is None
+    assert frame_cache.get("video.mp4", 2) is not None
+    assert frame_cache.stats()["evictions"] == 1
+
+
+def test_frame_cache_requires_fps(video_factory):
+    with pytest.raises(ValueError):
+        decode_video_frames(video_factory(), [0.0], TOLERANCE_S, "pyav", frame_cache=DecodedFrameCache())
+
+
+def test_decode_video_frames_at_indices(video_factory):
+    video_path = video_factory()
+    frame_cache = DecodedFrameCache()
+    frame_indices = [2, 3, 3, 7]
+
+    frames = decode_video_frames_at_indices(video_path, frame_indices, FPS, "pyav", frame_cache=frame_cache)
+
+    expected = decode_video_frames(video_path, [i / FPS for i in frame_indices], TOLERANCE_S, "pyav")
+    assert torch.equal(frames, expected)
+    assert len(frame_cache) == 3
+
+
+def test_streaming_video_encoder(tmp_path):
+    images = [np.random.randint(0, 256, (48, 64, 3), dtype=np.uint8) for _ in range(10)]
+    imgs_dir = tmp_path / "images"
+    imgs_dir.mkdir()
+    for i, image in enumerate(images):
+        write_image(image, imgs_dir / f"frame_{i:06d}.png")
+    png_video_path = tmp_path / "png.mp4"
+    encode_video_frames(imgs_dir, png_video_path, FPS, vcodec="h264", overwrite=True)
+
+    encoder = StreamingVideoEncoder(tmp_path / "streaming.mp4", FPS, vcodec="h264")
+    for image in images:
+        # Channel first float images are converted like by `write_image`
+        encoder.add_frame(image.transpose(2, 0, 1).astype(np.float32) / 255)
+    stats = encoder.finish()
+
+    timestamps = [i / FPS for i in range(len(images))]
+    expected = decode_video_frames(png_video_path, timestamps, TOLERANCE_S, "pyav")
+    frames = decode_video_frames(encoder.video_path, timestamps, TOLERANCE_S, "pyav")
+    assert torch.equal(frames, expected)
+
+    array = np.stack(images).astype(np.float64) / 255
+    assert stats["count"].tolist() == [len(images)]
+    np.testing.assert_allclose(stats["mean"].flatten(), array.mean(axis=(0, 1, 2)))
+    np.testing.assert_allclose(stats["std"].flatten(), array.std(axis=(0, 1, 2)))
+    np.testing.assert_allclose(stats["min"].flatten(), array.min(axis=(0, 1, 2)))
+    np.testing.assert_allclose(stats["max"].flatten(), array.max(axis=(0, 1, 2)))
+
+
+def test_streaming_video_encoder_cancel(tmp_path):
+    encoder = StreamingVideoEncoder(tmp_path / "video.mp4", FPS, vcodec="h264")
+    encoder.add_frame(np.zeros((48, 64, 3), dtype=np.uint8))
+    encoder.cancel()
+    assert not encoder.video_path.exists()
+
+
+def test_streaming_video_encoder_frame_shape(tmp_path):
+    # Channel last frames with a height of 3 aren't mistaken for channel first ones
+    frame_shape = (3, 16, 3)
+    image = np.random.randint(0, 256, frame_shape, dtype=np.uint8)
+    encoder = StreamingVideoEncoder(
+        tmp_path / "video.mp4", FPS, vcodec="h264", pix_fmt="yuv444p", crf=0, frame_shape=frame_shape
+    )
+    encoder.add_frame(image)
+    encoder.add_frame(image.transpose(2, 0, 1))
+    encoder.finish()
+
+    frames = decode_video_frames(encoder.video_path, [0, 1 / FPS], TOLERANCE_S, "pyav")
+    assert frames.shape == (2, 3, 3, 16)
+    assert torch.equal(frames[0], frames[1])
+
+
+def test_streaming_video_encoder_no_frame(tmp_path):
+    encoder = StreamingVideoEncoder(tmp_path / "video.mp4", FPS, vcodec="h264")
+    with pytest.raises(RuntimeError, match="No frame was added"):
+        encoder.finish()
+    assert not encoder.video_path.exists()
+
+
+@pytest.mark.parametrize(
+    "frame_window, block_size, expected_g",
+    [
+        ([0], 1, 2),
+        ([-1, 0], 1, 3),
+        ([0, -1], 8, 10),
+        ([0, 1, 2, 3, 4, 5], 64, 70),
+        ([0], 1000, MAX_GOP_SIZE),
+        ([0], None, MAX_GOP_SIZE),
+    ],
+)
+def test_video_encoding_profile_gop(frame_window, block_size, expected_g):
+    profile = VideoEncodingProfile.from_access_pattern(frame_window, block_size, fast_decode=1)
+    assert profile.g == expected_g
+    assert profile.frame_window == sorted(frame_window)
+    assert profile.encoding_kwargs()["fast_decode"] == 1
+    assert VideoEncodingProfile.from_dict(profile.to_dict()) == profile
+
+
+def test_video_encoding_profile_from_delta_timestamps():
+    delta_timestamps = {
+        "observation.images.top": [-0.1, 0.0],
+        "observation.state": [-0.1, 0.0],
+        "action": [i / 10 for i in range(-1, 15)],
+    }
+    profile = VideoEncodingProfile.from_delta_timestamps(
+        delta_timestamps, 10, video_keys=["observation.images.top"]
+    )
+    assert profile.frame_window == [-1, 0]
+    assert profile.g == 3
+    assert VideoEncodingProfile.from_delta_timestamps(None, 10) == VideoEncodingProfile()
+
+    with pytest.raises(ValueError):
+        VideoEncodingProfile.from_access_pattern([0], block_size=0)
+
+
+def test_probe_decode_latency(tmp_path):
+    profile = VideoEncodingProfile.from_access_pattern([-1, 0], block_size=4)
+    encoder = StreamingVideoEncoder(tmp_path / "video.mp4", FPS, **profile.encoding_kwargs())
+    for _ in range(20):
+        encoder.add_frame(np.random.randint(0, 256, (48, 64, 3), dtype=np.uint8))
+    encoder.finish()
+
+    keyframes, num_frames = get_video_keyframe_indices(encoder.video_path, FPS)
+    assert keyframes == list(range(0, num_frames, profile.g))
+
+    probe = probe_decode_latency(
+        encoder.video_path, FPS, profile.frame_window, profile.block_size, backend="pyav", num_items=10
+    )
+    assert probe["backend"] == "pyav"
+    assert probe["num_items"] == 10
+    assert 0 < probe["p50_ms"] <= probe["p99_ms"]
+
+
+def test_video_encoding_manager_keeps_original_exception(tmp_path):
+    dataset = MagicMock(root=tmp_path, num_episodes=1, episodes_since_last_encoding=1)
+    dataset.meta.video_keys = ["video"]
+    dataset.flush.side_effect = RuntimeError("Finalization of episode 0 failed.")
+    dataset._get_image_file_path.return_value = tmp_path / "images" / "video" / "episode_000001" / "0.png"
+    (tmp_path / "images" / "video" / "episode_000001").mkdir(parents=True)
+
+    with pytest.raises(KeyboardInterrupt), VideoEncodingManager(dataset):
+        raise KeyboardInterrupt
+
+    dataset._cancel_video_encoders.assert_called_once()
+    dataset.batch_encode_videos.assert_not_called()
+    assert not (tmp_path / "images").exists()
+
+    # Without another exception, the finalization error is raised
+    with pytest.raises(RuntimeError, match="episode 0"), VideoEncodingManager(dataset):
+        pass
@@ -38,7 +38,7 @@ from lerobot.policies.factory import (
     make_policy,
     make_policy_config,
 )
-from lerobot.policies.normalize import Normalize, Unnormalize
+from lerobot.policies.normalize import Normalize, NormalizeBuffer, Unnormalize
 from lerobot.policies.pretrained import PreTrainedPolicy
 from lerobot.utils.random_utils import seeded_context
 from tests.artifacts.policies.save_policy_to_safetensors import get_policy_stats
@@ -363,6 +363,24 @@ def test_normalize(insert_temporal_dim):
     unnormalize(output_batch)
 
 
+@pytest.mark.parametrize("normalize_cls", [Normalize, NormalizeBuffer])
+@pytest.mark.parametrize("norm_mode", [NormalizationMode.MEAN_STD, NormalizationMode.IDENTITY])
+def test_normalize_uint8_images(normalize_cls, norm_mode):
+    """Test that uint8 frames are normalized exactly like the float frames a dataset would return."""
+    features = {"observation.image": PolicyFeature(type=FeatureType.VISUAL, shape=(3, 96, 96))}
+    norm_map = {"VISUAL": norm_mode}
+    stats = {"observation.image": {"mean": torch.rand(3, 1, 1), "std": torch.rand(3, 1, 1)}}
+    normalize = normalize_cls(features, norm_map, stats=stats)
+
+    uint8_images = torch.randint(0, 256, (2, 3, 96, 96), dtype=torch.uint8)
+    float_images = uint8_images.type(torch.float32) / 255
+    uint8_output = normalize({"observation.image": uint8_images})["observation.image"]
+    float_output = normalize({"observation.image": float_images})["observation.image"]
+
+    assert uint8_output.dtype == torch.float32
+    assert torch.equal(uint8_output, float_output)
+
+
 @pytest.mark.parametrize(
     "ds_repo_id, policy_name, policy_kwargs, file_name_extra",
     [